@@ -0,0 +1,43 @@
+import asyncio
+from fastapi import APIRouter
+from app.api.responses import FastJSONResponse
+from app.core.database import get_database
+from app.services.warmup import model_warmup
+
+router = APIRouter(default_response_class=FastJSONResponse)
+
+# A readiness probe must answer before the orchestrator's own timeout
+DATABASE_PING_TIMEOUT_SECONDS = 2.0
+
+async def _database_ready() -> bool:
+    try:
+        await asyncio.wait_for(get_database().command("ping"), DATABASE_PING_TIMEOUT_SECONDS)
+    except Exception:
+        return False
+    return True
+
+@router.get("/healthz", include_in_schema=False)
+async def liveness():
+    """
+    The process is up and serving; says nothing about models or MongoDB
+    """
+    return {"status": "ok"}
+
+@router.get("/readyz", include_in_schema=False)
+async def readiness():
+    """
+    200 once the models are loaded and warm and MongoDB answers, 503 until then
+    """
+    checks = {
+        "models": model_warmup.ready,
+        "database": await _database_ready()
+    }
+    ready = all(checks.values())
+    return FastJSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "checks": checks,
+            "warmup": model_warmup.stats()
+        }
+    )
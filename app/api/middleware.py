@@ -0,0 +1,116 @@
+import time
+from typing import Tuple
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.metrics import METHOD_LABELS, metrics, request_seconds, start_request
+from app.services.blob_store import UploadTooLargeError
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject uploads larger than the limit with 413 as early as possible
+
+    A declared Content-Length above the limit is rejected before the body is
+    read. Bodies without one (chunked uploads) are counted as they are
+    received and the request is cut off as soon as the limit is crossed,
+    before the form parser spools the rest of the upload to disk.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, path_suffixes: Tuple[str, ...] = ("/verify/file", "/uploads")):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_suffixes = path_suffixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.max_bytes or not scope["path"].endswith(self.path_suffixes):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await self._reject(scope, receive, send)
+                return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def receive_limited() -> Message:
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    too_large = True
+                    raise UploadTooLargeError(self.max_bytes)
+            return message
+
+        async def send_unless_rejected(message: Message) -> None:
+            nonlocal response_started
+            # The form parser turns the error into a 400; the 413 below replaces it
+            if too_large and not response_started:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive_limited, send_unless_rejected)
+        except UploadTooLargeError:
+            if not too_large:
+                raise
+        if too_large and not response_started:
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": f"Upload exceeds the maximum size of {self.max_bytes} bytes"}
+        )
+        await response(scope, receive, send)
+
+
+class MetricsMiddleware:
+    """
+    Count in-flight requests, time each route and optionally add a Server-Timing header
+
+    Stages timed while the request runs (see app.core.metrics) are collected
+    in its context and listed in the header when METRICS_SERVER_TIMING is on.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings = start_request()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timings(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timings.header(time.perf_counter() - start))
+            await send(message)
+
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            metrics.in_flight -= 1
+            # The router stores the matched endpoint in the scope
+            endpoint = scope.get("endpoint")
+            request_seconds.observe(
+                time.perf_counter() - start,
+                scope["method"] if scope["method"] in METHOD_LABELS else "other",
+                getattr(endpoint, "__name__", "unmatched"),
+                str(status)
+            )
@@ -0,0 +1,40 @@
+from collections.abc import Mapping
+from typing import Any
+import orjson
+from bson import ObjectId
+from starlette.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    """
+    Types orjson does not encode natively: ObjectIds, lazily decoded results, tuples from pipelines
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode API payloads straight from dicts and Motor documents
+    """
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson
+
+    Routes return this with plain dicts to skip FastAPI's ``jsonable_encoder``
+    pass and the response-model validation when the payload is already known
+    to have the right shape.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
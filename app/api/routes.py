@@ -1,15 +1,96 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from typing import Optional, List
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+import time
+from datetime import datetime
 from app.services.analyzer import ContentAnalyzer
 from app.services.classifier import ContentClassifier
 from app.core.config import settings
-from app.repositories.verification import VerificationRepository
-from app.models.database import VerificationCreate, VerificationInDB
+from app.core.database import pool_stats
+from app.core.metrics import metrics, timed_stage
+from app.api.responses import FastJSONResponse, dumps
+from app.repositories.verification import FINAL_STATUSES, VerificationRepository
+from app.models.database import VerificationCreate, VerificationInDB, VerificationUpdate
+from app.services.model_registry import model_registry, current_rss_bytes, memory_usage
+from app.services.executor import ExecutorSaturatedError, inference_executor
+from app.services.verification import VerificationService
+from app.services.jobs import JobQueueFullError, create_job_queue
+from app.services.claim_indexer import create_claim_indexer
+from app.services.write_behind import create_write_behind
+from app.services.warmup import model_warmup
+from app.services.cache import compute_content_hash, result_cache
+from app.services.blob_store import REFERENCE_PREFIX, UploadTooLargeError, blob_store
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 verification_repository = VerificationRepository()
 
+# Analyzer and classifier are shared by all requests; models live in the registry
+analyzer = ContentAnalyzer()
+classifier = ContentClassifier()
+# Cached and stored results are reused only under the same analysis and scoring models
+result_cache.set_model_version(f"{settings.MODEL_VERSION}+{classifier.model.version}")
+# Final results are buffered and bulk-written when PERSISTENCE_WRITE_BEHIND is on
+write_behind = create_write_behind(verification_repository)
+verification_service = VerificationService(
+    verification_repository,
+    analyzer,
+    classifier,
+    write_behind=write_behind
+)
+
+# Background workers for POST /verify?async=true
+job_queue = create_job_queue(verification_service)
+
+# Completed text verifications are fed back into the claim index
+claim_indexer = create_claim_indexer(verification_repository)
+
+def _service_metrics():
+    """
+    Gauges of the queues, caches and models, read when /metrics is scraped
+    """
+    executor_stats = inference_executor.stats()
+    cache_stats = result_cache.stats()
+    models = model_registry.stats()
+    gauges = [
+        ("inference_queue_depth", "Requests admitted and waiting for or running inference", "gauge",
+         [({"modality": modality}, count) for modality, count in executor_stats["pending"].items()]),
+        ("inference_running", "Inference calls running in the executor", "gauge",
+         [({"modality": modality}, count) for modality, count in executor_stats["running"].items()]),
+        ("inference_rejected_total", "Requests rejected because the inference queue was full", "counter",
+         [({"modality": modality}, count) for modality, count in executor_stats["rejected"].items()]),
+        ("text_batcher_queue_depth", "Texts waiting for the next micro-batch", "gauge",
+         [({}, analyzer.text_batcher.stats()["queue_depth"])]),
+        ("image_batcher_queue_depth", "Images waiting for the next micro-batch", "gauge",
+         [({}, analyzer.image_batcher.stats()["queue_depth"])]),
+        ("prefilter_exits_total", "Texts answered by each stage of the pre-filter cascade", "counter",
+         [({"stage": stage}, count) for stage, count in analyzer.prefilter.stats()["exits"].items()]),
+        ("job_queue_depth", "Background verifications waiting for a worker", "gauge",
+         [({}, job_queue.stats()["queue_depth"])]),
+        ("model_loaded", "Whether a model is loaded in this process", "gauge",
+         [({"model": name, "modality": model["modality"]}, int(model["loaded"])) for name, model in models.items()]),
+        ("model_load_seconds", "Time taken to load each loaded model", "gauge",
+         [({"model": name}, model["load_time_seconds"]) for name, model in models.items() if model["loaded"]]),
+        ("result_cache_entries", "Entries in the in-memory result cache", "gauge",
+         [({}, cache_stats["size"])]),
+        ("result_cache_hits_total", "Result cache hits by tier", "counter",
+         [({"tier": "memory"}, cache_stats["hits"]), ({"tier": "persistent"}, cache_stats["persistent_hits"])]),
+        ("result_cache_misses_total", "Result cache misses", "counter",
+         [({}, cache_stats["misses"])]),
+        ("process_resident_memory_bytes", "Resident set size of this worker", "gauge",
+         [({}, current_rss_bytes())])
+    ]
+    database_pool = pool_stats()
+    if database_pool is not None:
+        gauges.append(("mongodb_connections_in_use", "Checked-out MongoDB connections", "gauge",
+                       [({}, database_pool["in_use"])]))
+    if write_behind is not None:
+        gauges.append(("write_behind_buffered", "Operations waiting in the write-behind buffer", "gauge",
+                       [({}, write_behind.stats()["buffered"])]))
+    return gauges
+
+metrics.register_collector(_service_metrics)
+
 class VerificationRequest(BaseModel):
     content: str
     content_type: str  # "text", "image", or "video"
@@ -23,48 +104,170 @@ class VerificationResponse(BaseModel):
     explanation: str
     sources: List[str]
 
+class BatchVerificationItem(BaseModel):
+    content: str  # text, or the blob reference returned by POST /uploads for media
+    content_type: str  # "text", "image", or "video"
+    source_url: Optional[str] = None
+
+class BatchVerificationRequest(BaseModel):
+    items: List[BatchVerificationItem] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+class BatchVerificationResult(BaseModel):
+    index: int
+    verification_id: str
+    status: str
+    confidence: Optional[float] = None
+    classification: Optional[str] = None
+    explanation: Optional[str] = None
+    sources: List[str] = []
+    error: Optional[str] = None
+
+class BatchVerificationResponse(BaseModel):
+    results: List[BatchVerificationResult]
+
+class UploadResponse(BaseModel):
+    reference: str
+    content_hash: str
+    size: int
+
+class VerificationSummary(BaseModel):
+    verification_id: str
+    content_type: str
+    status: str
+    classification: Optional[str] = None
+    confidence: Optional[float] = None
+    source_url: Optional[str] = None
+    file_name: Optional[str] = None
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class VerificationListResponse(BaseModel):
+    items: List[VerificationSummary]
+    next_cursor: Optional[str] = None
+
+def _saturated(error) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+async def _accept_job(
+    verification_db: VerificationInDB,
+    content,
+    content_type: str
+) -> FastJSONResponse:
+    """
+    Queue a pending verification and answer 202 with the id to poll or stream
+    """
+    verification_id = str(verification_db.id)
+    try:
+        await job_queue.enqueue(
+            verification_id,
+            content,
+            content_type,
+            verification_db.content_hash,
+            verification_db.perceptual_hash
+        )
+    except JobQueueFullError:
+        # Nothing will ever process the pending record
+        await verification_repository.delete(verification_id)
+        raise
+    return FastJSONResponse(
+        status_code=202,
+        content={"verification_id": verification_id, "status": "pending"},
+        headers={"Location": f"{settings.API_V1_STR}/status/{verification_id}"}
+    )
+
+def _completed_response(verification_id: str, classification_result: Dict[str, Any]) -> FastJSONResponse:
+    # Already in the VerificationResponse shape, so it is encoded without a model instance
+    return FastJSONResponse({
+        "verification_id": verification_id,
+        "status": "completed",
+        "confidence": classification_result["confidence"],
+        "classification": classification_result["label"],
+        "explanation": classification_result["explanation"],
+        "sources": classification_result["sources"]
+    })
+
+async def _verify(
+    verification: VerificationCreate,
+    content,
+    async_mode: bool
+):
+    """
+    Reuse a cached result for identical or near-identical content, otherwise analyze now or in the background
+    """
+    with timed_stage("cache_lookup", verification.content_type):
+        cached = await verification_service.find_cached(verification.content_hash)
+    if cached is None and verification.content_type == "image":
+        verification.perceptual_hash, cached = await verification_service.find_near_duplicate(content)
+    if cached is not None:
+        verification_id = await verification_service.store(
+            verification,
+            VerificationUpdate(status="completed", **cached)
+        )
+        return _completed_response(verification_id, cached["classification_result"])
+    
+    if async_mode:
+        # The job needs a pending record that status polling can find
+        with timed_stage("store", verification.content_type):
+            verification_db = await verification_repository.create(verification)
+        return await _accept_job(verification_db, content, verification.content_type)
+    
+    # Synchronous verifications are written once, with their final result
+    verification_id, classification_result = await verification_service.verify(verification, content)
+    return _completed_response(verification_id, classification_result)
+
+def _status_payload(verification: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": verification.get("status", "pending"),
+        "analysis_result": verification.get("analysis_result"),
+        "classification_result": verification.get("classification_result"),
+        "error": verification.get("error")
+    }
+
+def _summary(verification: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A projected listing document in the VerificationSummary shape
+    """
+    classification_result = verification.get("classification_result") or {}
+    return {
+        "verification_id": str(verification["_id"]),
+        "content_type": verification["content_type"],
+        "status": verification.get("status", "pending"),
+        "classification": classification_result.get("label"),
+        "confidence": classification_result.get("confidence"),
+        "source_url": verification.get("source_url"),
+        "file_name": verification.get("file_name"),
+        "file_size": verification.get("file_size"),
+        "error": verification.get("error"),
+        "created_at": verification["created_at"],
+        "updated_at": verification["updated_at"]
+    }
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
 @router.post("/verify", response_model=VerificationResponse)
-async def verify_content(request: VerificationRequest):
+async def verify_content(
+    request: VerificationRequest,
+    async_mode: bool = Query(False, alias="async")
+):
     try:
         # Create verification record
         verification = VerificationCreate(
             content=request.content,
             content_type=request.content_type,
-            source_url=request.source_url
-        )
-        verification_db = await verification_repository.create(verification)
-        
-        # Initialize analyzer and classifier
-        analyzer = ContentAnalyzer()
-        classifier = ContentClassifier()
-        
-        # Analyze content
-        analysis_result = await analyzer.analyze(
-            content=request.content,
-            content_type=request.content_type
-        )
-        
-        # Classify content
-        classification_result = await classifier.classify(analysis_result)
-        
-        # Update verification record with results
-        await verification_repository.update(
-            verification_db.id,
-            VerificationUpdate(
-                analysis_result=analysis_result,
-                classification_result=classification_result,
-                status="completed"
-            )
-        )
-        
-        return VerificationResponse(
-            verification_id=str(verification_db.id),
-            status="completed",
-            confidence=classification_result["confidence"],
-            classification=classification_result["label"],
-            explanation=classification_result["explanation"],
-            sources=classification_result["sources"]
+            source_url=request.source_url,
+            content_hash=compute_content_hash(request.content, request.content_type),
+            model_version=result_cache.model_version
         )
+        return await _verify(verification, request.content, async_mode)
+    except (ExecutorSaturatedError, JobQueueFullError) as e:
+        raise _saturated(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -72,7 +275,8 @@ async def verify_content(request: VerificationRequest):
 async def verify_file(
     file: UploadFile = File(...),
     content_type: str = Form(...),
-    source_url: Optional[str] = Form(None)
+    source_url: Optional[str] = Form(None),
+    async_mode: bool = Query(False, alias="async")
 ):
     try:
         # Validate content type
@@ -95,61 +299,223 @@ async def verify_file(
                 detail=f"Invalid video format: {file_ext}. Supported formats: mp4, avi, mov"
             )
         
-        # Read file content
-        content = await file.read()
+        # Stream the upload into the blob store; only a reference goes into MongoDB
+        with timed_stage("upload", content_type):
+            blob = await blob_store.ingest(file, settings.MAX_UPLOAD_SIZE, settings.UPLOAD_CHUNK_SIZE)
         
         # Create verification record
         verification = VerificationCreate(
-            content=str(content),  # Convert bytes to string for storage
+            content=blob.reference,
             content_type=content_type,
-            source_url=source_url
-        )
-        verification_db = await verification_repository.create(verification)
-        
-        # Initialize analyzer and classifier
-        analyzer = ContentAnalyzer()
-        classifier = ContentClassifier()
-        
-        # Analyze content
-        analysis_result = await analyzer.analyze(
-            content=content,
-            content_type=content_type
-        )
-        
-        # Classify content
-        classification_result = await classifier.classify(analysis_result)
-        
-        # Update verification record with results
-        await verification_repository.update(
-            verification_db.id,
-            VerificationUpdate(
-                analysis_result=analysis_result,
-                classification_result=classification_result,
-                status="completed"
-            )
-        )
-        
-        return VerificationResponse(
-            verification_id=str(verification_db.id),
-            status="completed",
-            confidence=classification_result["confidence"],
-            classification=classification_result["label"],
-            explanation=classification_result["explanation"],
-            sources=classification_result["sources"]
+            source_url=source_url,
+            content_hash=blob.content_hash,
+            file_name=file.filename,
+            file_size=blob.size,
+            model_version=result_cache.model_version
         )
+        return await _verify(verification, blob.path, async_mode)
     except HTTPException:
         raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (ExecutorSaturatedError, JobQueueFullError) as e:
+        raise _saturated(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/uploads", response_model=UploadResponse)
+async def upload_media(file: UploadFile = File(...)):
+    """
+    Store media without verifying it, for later reference from POST /verify/batch
+    """
+    try:
+        blob = await blob_store.ingest(file, settings.MAX_UPLOAD_SIZE, settings.UPLOAD_CHUNK_SIZE)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return UploadResponse(reference=blob.reference, content_hash=blob.content_hash, size=blob.size)
+
+@router.post("/verify/batch", response_model=BatchVerificationResponse)
+async def verify_batch(
+    request: BatchVerificationRequest,
+    async_mode: bool = Query(False, alias="async")
+):
+    """
+    Verify many items in one call: texts are analyzed in model-sized batches and all records are written with one insert
+    """
+    verifications = []
+    contents = []
+    for index, item in enumerate(request.items):
+        if item.content_type == "text":
+            content = item.content
+            content_hash = compute_content_hash(item.content, "text")
+        else:
+            content = blob_store.resolve(item.content)
+            if content is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Item {index}: media must reference an upload from POST /uploads"
+                )
+            content_hash = item.content[len(REFERENCE_PREFIX):]
+        contents.append(content)
+        verifications.append(VerificationCreate(
+            content=item.content,
+            content_type=item.content_type,
+            source_url=item.source_url,
+            content_hash=content_hash,
+            model_version=result_cache.model_version
+        ))
+    
+    try:
+        if async_mode:
+            if job_queue.free_slots() < len(verifications):
+                raise JobQueueFullError(job_queue.retry_after)
+            verifications_db = await verification_repository.create_many(verifications)
+            for queued, (verification_db, content) in enumerate(zip(verifications_db, contents)):
+                try:
+                    await job_queue.enqueue(
+                        str(verification_db.id),
+                        content,
+                        verification_db.content_type,
+                        verification_db.content_hash
+                    )
+                except JobQueueFullError:
+                    # Items queued so far still complete; the rest would stay pending forever
+                    for unqueued in verifications_db[queued:]:
+                        await verification_repository.delete(str(unqueued.id))
+                    raise
+            return FastJSONResponse(
+                status_code=202,
+                content={"results": [
+                    {"index": index, "verification_id": str(verification_db.id), "status": "pending"}
+                    for index, verification_db in enumerate(verifications_db)
+                ]}
+            )
+        
+        verifications_db = await verification_service.process_many(verifications, contents)
+    except (ExecutorSaturatedError, JobQueueFullError) as e:
+        raise _saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    results = []
+    for index, verification_db in enumerate(verifications_db):
+        classification_result = verification_db.classification_result or {}
+        results.append(BatchVerificationResult(
+            index=index,
+            verification_id=str(verification_db.id),
+            status=verification_db.status,
+            confidence=classification_result.get("confidence"),
+            classification=classification_result.get("label"),
+            explanation=classification_result.get("explanation"),
+            sources=classification_result.get("sources", []),
+            error=verification_db.error
+        ))
+    return BatchVerificationResponse(results=results)
+
+@router.get("/verifications", response_model=VerificationListResponse)
+async def list_verifications(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    content_type: Optional[str] = None
+):
+    """
+    Verification summaries, newest first; pass next_cursor back to get the following page
+    """
+    try:
+        verifications, next_cursor = await verification_repository.list_page(
+            limit, cursor, status, content_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({
+        "items": [_summary(verification) for verification in verifications],
+        "next_cursor": next_cursor
+    })
+
+@router.get("/verifications/export")
+async def export_verifications(
+    status: Optional[str] = None,
+    content_type: Optional[str] = None
+):
+    """
+    Every matching verification summary as newline-delimited JSON, streamed from the cursor
+    """
+    async def lines():
+        async for verification in verification_repository.iter_verifications(status, content_type):
+            yield dumps(_summary(verification)) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.get("/status/{verification_id}")
 async def get_verification_status(verification_id: str):
-    verification = await verification_repository.get_by_id(verification_id)
+    verification = await verification_service.get_status(verification_id)
+    if not verification:
+        raise HTTPException(status_code=404, detail="Verification not found")
+    
+    return FastJSONResponse(_status_payload(verification))
+
+@router.get("/status/{verification_id}/stream")
+async def stream_verification_status(verification_id: str):
+    """
+    Server-sent events with every status change until the verification finishes
+    """
+    verification = await verification_service.get_status(verification_id)
     if not verification:
         raise HTTPException(status_code=404, detail="Verification not found")
     
+    async def events():
+        current = verification
+        last_status = None
+        deadline = time.monotonic() + settings.JOB_STREAM_TIMEOUT_SECONDS
+        while True:
+            if current is None:
+                yield _sse_event("error", {"detail": "Verification not found"})
+                return
+            payload = _status_payload(current)
+            if payload["status"] != last_status:
+                last_status = payload["status"]
+                yield _sse_event("status", payload)
+            if payload["status"] in FINAL_STATUSES:
+                return
+            if time.monotonic() >= deadline:
+                yield _sse_event("timeout", {"status": payload["status"]})
+                return
+            await job_queue.wait(verification_id, settings.JOB_STREAM_POLL_SECONDS)
+            current = await verification_service.get_status(verification_id)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.get("/models")
+async def get_models_status():
     return {
-        "status": verification.status,
-        "analysis_result": verification.analysis_result,
-        "classification_result": verification.classification_result
-    } 
\ No newline at end of file
+        "backend": settings.INFERENCE_BACKEND,
+        "models": model_registry.stats(),
+        "warmup": model_warmup.stats(),
+        "batchers": {"text": analyzer.text_batcher.stats(), "image": analyzer.image_batcher.stats()},
+        "text_preprocessing": analyzer.text_preprocessor.stats(),
+        "image_preprocessing": analyzer.image_preprocessor.stats(),
+        "prefilter": analyzer.prefilter.stats(),
+        "executor": inference_executor.stats(),
+        "jobs": job_queue.stats(),
+        "result_cache": result_cache.stats(),
+        "perceptual_index": verification_service.near_duplicates.stats(),
+        "claim_index": analyzer.claims.stats(),
+        "claim_indexer": claim_indexer.stats(),
+        "database_pool": pool_stats(),
+        "write_behind": write_behind.stats() if write_behind is not None else None,
+        "process_rss_bytes": current_rss_bytes(),
+        # Shared pages are the weights inherited from the app.server parent
+        "process_memory": memory_usage()
+    }
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Stage latency histograms and service gauges in the Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
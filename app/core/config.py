@@ -1,4 +1,4 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional, ClassVar, Dict
 import os
 from dotenv import load_dotenv
@@ -13,6 +13,22 @@ class Settings(BaseSettings):
     # MongoDB settings
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "fact_checker")
+    # Connection pool per worker process; size maxPoolSize for the worker's concurrent requests
+    MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+    MONGODB_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "0"))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "0"))
+    MONGODB_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "20000"))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+    MONGODB_SOCKET_TIMEOUT_MS: int = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "0"))
+    # Wire compression, in order of preference (zstd needs zstandard, snappy needs python-snappy)
+    MONGODB_COMPRESSORS: str = os.getenv("MONGODB_COMPRESSORS", "")
+    MONGODB_ZLIB_LEVEL: int = int(os.getenv("MONGODB_ZLIB_LEVEL", "-1"))
+    MONGODB_READ_PREFERENCE: str = os.getenv("MONGODB_READ_PREFERENCE", "primary")
+    # Write concerns of the initial pending insert and of the final result ("0", "1", "majority")
+    MONGODB_PENDING_WRITE_CONCERN: str = os.getenv("MONGODB_PENDING_WRITE_CONCERN", "1")
+    MONGODB_RESULT_WRITE_CONCERN: str = os.getenv("MONGODB_RESULT_WRITE_CONCERN", "majority")
+    MONGODB_WRITE_CONCERN_TIMEOUT_MS: int = int(os.getenv("MONGODB_WRITE_CONCERN_TIMEOUT_MS", "5000"))
     
     # Social Media API Keys
     TWITTER_API_KEY: Optional[str] = os.getenv("TWITTER_API_KEY")
@@ -23,6 +39,137 @@ class Settings(BaseSettings):
     # AI Model Settings
     MODEL_PATH: str = os.getenv("MODEL_PATH", "models")
     CONFIDENCE_THRESHOLD: float = 0.85
+    TEXT_MODEL_NAME: str = os.getenv("TEXT_MODEL_NAME", "neuralmind/bert-base-portuguese-cased")
+    IMAGE_MODEL_NAME: str = os.getenv("IMAGE_MODEL_NAME", "microsoft/resnet-50")
+    # Inference backend: torch, onnxruntime or torch-int8-dynamic (exports cached under MODEL_PATH)
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "torch")
+    # Maximum score difference from torch accepted by the backend parity check
+    INFERENCE_PARITY_TOLERANCE: float = float(os.getenv("INFERENCE_PARITY_TOLERANCE", "0.02"))
+    # Bump whenever models, backends or classification rules change to invalidate cached results
+    MODEL_VERSION: str = os.getenv("MODEL_VERSION", "1")
+    # Trained classification scoring model (python -m app.services.scoring train); a built-in prior is used without it
+    SCORING_MODEL_PATH: str = os.getenv("SCORING_MODEL_PATH", "models/scoring.npz")
+    
+    # Model lifecycle settings
+    MODEL_LAZY_LOADING: bool = os.getenv("MODEL_LAZY_LOADING", "false").lower() == "true"
+    MODEL_PRELOAD_MODALITIES: str = os.getenv("MODEL_PRELOAD_MODALITIES", "text,image,claims")
+    MODEL_WARMUP: bool = os.getenv("MODEL_WARMUP", "true").lower() == "true"
+    # Load models after the server starts listening; /readyz answers 503 until they are warm
+    MODEL_BACKGROUND_WARMUP: bool = os.getenv("MODEL_BACKGROUND_WARMUP", "true").lower() == "true"
+    # First delay before a failed background warm-up is retried; doubles up to 5 minutes
+    MODEL_WARMUP_RETRY_SECONDS: float = float(os.getenv("MODEL_WARMUP_RETRY_SECONDS", "10"))
+    
+    # Micro-batching settings for text inference
+    TEXT_BATCH_MAX_SIZE: int = int(os.getenv("TEXT_BATCH_MAX_SIZE", "32"))
+    TEXT_BATCH_MAX_WAIT_MS: float = float(os.getenv("TEXT_BATCH_MAX_WAIT_MS", "10"))
+    
+    # Micro-batching of image inference (concurrent requests share one forward pass)
+    IMAGE_BATCH_MAX_SIZE: int = int(os.getenv("IMAGE_BATCH_MAX_SIZE", "16"))
+    IMAGE_BATCH_MAX_WAIT_MS: float = float(os.getenv("IMAGE_BATCH_MAX_WAIT_MS", "5"))
+    
+    # Pre-filter cascade in front of the text model (rules and lexicon, then a hashed n-gram model)
+    PREFILTER_ENABLED: bool = os.getenv("PREFILTER_ENABLED", "true").lower() == "true"
+    PREFILTER_MIN_WORDS: int = int(os.getenv("PREFILTER_MIN_WORDS", "2"))
+    PREFILTER_LEXICON_PATH: str = os.getenv("PREFILTER_LEXICON_PATH", "data/prefilter_lexicon.jsonl")
+    PREFILTER_MODEL_PATH: str = os.getenv("PREFILTER_MODEL_PATH", "models/prefilter.npz")
+    PREFILTER_NGRAM_CONFIDENCE: float = float(os.getenv("PREFILTER_NGRAM_CONFIDENCE", "0.95"))
+    
+    # Long texts are split into overlapping token windows whose scores are aggregated (mean or max)
+    TEXT_MAX_TOKENS: int = int(os.getenv("TEXT_MAX_TOKENS", "512"))
+    TEXT_WINDOW_OVERLAP: int = int(os.getenv("TEXT_WINDOW_OVERLAP", "128"))
+    TEXT_WINDOW_AGGREGATION: str = os.getenv("TEXT_WINDOW_AGGREGATION", "mean")
+    TOKEN_CACHE_MAX_ENTRIES: int = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+    
+    # Inference executor settings (0 threads means one per CPU core)
+    INFERENCE_THREAD_WORKERS: int = int(os.getenv("INFERENCE_THREAD_WORKERS", "0"))
+    INFERENCE_PROCESS_WORKERS: int = int(os.getenv("INFERENCE_PROCESS_WORKERS", "0"))
+    INFERENCE_MAX_QUEUE: int = int(os.getenv("INFERENCE_MAX_QUEUE", "64"))
+    INFERENCE_CONCURRENCY_TEXT: int = int(os.getenv("INFERENCE_CONCURRENCY_TEXT", "2"))
+    INFERENCE_CONCURRENCY_IMAGE: int = int(os.getenv("INFERENCE_CONCURRENCY_IMAGE", "2"))
+    INFERENCE_CONCURRENCY_VIDEO: int = int(os.getenv("INFERENCE_CONCURRENCY_VIDEO", "1"))
+    INFERENCE_RETRY_AFTER_SECONDS: int = int(os.getenv("INFERENCE_RETRY_AFTER_SECONDS", "5"))
+    # torch threads per process (0: torch default, or cores / SERVER_WORKERS under app.server)
+    INFERENCE_TORCH_THREADS: int = int(os.getenv("INFERENCE_TORCH_THREADS", "0"))
+    INFERENCE_TORCH_INTEROP_THREADS: int = int(os.getenv("INFERENCE_TORCH_INTEROP_THREADS", "0"))
+    
+    # Production launcher (python -m app.server): models preloaded once, workers forked
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", "1"))
+    SERVER_PRELOAD: bool = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+    SERVER_MEMORY_REPORT_SECONDS: float = float(os.getenv("SERVER_MEMORY_REPORT_SECONDS", "60"))
+    
+    # Background verification jobs (POST /verify?async=true)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_MAX_SIZE: int = int(os.getenv("JOB_QUEUE_MAX_SIZE", "1000"))
+    JOB_STREAM_POLL_SECONDS: float = float(os.getenv("JOB_STREAM_POLL_SECONDS", "2"))
+    JOB_STREAM_TIMEOUT_SECONDS: float = float(os.getenv("JOB_STREAM_TIMEOUT_SECONDS", "600"))
+    
+    # Write-behind persistence: final results are buffered and bulk-written every
+    # WRITE_BEHIND_FLUSH_MS; faster, but results still buffered are lost if the process dies
+    PERSISTENCE_WRITE_BEHIND: bool = os.getenv("PERSISTENCE_WRITE_BEHIND", "false").lower() == "true"
+    WRITE_BEHIND_MAX_SIZE: int = int(os.getenv("WRITE_BEHIND_MAX_SIZE", "10000"))
+    WRITE_BEHIND_BATCH_SIZE: int = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+    WRITE_BEHIND_FLUSH_MS: float = float(os.getenv("WRITE_BEHIND_FLUSH_MS", "100"))
+    # First delay before a failed flush is retried; doubles on every failure
+    WRITE_BEHIND_RETRY_MS: float = float(os.getenv("WRITE_BEHIND_RETRY_MS", "200"))
+    
+    # Per-stage latency histograms served on /metrics; the Server-Timing header is opt-in
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_SERVER_TIMING: bool = os.getenv("METRICS_SERVER_TIMING", "false").lower() == "true"
+    
+    # Maximum number of items accepted by POST /verify/batch
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+    
+    # Compact analysis_result storage: top-k scores packed as float32 with a label vocabulary,
+    # optionally with a zstd-compressed blob of the full result for debugging
+    RESULT_COMPACT: bool = os.getenv("RESULT_COMPACT", "true").lower() == "true"
+    RESULT_TOP_K: int = int(os.getenv("RESULT_TOP_K", "5"))
+    RESULT_DEBUG_BLOB: bool = os.getenv("RESULT_DEBUG_BLOB", "false").lower() == "true"
+    
+    # Content-hash result cache (memory LRU backed by the verifications collection)
+    RESULT_CACHE_MAX_ENTRIES: int = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+    RESULT_CACHE_TTL_SECONDS: float = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+    RESULT_CACHE_PERSISTENT: bool = os.getenv("RESULT_CACHE_PERSISTENT", "true").lower() == "true"
+    
+    # Claim matching against a local corpus of fact-checked claims
+    CLAIM_MATCHING_ENABLED: bool = os.getenv("CLAIM_MATCHING_ENABLED", "true").lower() == "true"
+    CLAIM_INDEX_PATH: str = os.getenv("CLAIM_INDEX_PATH", "data/claims")
+    CLAIM_MODEL_NAME: str = os.getenv(
+        "CLAIM_MODEL_NAME",
+        os.getenv("TEXT_MODEL_NAME", "neuralmind/bert-base-portuguese-cased")
+    )
+    CLAIM_TOP_K: int = int(os.getenv("CLAIM_TOP_K", "5"))
+    CLAIM_IVF_NPROBE: int = int(os.getenv("CLAIM_IVF_NPROBE", "8"))
+    # Minimum cosine similarity for a corpus claim to drive the verdict
+    CLAIM_MATCH_THRESHOLD: float = float(os.getenv("CLAIM_MATCH_THRESHOLD", "0.85"))
+    
+    # Incremental claim indexing of completed text verifications ("poll" or "change_stream")
+    CLAIM_INDEXER_ENABLED: bool = os.getenv("CLAIM_INDEXER_ENABLED", "true").lower() == "true"
+    CLAIM_INDEXER_MODE: str = os.getenv("CLAIM_INDEXER_MODE", "poll")
+    CLAIM_INDEXER_POLL_SECONDS: float = float(os.getenv("CLAIM_INDEXER_POLL_SECONDS", "5"))
+    CLAIM_INDEXER_BATCH_SIZE: int = int(os.getenv("CLAIM_INDEXER_BATCH_SIZE", "64"))
+    # Polls re-read this window before the checkpoint for verifications committed late
+    CLAIM_INDEXER_LOOKBACK_SECONDS: float = float(os.getenv("CLAIM_INDEXER_LOOKBACK_SECONDS", "30"))
+    CLAIM_INDEXER_MIN_CONFIDENCE: float = float(os.getenv("CLAIM_INDEXER_MIN_CONFIDENCE", "0.85"))
+    CLAIM_INDEX_COMPACT_THRESHOLD: int = int(os.getenv("CLAIM_INDEX_COMPACT_THRESHOLD", "5000"))
+    CLAIM_INDEX_SNAPSHOT_SECONDS: float = float(os.getenv("CLAIM_INDEX_SNAPSHOT_SECONDS", "60"))
+    
+    # Perceptual-hash near-duplicate detection for images
+    PHASH_ENABLED: bool = os.getenv("PHASH_ENABLED", "true").lower() == "true"
+    PHASH_MAX_DISTANCE: int = int(os.getenv("PHASH_MAX_DISTANCE", "6"))
+    PHASH_INDEX_CHUNKS: int = int(os.getenv("PHASH_INDEX_CHUNKS", "4"))
+    
+    # Video analysis
+    VIDEO_FRAME_STRIDE: int = int(os.getenv("VIDEO_FRAME_STRIDE", "5"))
+    VIDEO_SCENE_THRESHOLD: float = float(os.getenv("VIDEO_SCENE_THRESHOLD", "0.4"))
+    VIDEO_MAX_KEY_FRAMES: int = int(os.getenv("VIDEO_MAX_KEY_FRAMES", "32"))
+    VIDEO_KEY_FRAME_BATCH_SIZE: int = int(os.getenv("VIDEO_KEY_FRAME_BATCH_SIZE", "8"))
+    
+    # Uploads are streamed in chunks into a local content-addressed blob store
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    MAX_UPLOAD_SIZE: int = int(os.getenv("MAX_UPLOAD_SIZE", str(100 * 1024 * 1024)))
+    BLOB_STORE_PATH: str = os.getenv("BLOB_STORE_PATH", "data/blobs")
     
     # Classification Labels
     CLASSIFICATION_LABELS: ClassVar[Dict[str, str]] = {
@@ -31,7 +178,6 @@ class Settings(BaseSettings):
         "FAKE": "Falso"
     }
     
-    class Config:
-        case_sensitive = True
+    model_config = SettingsConfigDict(case_sensitive=True)
 
 settings = Settings() 
\ No newline at end of file
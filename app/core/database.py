@@ -1,18 +1,210 @@
+import threading
+import time
+from typing import Any, Dict, Optional
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.write_concern import WriteConcern
 from app.core.config import settings
 
+# Write-concern profiles: the pending record only waits for the primary, the
+# final result must survive a primary failover. Nothing recreates a pending
+# record lost in a failover: its result update then matches no document and
+# status lookups return 404, so keep the pending write acknowledged (w >= 1).
+PENDING_WRITE = "pending"
+RESULT_WRITE = "result"
+
+
+class DatabaseNotConnectedError(RuntimeError):
+    """
+    Raised when the database is used before connect_to_mongo has run
+    """
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Counts connection checkouts and the time spent waiting for a free connection
+
+    Registered on the client, so it sees every server's pool. ``in_use``
+    close to ``max_pool_size`` together with a growing wait time means the
+    pool is too small for the number of concurrent requests per worker.
+    """
+
+    def __init__(self, max_pool_size: int = 100):
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+        # Checkouts start and finish in the same thread
+        self._local = threading.local()
+
+        self._open = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._checkouts = 0
+        self._failed_checkouts = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._cleared = 0
+
+    def _record_wait(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self._open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._open -= 1
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._record_wait()
+        with self._lock:
+            self._failed_checkouts += 1
+
+    def connection_checked_out(self, event):
+        waited = self._record_wait()
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._in_use -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_pool_size": self.max_pool_size,
+                "open_connections": self._open,
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "utilization": self._in_use / self.max_pool_size if self.max_pool_size else 0.0,
+                "checkouts": self._checkouts,
+                "failed_checkouts": self._failed_checkouts,
+                "mean_wait_ms": 1000 * self._wait_seconds / self._checkouts if self._checkouts else 0.0,
+                "max_wait_ms": 1000 * self._max_wait_seconds,
+                "pool_cleared": self._cleared
+            }
+
+
+def parse_write_concern(value: str, wtimeout_ms: int = 0) -> WriteConcern:
+    """
+    Build a WriteConcern from a setting such as "0", "1" or "majority"
+    """
+    w: Any = int(value) if value.isdigit() else value
+    # Unacknowledged writes cannot wait for replication
+    if w == 0 or not wtimeout_ms:
+        return WriteConcern(w=w)
+    return WriteConcern(w=w, wtimeout=wtimeout_ms)
+
+
+def client_options() -> Dict[str, Any]:
+    """
+    Keyword arguments of the Motor client, from the MONGODB_* settings
+    """
+    options: Dict[str, Any] = {
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGODB_MAX_IDLE_TIME_MS or None,
+        "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS or None,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGODB_SOCKET_TIMEOUT_MS or None,
+        "readPreference": settings.MONGODB_READ_PREFERENCE
+    }
+    compressors = [c.strip() for c in settings.MONGODB_COMPRESSORS.split(",") if c.strip()]
+    if compressors:
+        # Negotiated with the server; unsupported ones are skipped with a warning
+        options["compressors"] = compressors
+        if "zlib" in compressors:
+            options["zlibCompressionLevel"] = settings.MONGODB_ZLIB_LEVEL
+    return {key: value for key, value in options.items() if value is not None}
+
+
 class Database:
     client: AsyncIOMotorClient = None
     db = None
+    pool_monitor: Optional[PoolMonitor] = None
+    write_concerns: Dict[str, WriteConcern] = {}
+    collections: Dict[Any, Any] = {}
 
 db = Database()
 
 async def connect_to_mongo():
-    db.client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db.pool_monitor = PoolMonitor(settings.MONGODB_MAX_POOL_SIZE)
+    db.client = AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        event_listeners=[db.pool_monitor],
+        **client_options()
+    )
     db.db = db.client[settings.DATABASE_NAME]
+    db.collections = {}
+    db.write_concerns = {
+        PENDING_WRITE: parse_write_concern(settings.MONGODB_PENDING_WRITE_CONCERN),
+        RESULT_WRITE: parse_write_concern(
+            settings.MONGODB_RESULT_WRITE_CONCERN,
+            settings.MONGODB_WRITE_CONCERN_TIMEOUT_MS
+        )
+    }
+
+def use_database(database, client=None) -> None:
+    """
+    Serve an already created database, e.g. an in-process stand-in for offline benchmarks
+
+    Write-concern profiles are not applied; every write uses the database default.
+    """
+    db.client = client
+    db.db = database
+    db.collections = {}
+    db.write_concerns = {}
+    db.pool_monitor = None
 
 async def close_mongo_connection():
     db.client.close()
 
 def get_database():
-    return db.db 
\ No newline at end of file
+    if db.db is None:
+        raise DatabaseNotConnectedError("Database is not connected; connect_to_mongo must run first")
+    return db.db
+
+def get_collection(name: str, write_profile: Optional[str] = None):
+    """
+    A collection of the connected database, optionally with a write-concern profile
+    """
+    key = (name, write_profile)
+    collection = db.collections.get(key)
+    if collection is None:
+        collection = get_database()[name]
+        write_concern = db.write_concerns.get(write_profile)
+        if write_concern is not None:
+            collection = collection.with_options(write_concern=write_concern)
+        db.collections[key] = collection
+    return collection
+
+def pool_stats() -> Optional[Dict[str, Any]]:
+    if db.pool_monitor is None:
+        return None
+    return db.pool_monitor.stats()
@@ -0,0 +1,269 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from app.core.config import settings
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = "fact_checker_"
+
+# Label values taken from requests; anything else is counted as "other" so clients cannot add series
+CONTENT_TYPE_LABELS = frozenset({"text", "image", "video", "batch", "none"})
+METHOD_LABELS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+# A collector returns (name, help, type, [(labels, value)]) for gauges computed at scrape time
+Sample = Tuple[Dict[str, str], float]
+Collector = Callable[[], List[Tuple[str, str, str, List[Sample]]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with one series per combination of label values
+
+    Observing costs a bisect and a few additions under a lock, so it is
+    cheap enough to stay on for every request.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # Per series: non-cumulative bucket counts (the last one is +Inf), sum
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self, *labels: str) -> Dict[str, Any]:
+        """
+        Count, sum and cumulative bucket counts of one series
+        """
+        with self._lock:
+            counts, total = self._series.get(labels, [[0] * (len(self.buckets) + 1), 0.0])
+            counts = list(counts)
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return {"count": running, "sum": total, "buckets": dict(zip(self.buckets + (float("inf"),), cumulative))}
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in sorted(self._series.items())]
+        for labels, counts, total in series:
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {running}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {running}"
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text exposition format
+
+    Histograms are updated as work happens; gauges of the
+    services (queues, caches, loaded models) are read by collectors when
+    the endpoint is scraped.
+    """
+
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        self.prefix = prefix
+        self._metrics: List[Any] = []
+        self._collectors: List[Collector] = []
+        self.in_flight = 0
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        histogram = Histogram(self.prefix + name, documentation, labelnames, buckets)
+        self._metrics.append(histogram)
+        return histogram
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = [
+            f"# HELP {self.prefix}http_requests_in_flight Requests being served",
+            f"# TYPE {self.prefix}http_requests_in_flight gauge",
+            f"{self.prefix}http_requests_in_flight {self.in_flight}"
+        ]
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, documentation, metric_type, samples in collector():
+                lines.append(f"# HELP {self.prefix}{name} {documentation}")
+                lines.append(f"# TYPE {self.prefix}{name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{self.prefix}{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+stage_seconds = metrics.histogram(
+    "stage_duration_seconds",
+    "Duration of each verification stage",
+    ("stage", "content_type")
+)
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds",
+    "Duration of HTTP requests by route",
+    ("method", "route", "status")
+)
+
+
+class RequestTimings:
+    """
+    Stage durations of the current request, for the Server-Timing header
+    """
+
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages: Dict[str, List[float]] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        durations = self.stages.get(stage)
+        if durations is None:
+            self.stages[stage] = [seconds, 1]
+        else:
+            durations[0] += seconds
+            durations[1] += 1
+
+    def header(self, total: Optional[float] = None) -> str:
+        """
+        Server-Timing value: one entry per stage, in milliseconds, summed over repeated stages
+        """
+        entries = [
+            f"{stage};dur={1000 * seconds:.2f}" + (f';desc="x{int(count)}"' if count > 1 else "")
+            for stage, (seconds, count) in self.stages.items()
+        ]
+        if total is not None:
+            entries.append(f"total;dur={1000 * total:.2f}")
+        return ", ".join(entries)
+
+
+_request_timings: ContextVar[Optional[Any]] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def current_request() -> Optional[RequestTimings]:
+    return _request_timings.get()
+
+
+def detach_request() -> None:
+    """
+    Stop attributing stages to the request whose context a background task inherited
+    """
+    _request_timings.set(None)
+
+
+class SharedTimings:
+    """
+    Stage durations of work done once for several requests, added to each of them
+    """
+
+    __slots__ = ("requests",)
+
+    def __init__(self, requests: List[RequestTimings]):
+        self.requests = requests
+
+    def add(self, stage: str, seconds: float) -> None:
+        for timings in self.requests:
+            timings.add(stage, seconds)
+
+
+@contextmanager
+def shared_stages(requests: Sequence[Optional[RequestTimings]]) -> Iterator[None]:
+    """
+    Attribute the stages timed in the block to every given request, as in a batch serving them
+    """
+    token = _request_timings.set(SharedTimings([timings for timings in requests if timings is not None]))
+    try:
+        yield
+    finally:
+        _request_timings.reset(token)
+
+
+def record_stage(stage: str, seconds: float, content_type: str = "none") -> None:
+    if not settings.METRICS_ENABLED:
+        return
+    if content_type not in CONTENT_TYPE_LABELS:
+        content_type = "other"
+    stage_seconds.observe(seconds, stage, content_type)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def timed_stage(stage: str, content_type: str = "none") -> Iterator[None]:
+    """
+    Time the enclosed block as one stage of the current request
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start, content_type)
+
+
+def timed(stage: str, content_type: str = "none"):
+    """
+    Decorator form of timed_stage for sync and async functions
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with timed_stage(stage, content_type):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed_stage(stage, content_type):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -5,8 +5,22 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 from fastapi import Request
 from app.core.config import settings
-from app.api.routes import router as api_router
+from app.api.routes import (
+    router as api_router,
+    analyzer,
+    claim_indexer,
+    job_queue,
+    verification_repository,
+    verification_service,
+    write_behind
+)
+from app.api.health import router as health_router
 from app.core.database import connect_to_mongo, close_mongo_connection
+from app.api.middleware import MetricsMiddleware, UploadSizeLimitMiddleware
+from app.services.claims import claim_matcher
+from app.services.executor import inference_executor
+from app.services.backends import configure_threads
+from app.services.warmup import model_warmup, preload_modalities
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -23,6 +37,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads (POST /verify/file, /uploads) from their Content-Length, or while the body is received
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.MAX_UPLOAD_SIZE)
+
+# Outermost, so request timings include the other middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.METRICS_SERVER_TIMING)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -32,9 +53,53 @@ templates = Jinja2Templates(directory="app/templates")
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Liveness and readiness probes, at the root where orchestrators expect them
+app.include_router(health_router)
+
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    await verification_repository.create_indexes()
+    await verification_repository.load_vocabulary()
+    await verification_service.load_perceptual_index()
+
+@app.on_event("startup")
+async def startup_models():
+    configure_threads(settings.INFERENCE_TORCH_THREADS, settings.INFERENCE_TORCH_INTEROP_THREADS)
+    # Load models once, off the event loop; /readyz reports when they are warm
+    if settings.MODEL_BACKGROUND_WARMUP:
+        model_warmup.start(preload_modalities(), settings.MODEL_WARMUP, settings.MODEL_WARMUP_RETRY_SECONDS)
+    else:
+        # A failed load stops the startup
+        model_warmup.start(preload_modalities(), settings.MODEL_WARMUP)
+        await model_warmup.wait()
+
+@app.on_event("startup")
+async def startup_job_queue():
+    if write_behind is not None:
+        await write_behind.start()
+    await job_queue.start()
+    if settings.CLAIM_INDEXER_ENABLED:
+        # The indexer appends to the claim index, which warm-up opens
+        await model_warmup.on_ready(claim_indexer.start)
+
+@app.on_event("shutdown")
+async def shutdown_job_queue():
+    await job_queue.stop()
+    # A warm-up still running would start the indexer after it is stopped
+    await model_warmup.stop()
+    await claim_indexer.stop()
+    # Buffered results are written before the connection closes
+    if write_behind is not None:
+        await write_behind.stop()
+
+@app.on_event("shutdown")
+async def shutdown_models():
+    await model_warmup.stop()
+    await analyzer.close()
+    inference_executor.shutdown()
+    if claim_matcher.index is not None:
+        claim_matcher.index.close()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
@@ -1,27 +1,40 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, GetJsonSchemaHandler
+from pydantic_core import core_schema
 from bson import ObjectId
 
 class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
     @classmethod
     def validate(cls, v):
+        if isinstance(v, ObjectId):
+            return v
         if not ObjectId.is_valid(v):
             raise ValueError("Invalid ObjectId")
         return ObjectId(v)
 
     @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
+    def __get_pydantic_core_schema__(cls, source_type: Any, handler) -> core_schema.CoreSchema:
+        # Validated once by pydantic-core; serialized as a string in JSON mode
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(str, when_used="json")
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema: core_schema.CoreSchema, handler: GetJsonSchemaHandler):
+        return {"type": "string"}
 
 class VerificationBase(BaseModel):
     content: str
     content_type: str
     source_url: Optional[str] = None
+    content_hash: Optional[str] = None
+    perceptual_hash: Optional[str] = None
+    # Uploaded media is stored out of the document; content holds a blob reference
+    file_name: Optional[str] = None
+    file_size: Optional[int] = None
+    model_version: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -32,14 +45,10 @@ class VerificationInDB(VerificationBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     analysis_result: Optional[Dict[str, Any]] = None
     classification_result: Optional[Dict[str, Any]] = None
-    status: str = "pending"
+    status: str = "pending"  # "pending", "processing", "completed" or "failed"
+    error: Optional[str] = None
     
-    class Config:
-        allow_population_by_field_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            ObjectId: str
-        }
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
 
 class VerificationResponse(VerificationInDB):
     pass
@@ -48,4 +57,5 @@ class VerificationUpdate(BaseModel):
     analysis_result: Optional[Dict[str, Any]] = None
     classification_result: Optional[Dict[str, Any]] = None
     status: Optional[str] = None
+    error: Optional[str] = None
     updated_at: datetime = Field(default_factory=datetime.utcnow) 
\ No newline at end of file
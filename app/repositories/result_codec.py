@@ -0,0 +1,349 @@
+"""
+Compact storage format of ``analysis_result``
+
+Stored results drop the analyzed content (already in the verification
+document) and keep the top-k label scores of every prediction list as two
+packed arrays: uint16 label codes and float32 scores, stored as BSON binary.
+Codes index a label vocabulary shared by all workers through the
+``label_vocabulary`` collection. Verbose data can be kept as an optional
+zstd-compressed JSON blob. Readers get a ``CompactResult`` mapping that
+decodes a field only when it is accessed.
+
+Existing documents are rewritten in the compact format with:
+
+    python -m app.repositories.result_codec migrate [--batch-size 500] [--dry-run]
+"""
+import argparse
+import asyncio
+import copy
+import json
+import logging
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Set
+import numpy as np
+from pymongo import ReturnDocument, UpdateOne
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Marks a compact analysis_result; absent in results stored by earlier versions
+FORMAT_KEY = "format"
+COMPACT_FORMAT = 1
+DEBUG_KEY = "debug"
+
+VOCABULARY_COLLECTION = "label_vocabulary"
+# Counter document of the vocabulary collection; label documents use the label as _id
+_COUNTER_ID = {"counter": "next_code"}
+
+# Prediction lists ([{label, score}]) packed for each content type
+_PREDICTION_FIELDS = {"text": "sentiment", "image": "classification"}
+
+
+class LabelVocabulary:
+    """
+    Bidirectional label <-> code map, persisted so every worker assigns the same codes
+
+    Codes are allocated from a counter document with ``$inc`` and bound to a
+    label with an upsert, so concurrent workers adding the same label agree
+    on the code that won. Known labels are served from memory.
+    """
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._labels: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def _bind(self, label: str, code: int) -> None:
+        self._codes[label] = code
+        self._labels[code] = label
+
+    async def load(self, collection) -> None:
+        async for entry in collection.find({"code": {"$exists": True}}):
+            self._bind(entry["_id"], entry["code"])
+
+    async def codes(self, labels: List[str], collection=None) -> List[int]:
+        """
+        Codes of the given labels, assigning (and persisting) codes for new ones
+        """
+        for label in labels:
+            if label not in self._codes:
+                self._bind(label, await self._assign(label, collection))
+        return [self._codes[label] for label in labels]
+
+    async def _assign(self, label: str, collection) -> int:
+        if collection is None:
+            # In-memory vocabulary, for tests and offline tools
+            return len(self._codes)
+        counter = await collection.find_one_and_update(
+            {"_id": _COUNTER_ID},
+            {"$inc": {"value": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        entry = await collection.find_one_and_update(
+            {"_id": label},
+            {"$setOnInsert": {"code": counter["value"] - 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return entry["code"]
+
+    def knows(self, codes: Set[int]) -> bool:
+        return all(code in self._labels for code in codes)
+
+    def label(self, code: int) -> str:
+        return self._labels[code]
+
+
+label_vocabulary = LabelVocabulary()
+
+
+def _predictions(value: Any) -> Optional[List[Dict[str, Any]]]:
+    """
+    Normalize a pipeline output to a flat [{label, score}] list, or None if it is not one
+    """
+    if isinstance(value, dict):
+        value = [value]
+    if isinstance(value, list) and len(value) == 1 and isinstance(value[0], list):
+        value = value[0]
+    if not isinstance(value, list) or not all(
+        isinstance(item, Mapping) and "label" in item and "score" in item for item in value
+    ):
+        return None
+    return value
+
+
+async def pack_predictions(
+    value: Any,
+    vocabulary: LabelVocabulary,
+    collection=None,
+    top_k: int = 5
+) -> Any:
+    """
+    Top-k predictions as {"labels": uint16 codes, "scores": float32}; other values are kept as is
+    """
+    predictions = _predictions(value)
+    if predictions is None:
+        return value
+    predictions = sorted(predictions, key=lambda item: item["score"], reverse=True)[:top_k]
+    codes = await vocabulary.codes([item["label"] for item in predictions], collection)
+    return {
+        "labels": np.asarray(codes, dtype="<u2").tobytes(),
+        "scores": np.asarray([item["score"] for item in predictions], dtype="<f4").tobytes()
+    }
+
+
+def is_packed(value: Any) -> bool:
+    return isinstance(value, Mapping) and value.keys() == {"labels", "scores"} and isinstance(value["labels"], bytes)
+
+
+def unpack_predictions(value: Mapping, vocabulary: LabelVocabulary) -> List[Dict[str, Any]]:
+    codes = np.frombuffer(value["labels"], dtype="<u2")
+    scores = np.frombuffer(value["scores"], dtype="<f4")
+    return [
+        {"label": vocabulary.label(code), "score": score}
+        for code, score in zip(codes.tolist(), scores.tolist())
+    ]
+
+
+def _compress(data: Dict[str, Any]) -> Optional[bytes]:
+    try:
+        import zstandard
+    except ImportError:
+        logger.warning("RESULT_DEBUG_BLOB needs the zstandard package; debug data is not stored")
+        return None
+    return zstandard.ZstdCompressor().compress(json.dumps(data, default=str).encode())
+
+
+def _decompress(blob: bytes) -> Dict[str, Any]:
+    import zstandard
+
+    return json.loads(zstandard.ZstdDecompressor().decompress(blob))
+
+
+async def encode_result(
+    result: Optional[Dict[str, Any]],
+    vocabulary: LabelVocabulary,
+    collection=None,
+    top_k: int = 5,
+    debug: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Compact form of an analysis result; results already compact are returned unchanged
+    """
+    if result is None:
+        return None
+    if isinstance(result, CompactResult):
+        return result.raw
+    if result.get(FORMAT_KEY) == COMPACT_FORMAT:
+        return result
+
+    # The analyzed content is stored once, on the verification itself
+    compact: Dict[str, Any] = {FORMAT_KEY: COMPACT_FORMAT}
+    for key, value in result.items():
+        if key == "content" or value == []:
+            continue
+        compact[key] = value
+
+    field = _PREDICTION_FIELDS.get(result.get("type"))
+    if field in compact:
+        compact[field] = await pack_predictions(compact[field], vocabulary, collection, top_k)
+    analysis = compact.get("analysis")
+    if result.get("type") == "video" and isinstance(analysis, Mapping) and analysis.get("key_frames"):
+        key_frames = []
+        for key_frame in analysis["key_frames"]:
+            key_frame = dict(key_frame)
+            if "classification" in key_frame:
+                key_frame["classification"] = await pack_predictions(
+                    key_frame["classification"], vocabulary, collection, top_k
+                )
+            key_frames.append(key_frame)
+        compact["analysis"] = {**analysis, "key_frames": key_frames}
+
+    if debug:
+        blob = _compress({key: value for key, value in result.items() if key != "content"})
+        if blob is not None:
+            compact[DEBUG_KEY] = blob
+    return compact
+
+
+def result_codes(raw: Mapping) -> Set[int]:
+    """
+    Label codes used by a stored result, to check the vocabulary before decoding
+    """
+    codes: Set[int] = set()
+    packed = [value for value in raw.values() if is_packed(value)]
+    analysis = raw.get("analysis")
+    if isinstance(analysis, Mapping):
+        packed.extend(
+            key_frame["classification"] for key_frame in analysis.get("key_frames") or []
+            if is_packed(key_frame.get("classification"))
+        )
+    for value in packed:
+        codes.update(np.frombuffer(value["labels"], dtype="<u2").tolist())
+    return codes
+
+
+class CompactResult(Mapping):
+    """
+    Read-only view of a stored analysis result that decodes fields on first access
+
+    Results stored in the earlier full format are served as they are.
+    """
+
+    def __init__(self, raw: Mapping, vocabulary: LabelVocabulary = label_vocabulary):
+        self.raw = raw
+        self.vocabulary = vocabulary
+        self._decoded: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._decoded:
+            return self._decoded[key]
+        if key in (FORMAT_KEY, DEBUG_KEY):
+            raise KeyError(key)
+        value = self.raw[key]
+        if is_packed(value):
+            value = unpack_predictions(value, self.vocabulary)
+        elif key == "analysis" and isinstance(value, Mapping) and value.get("key_frames"):
+            value = {**value, "key_frames": [
+                {**key_frame, "classification": unpack_predictions(key_frame["classification"], self.vocabulary)}
+                if is_packed(key_frame.get("classification")) else key_frame
+                for key_frame in value["key_frames"]
+            ]}
+        self._decoded[key] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self.raw if key not in (FORMAT_KEY, DEBUG_KEY))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "CompactResult":
+        # The vocabulary is shared by the whole process and only ever grows
+        return CompactResult(copy.deepcopy(self.raw, memo), self.vocabulary)
+
+    def debug(self) -> Optional[Dict[str, Any]]:
+        """
+        The verbose result stored with RESULT_DEBUG_BLOB, if any
+        """
+        blob = self.raw.get(DEBUG_KEY)
+        return _decompress(blob) if blob is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self}
+
+
+def plain_result(result: Optional[Mapping]) -> Optional[Dict[str, Any]]:
+    """
+    A fully decoded, JSON-serializable copy of a stored or fresh result
+    """
+    if result is None:
+        return None
+    if isinstance(result, CompactResult):
+        return result.to_dict()
+    return dict(result)
+
+
+async def migrate(batch_size: int = 500, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Rewrite analysis results stored in the full format, reporting the size saved
+    """
+    import bson
+    from app.core.database import close_mongo_connection, connect_to_mongo, get_collection
+
+    await connect_to_mongo()
+    try:
+        collection = get_collection("verifications")
+        vocabulary_collection = get_collection(VOCABULARY_COLLECTION)
+        await label_vocabulary.load(vocabulary_collection)
+
+        query = {"analysis_result": {"$type": "object"}, f"analysis_result.{FORMAT_KEY}": {"$exists": False}}
+        migrated = 0
+        bytes_before = 0
+        bytes_after = 0
+        operations: List[Any] = []
+        async for document in collection.find(query, {"analysis_result": 1}, batch_size=batch_size):
+            compact = await encode_result(
+                document["analysis_result"],
+                label_vocabulary,
+                vocabulary_collection,
+                top_k=settings.RESULT_TOP_K,
+                debug=settings.RESULT_DEBUG_BLOB
+            )
+            bytes_before += len(bson.encode({"analysis_result": document["analysis_result"]}))
+            bytes_after += len(bson.encode({"analysis_result": compact}))
+            migrated += 1
+            operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {"analysis_result": compact}}))
+            if len(operations) >= batch_size:
+                if not dry_run:
+                    await collection.bulk_write(operations, ordered=False)
+                operations = []
+        if operations and not dry_run:
+            await collection.bulk_write(operations, ordered=False)
+    finally:
+        await close_mongo_connection()
+
+    return {
+        "migrated": migrated,
+        "dry_run": dry_run,
+        "result_bytes_before": bytes_before,
+        "result_bytes_after": bytes_after,
+        "mean_bytes_before": bytes_before / migrated if migrated else 0.0,
+        "mean_bytes_after": bytes_after / migrated if migrated else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact analysis result storage")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="report the size saved without writing")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(migrate(args.batch_size, args.dry_run)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,353 @@
-from typing import Optional, List
+import base64
+from datetime import datetime
+from typing import Any, Optional, List, AsyncIterator, Dict, Tuple
 from bson import ObjectId
-from app.core.database import get_database
+from pymongo import ASCENDING, DESCENDING
+from app.core.config import settings
+from app.core.database import PENDING_WRITE, RESULT_WRITE, get_collection, get_database
 from app.models.database import VerificationCreate, VerificationUpdate, VerificationInDB
+from app.repositories.result_codec import (
+    FORMAT_KEY,
+    VOCABULARY_COLLECTION,
+    CompactResult,
+    LabelVocabulary,
+    encode_result,
+    label_vocabulary,
+    result_codes
+)
+
+# Fields returned by GET /status: the result, without the submitted content
+STATUS_PROJECTION = {
+    "status": 1,
+    "analysis_result": 1,
+    "classification_result": 1,
+    "error": 1
+}
+
+# Fields needed to reuse a previous result for the same content
+RESULT_PROJECTION = {
+    "content_hash": 1,
+    "analysis_result": 1,
+    "classification_result": 1
+}
+
+# Fields returned by listings: metadata and the verdict only
+SUMMARY_PROJECTION = {
+    "content_type": 1,
+    "status": 1,
+    "source_url": 1,
+    "content_hash": 1,
+    "file_name": 1,
+    "file_size": 1,
+    "model_version": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "error": 1,
+    "classification_result.label": 1,
+    "classification_result.confidence": 1
+}
+
+
+def encode_cursor(created_at: datetime, verification_id: Any) -> str:
+    """
+    Opaque pagination cursor for the (created_at, _id) position of a document
+    """
+    raw = f"{created_at.isoformat()}|{verification_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, verification_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), ObjectId(verification_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+# Statuses after which a verification is no longer updated
+FINAL_STATUSES = ("completed", "failed")
 
 class VerificationRepository:
-    def __init__(self):
-        self.db = get_database()
-        self.collection = self.db.verifications
+    """
+    Verifications collection; the connection is resolved on use, after startup has connected
+    """
+
+    collection_name = "verifications"
+
+    def __init__(self, vocabulary: LabelVocabulary = label_vocabulary):
+        self.vocabulary = vocabulary
+
+    @property
+    def db(self):
+        return get_database()
+
+    @property
+    def collection(self):
+        return get_collection(self.collection_name)
+
+    def _writer(self, final: bool):
+        """
+        The collection with the pending or the final-result write concern
+        """
+        return get_collection(self.collection_name, RESULT_WRITE if final else PENDING_WRITE)
+
+    async def load_vocabulary(self) -> None:
+        await self.vocabulary.load(get_collection(VOCABULARY_COLLECTION))
+
+    async def _encode_result(self, result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not settings.RESULT_COMPACT:
+            return result
+        return await encode_result(
+            result,
+            self.vocabulary,
+            get_collection(VOCABULARY_COLLECTION),
+            top_k=settings.RESULT_TOP_K,
+            debug=settings.RESULT_DEBUG_BLOB
+        )
+
+    async def _decode(self, verification: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Wrap a stored analysis result for lazy decoding
+        """
+        raw = (verification or {}).get("analysis_result")
+        if raw is None or FORMAT_KEY not in raw:
+            return verification
+        if not self.vocabulary.knows(result_codes(raw)):
+            # Labels added by another worker since the vocabulary was loaded
+            await self.load_vocabulary()
+        verification["analysis_result"] = CompactResult(raw, self.vocabulary)
+        return verification
 
-    async def create(self, verification: VerificationCreate) -> VerificationInDB:
-        verification_dict = verification.dict()
-        result = await self.collection.insert_one(verification_dict)
-        verification_dict["_id"] = result.inserted_id
-        return VerificationInDB(**verification_dict)
+    async def update_fields(self, verification: VerificationUpdate) -> Dict[str, Any]:
+        """
+        Fields set by an update, with the analysis result in its storage format
+        """
+        fields = verification.model_dump(exclude_unset=True)
+        # updated_at has a default, so exclude_unset would drop it
+        fields["updated_at"] = verification.updated_at
+        if fields.get("analysis_result") is not None:
+            fields["analysis_result"] = await self._encode_result(fields["analysis_result"])
+        return fields
+
+    async def create_indexes(self) -> None:
+        await self.collection.create_index(
+            [("content_hash", ASCENDING), ("model_version", ASCENDING)],
+            name="content_hash_model_version"
+        )
+        await self.collection.create_index(
+            [("status", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)],
+            name="status_updated_at"
+        )
+        # Keyset pagination, newest first, optionally filtered by status or type
+        await self.collection.create_index(
+            [("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="created_at"
+        )
+        await self.collection.create_index(
+            [("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="status_created_at"
+        )
+        await self.collection.create_index(
+            [("content_type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="content_type_created_at"
+        )
+
+    async def document(
+        self,
+        verification: VerificationCreate,
+        known_result: Optional[VerificationUpdate] = None
+    ) -> Dict[str, Any]:
+        """
+        The document stored for a verification, with a client-side _id
+
+        Knowing the id before the write lets the final result be written once,
+        directly or through the write-behind buffer.
+        """
+        document = verification.model_dump()
+        if known_result is not None:
+            # Store an already known result in the same insert
+            document.update(await self.update_fields(known_result))
+        document["_id"] = ObjectId()
+        return document
+
+    def _in_db(self, document: Dict[str, Any], known_result: Optional[VerificationUpdate]) -> VerificationInDB:
+        # The result as produced, rather than decoded back from its stored form
+        if known_result is not None and known_result.analysis_result is not None:
+            document = {**document, "analysis_result": known_result.analysis_result}
+        return VerificationInDB.model_validate(document)
+
+    async def create(
+        self,
+        verification: VerificationCreate,
+        known_result: Optional[VerificationUpdate] = None
+    ) -> VerificationInDB:
+        document = await self.document(verification, known_result)
+        await self._writer(final=known_result is not None).insert_one(document)
+        return self._in_db(document, known_result)
+
+    async def create_many(
+        self,
+        verifications: List[VerificationCreate],
+        known_results: Optional[List[Optional[VerificationUpdate]]] = None
+    ) -> List[VerificationInDB]:
+        """
+        Insert many verifications, with their results if known, in one round trip
+        """
+        documents = [
+            await self.document(verification, known_results[i] if known_results is not None else None)
+            for i, verification in enumerate(verifications)
+        ]
+        if not documents:
+            return []
+        final = known_results is not None and any(r is not None for r in known_results)
+        await self._writer(final).insert_many(documents, ordered=False)
+        return [
+            self._in_db(document, known_results[i] if known_results is not None else None)
+            for i, document in enumerate(documents)
+        ]
+
+    async def bulk_write(self, operations: List[Any]) -> Any:
+        """
+        Apply buffered inserts and updates of final results in one unordered round trip
+        """
+        return await self._writer(final=True).bulk_write(operations, ordered=False)
 
     async def get_by_id(self, verification_id: str) -> Optional[VerificationInDB]:
         verification = await self.collection.find_one({"_id": ObjectId(verification_id)})
         if verification:
-            return VerificationInDB(**verification)
+            return VerificationInDB.model_validate(await self._decode(verification))
         return None
 
+    async def get_status(self, verification_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Status and results of a verification, without its content
+        """
+        return await self._decode(
+            await self.collection.find_one({"_id": ObjectId(verification_id)}, STATUS_PROJECTION)
+        )
+
+    async def status_of(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Status and results of a document not written yet, as get_status returns them
+        """
+        return await self._decode({key: document[key] for key in ("_id", *STATUS_PROJECTION) if key in document})
+
+    async def find_by_content_hash(
+        self,
+        content_hash: str,
+        model_version: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Result of the latest completed verification of the same content, if any
+        """
+        verification = await self.collection.find_one(
+            {
+                "content_hash": content_hash,
+                "model_version": model_version,
+                "status": "completed"
+            },
+            RESULT_PROJECTION,
+            sort=[("updated_at", DESCENDING)]
+        )
+        return await self._decode(verification)
+
+    async def find_many_by_content_hash(
+        self,
+        content_hashes: List[str],
+        model_version: str
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Result of the latest completed verification for each of the given hashes, in one query
+        """
+        cursor = self.collection.find(
+            {
+                "content_hash": {"$in": content_hashes},
+                "model_version": model_version,
+                "status": "completed"
+            },
+            RESULT_PROJECTION,
+            sort=[("updated_at", ASCENDING)]
+        )
+        # Later documents overwrite earlier ones, keeping the most recent per hash
+        return {
+            verification["content_hash"]: await self._decode(verification)
+            async for verification in cursor
+        }
+
+    async def iter_perceptual_hashes(self, model_version: str) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Yield (verification id, perceptual hash) of completed verifications
+        """
+        cursor = self.collection.find(
+            {
+                "perceptual_hash": {"$ne": None},
+                "model_version": model_version,
+                "status": "completed"
+            },
+            {"perceptual_hash": 1}
+        )
+        async for verification in cursor:
+            yield str(verification["_id"]), verification["perceptual_hash"]
+
+    async def iter_completed_since(
+        self,
+        content_type: str,
+        updated_at: Optional[datetime] = None,
+        exclude_ids: Optional[List[str]] = None,
+        limit: int = 100
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield completed verifications updated at or after ``updated_at``, oldest first
+        """
+        query: Dict[str, Any] = {"status": "completed", "content_type": content_type}
+        if updated_at is not None:
+            query["updated_at"] = {"$gte": updated_at}
+        if exclude_ids:
+            query["_id"] = {"$nin": [ObjectId(verification_id) for verification_id in exclude_ids]}
+        cursor = self.collection.find(
+            query,
+            {"content": 1, "classification_result": 1, "model_version": 1, "updated_at": 1},
+            sort=[("updated_at", ASCENDING), ("_id", ASCENDING)],
+            limit=limit
+        )
+        async for verification in cursor:
+            yield verification
+
+    async def watch_completed(
+        self,
+        content_type: str,
+        resume_after: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Yield (verification, resume token) as verifications complete; needs a replica set
+        """
+        pipeline = [{"$match": {
+            "operationType": {"$in": ["insert", "update", "replace"]},
+            "fullDocument.status": "completed",
+            "fullDocument.content_type": content_type
+        }}]
+        async with self.collection.watch(
+            pipeline,
+            full_document="updateLookup",
+            resume_after=resume_after
+        ) as stream:
+            async for change in stream:
+                yield change["fullDocument"], change["_id"]
+
     async def update(
         self,
         verification_id: str,
         verification: VerificationUpdate
-    ) -> Optional[VerificationInDB]:
-        update_data = verification.dict(exclude_unset=True)
-        result = await self.collection.update_one(
+    ) -> bool:
+        """
+        Set the given fields; returns whether a document was modified (always false if unacknowledged)
+        """
+        result = await self._writer(final=verification.status in FINAL_STATUSES).update_one(
             {"_id": ObjectId(verification_id)},
-            {"$set": update_data}
+            {"$set": await self.update_fields(verification)}
         )
-        if result.modified_count:
-            return await self.get_by_id(verification_id)
-        return None
+        # Unacknowledged writes report no count
+        return result.acknowledged and result.modified_count > 0
 
     async def list(
         self,
@@ -41,7 +356,76 @@ class VerificationRepository:
     ) -> List[VerificationInDB]:
         cursor = self.collection.find().skip(skip).limit(limit)
         verifications = await cursor.to_list(length=limit)
-        return [VerificationInDB(**verification) for verification in verifications]
+        return [VerificationInDB.model_validate(verification) for verification in verifications]
+
+    def _listing_query(
+        self,
+        status: Optional[str],
+        content_type: Optional[str],
+        after: Optional[Tuple[datetime, ObjectId]]
+    ) -> Dict[str, Any]:
+        query: Dict[str, Any] = {}
+        if status is not None:
+            query["status"] = status
+        if content_type is not None:
+            query["content_type"] = content_type
+        if after is not None:
+            created_at, last_id = after
+            # The range on created_at bounds the index scan; $or only breaks ties
+            query["created_at"] = {"$lte": created_at}
+            query["$or"] = [{"created_at": {"$lt": created_at}}, {"_id": {"$lt": last_id}}]
+        return query
+
+    async def iter_verifications(
+        self,
+        status: Optional[str] = None,
+        content_type: Optional[str] = None,
+        after: Optional[Tuple[datetime, ObjectId]] = None,
+        limit: int = 0,
+        projection: Optional[Dict[str, Any]] = SUMMARY_PROJECTION,
+        batch_size: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream verifications newest first, resuming after a (created_at, _id) position
+
+        Documents are yielded as the cursor fetches them, so memory does not
+        grow with the result set.
+        """
+        cursor = self.collection.find(
+            self._listing_query(status, content_type, after),
+            projection,
+            sort=[("created_at", DESCENDING), ("_id", DESCENDING)],
+            limit=limit,
+            batch_size=min(batch_size, limit) if limit else batch_size
+        )
+        async for verification in cursor:
+            yield verification
+
+    async def list_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of verification summaries and the cursor of the next page, if any
+        """
+        # Read one extra document to know whether there is a next page
+        verifications = [
+            verification async for verification in self.iter_verifications(
+                status,
+                content_type,
+                decode_cursor(cursor) if cursor else None,
+                limit=limit + 1
+            )
+        ]
+        next_cursor = None
+        if len(verifications) > limit:
+            verifications = verifications[:limit]
+            last = verifications[-1]
+            next_cursor = encode_cursor(last["created_at"], last["_id"])
+        return verifications, next_cursor
 
     async def delete(self, verification_id: str) -> bool:
         result = await self.collection.delete_one({"_id": ObjectId(verification_id)})
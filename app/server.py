@@ -0,0 +1,201 @@
+"""
+Production launcher: preload the models once, then fork workers that share them
+
+    python -m app.server [--workers 4] [--host 0.0.0.0] [--port 8000] [--threads 2]
+
+The parent imports the application and loads the preloaded models (see
+MODEL_PRELOAD_MODALITIES) before forking, so every worker maps the same
+weight pages copy-on-write instead of loading its own copy. ``gc.freeze``
+moves everything allocated so far out of the collector's reach, so garbage
+collections in the workers do not write to (and thereby copy) those pages.
+Inference never runs in the parent: the warm-up pass, the MongoDB
+connection and the executor threads are created by each worker after the
+fork. Each worker gets ``--threads`` torch threads (cores / workers by
+default), so the workers together do not oversubscribe the cores.
+
+The parent restarts workers that die and logs, every
+SERVER_MEMORY_REPORT_SECONDS, the RSS of each worker split into shared and
+private memory, and the total PSS (the real footprint of all workers).
+The claim index files have a single writer: the first worker runs the
+incremental claim indexer, and the other workers reload the index from the
+snapshots it saves (every CLAIM_INDEX_SNAPSHOT_SECONDS).
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+from app.services.backends import configure_threads
+from app.services.model_registry import memory_usage
+
+logger = logging.getLogger(__name__)
+
+# Delay before a worker that exited is started again, so a crash loop does not spin
+RESTART_DELAY_SECONDS = 1.0
+
+
+def threads_per_worker(workers: int, cpus: Optional[int] = None) -> int:
+    """
+    torch threads of each worker: INFERENCE_TORCH_THREADS, or an equal share of the cores
+    """
+    if settings.INFERENCE_TORCH_THREADS > 0:
+        return settings.INFERENCE_TORCH_THREADS
+    return max(1, (cpus or os.cpu_count() or 1) // max(1, workers))
+
+
+def preload() -> None:
+    """
+    Load the startup models in the current process, before workers are forked
+    """
+    from app.services.claims import claim_matcher
+    from app.services.model_registry import model_registry
+    from app.services.warmup import preload_modalities
+
+    modalities = preload_modalities()
+    if modalities is None:
+        return
+    if not claim_matcher.load():
+        modalities = [m for m in modalities if m != "claims"]
+    start = time.perf_counter()
+    model_registry.load_all(modalities)
+    logger.info("Preloaded %s in %.1fs", ", ".join(modalities), time.perf_counter() - start)
+
+
+def memory_report(workers: Dict[int, int]) -> Dict[str, Any]:
+    """
+    Shared and private memory of the parent and of each worker (pid -> worker index)
+    """
+    parent = memory_usage()
+    report: Dict[str, Any] = {"parent": parent, "workers": []}
+    total_pss = parent["pss_bytes"] if parent else 0
+    total_rss = parent["rss_bytes"] if parent else 0
+    for pid, index in sorted(workers.items(), key=lambda item: item[1]):
+        usage = memory_usage(pid)
+        report["workers"].append({"worker": index, "pid": pid, **(usage or {})})
+        if usage:
+            total_pss += usage["pss_bytes"]
+            total_rss += usage["rss_bytes"]
+    report["total_pss_bytes"] = total_pss
+    report["total_rss_bytes"] = total_rss
+    return report
+
+
+class Prefork:
+    """
+    Forks ``workers`` processes running ``target(index)`` and keeps them running
+    """
+
+    def __init__(self, target: Callable[[int], None], workers: int, memory_report_seconds: float = 60):
+        self.target = target
+        self.workers = max(1, workers)
+        self.memory_report_seconds = memory_report_seconds
+        self.children: Dict[int, int] = {}
+        self.stopping = False
+
+    def spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                self.target(index)
+            except BaseException:
+                logger.exception("Worker %d failed", index)
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = index
+        logger.info("Started worker %d (pid %d)", index, pid)
+
+    def stop(self, signum=None, frame=None) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.workers):
+            self.spawn(index)
+
+        next_report = time.monotonic() + self.memory_report_seconds
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                if self.memory_report_seconds > 0 and time.monotonic() >= next_report:
+                    logger.info("Memory: %s", json.dumps(memory_report(self.children)))
+                    next_report = time.monotonic() + self.memory_report_seconds
+                time.sleep(0.2)
+                continue
+            index = self.children.pop(pid, None)
+            if index is None or self.stopping:
+                continue
+            logger.warning("Worker %d (pid %d) exited with status %d; restarting", index, pid, status)
+            time.sleep(RESTART_DELAY_SECONDS)
+            self.spawn(index)
+
+
+def serve(host: str, port: int, workers: int, threads: int, preload_models: bool = True) -> None:
+    import uvicorn
+
+    # Before torch is imported, so its thread pools start at the right size
+    configure_threads(threads, settings.INFERENCE_TORCH_INTEROP_THREADS)
+    if not hasattr(os, "fork"):
+        # No fork (Windows): one process, models loaded at startup
+        uvicorn.run("app.main:app", host=host, port=port)
+        return
+
+    from app.main import app
+
+    if preload_models:
+        preload()
+    # Objects created so far are shared with the workers; keep the GC from touching them
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    def run_worker(index: int) -> None:
+        configure_threads(threads, settings.INFERENCE_TORCH_INTEROP_THREADS)
+        if index > 0:
+            from app.api.routes import claim_indexer
+
+            claim_indexer.read_only = True
+        server = uvicorn.Server(uvicorn.Config(app, log_level="info"))
+        server.run(sockets=[sock])
+
+    logger.info("Serving on %s:%d with %d workers, %d torch threads each", host, port, workers, threads)
+    Prefork(run_worker, workers, settings.SERVER_MEMORY_REPORT_SECONDS).run()
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS)
+    parser.add_argument("--threads", type=int, default=0, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--no-preload", action="store_true", help="let each worker load its own models")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    workers = max(1, args.workers)
+    threads = args.threads or threads_per_worker(workers)
+    serve(args.host, args.port, workers, threads, preload_models=settings.SERVER_PRELOAD and not args.no_preload)
+
+
+if __name__ == "__main__":
+    main()
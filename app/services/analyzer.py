@@ -1,28 +1,131 @@
+import time
 import uuid
-from typing import Dict, Any, Union
-import numpy as np
-from transformers import pipeline
-from PIL import Image
-import cv2
-import io
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple, Union
 import tempfile
 import os
+from app.core.config import settings
+from app.core.metrics import record_stage, timed, timed_stage
+from app.services.backends import IMAGE_TASK, TEXT_TASK, load_pipeline
+from app.services.model_registry import ModelRegistry, model_registry
+from app.services.batcher import MicroBatcher
+from app.services.claims import ClaimMatcher, claim_matcher, register_claim_encoder
+from app.services.prefilter import PrefilterExit, TextCascade, normalize_many
+from app.services.image_preprocessing import ImagePreprocessor, ImageSpec, classify_batch, image_spec, prepare
+from app.services.text_preprocessing import (
+    TextPreprocessor,
+    aggregate_window_scores,
+    plan_batches,
+    score_windows
+)
+from app.services.executor import InferenceExecutor, inference_executor
+
+# PIL and OpenCV are imported on first use: workers start without them and
+# endpoints that never touch an image or a video do not pay for them
+if TYPE_CHECKING:
+    from PIL import Image
+
+TEXT_MODEL = "text"
+IMAGE_MODEL = "image"
+
+def _load_text_model():
+    # Initialize NLP pipeline for text analysis
+    return load_pipeline(
+        TEXT_TASK,
+        settings.TEXT_MODEL_NAME,
+        settings.INFERENCE_BACKEND,
+        return_all_scores=True
+    )
+
+def _load_image_model():
+    # Initialize image analysis model
+    return load_pipeline(
+        IMAGE_TASK,
+        settings.IMAGE_MODEL_NAME,
+        settings.INFERENCE_BACKEND
+    )
+
+def _image_warmup_input():
+    from PIL import Image
+
+    return Image.new("RGB", (224, 224))
+
+def register_default_models(registry: ModelRegistry) -> None:
+    """
+    Register the text and image pipelines used by ContentAnalyzer
+    """
+    registry.register(
+        TEXT_MODEL,
+        modality="text",
+        loader=_load_text_model,
+        warmup_input=lambda: "Texto de aquecimento do modelo."
+    )
+    registry.register(
+        IMAGE_MODEL,
+        modality="image",
+        loader=_load_image_model,
+        warmup_input=_image_warmup_input
+    )
+    register_claim_encoder(registry)
+
+register_default_models(model_registry)
 
 class ContentAnalyzer:
-    def __init__(self):
-        # Initialize NLP pipeline for text analysis
-        self.text_analyzer = pipeline(
-            "text-classification",
-            model="neuralmind/bert-base-portuguese-cased",
-            return_all_scores=True
+    def __init__(
+        self,
+        registry: ModelRegistry = model_registry,
+        executor: InferenceExecutor = inference_executor,
+        claims: ClaimMatcher = claim_matcher,
+        prefilter: Optional[TextCascade] = None
+    ):
+        # Models are shared through the registry instead of loaded per instance
+        self.registry = registry
+        
+        # Blocking inference runs in the executor, never on the event loop
+        self.executor = executor
+        
+        # Similar already fact-checked claims, when a corpus index is available
+        self.claims = claims
+        
+        # Trivial texts and confident n-gram predictions skip the text model
+        self.prefilter = prefilter if prefilter is not None else TextCascade.from_settings()
+        
+        # Texts are tokenized once, windowed and cached by hash
+        self.text_preprocessor = TextPreprocessor(
+            max_length=settings.TEXT_MAX_TOKENS,
+            overlap=settings.TEXT_WINDOW_OVERLAP,
+            cache_max_entries=settings.TOKEN_CACHE_MAX_ENTRIES
         )
         
-        # Initialize image analysis model
-        self.image_analyzer = pipeline(
-            "image-classification",
-            model="microsoft/resnet-50"
+        # Concurrent text requests are grouped into one padded forward pass
+        self.text_batcher = MicroBatcher(
+            lambda texts: self.executor.run("text", self._score_text_batch, texts),
+            max_batch_size=settings.TEXT_BATCH_MAX_SIZE,
+            max_wait_ms=settings.TEXT_BATCH_MAX_WAIT_MS,
+            name="text"
         )
         
+        # Images are decoded at the model resolution and concurrent requests share a forward pass
+        self.image_preprocessor = ImagePreprocessor()
+        self.image_batcher = MicroBatcher(
+            lambda images: self.executor.run("image", self._classify_image_batch, images),
+            max_batch_size=settings.IMAGE_BATCH_MAX_SIZE,
+            max_wait_ms=settings.IMAGE_BATCH_MAX_WAIT_MS,
+            name="image"
+        )
+        self._image_spec: Tuple[Any, Optional[ImageSpec]] = (None, None)
+    
+    @property
+    def text_analyzer(self):
+        return self.registry.get(TEXT_MODEL)
+    
+    @property
+    def image_analyzer(self):
+        return self.registry.get(IMAGE_MODEL)
+    
+    async def close(self) -> None:
+        await self.text_batcher.close()
+        await self.image_batcher.close()
+        
     async def analyze(
         self,
         content: Union[str, bytes],
@@ -33,55 +136,210 @@ class ContentAnalyzer:
         """
         analysis_id = str(uuid.uuid4())
         
-        if content_type == "text":
-            return await self._analyze_text(content, analysis_id)
-        elif content_type == "image":
-            return await self._analyze_image(content, analysis_id)
-        elif content_type == "video":
-            return await self._analyze_video(content, analysis_id)
-        else:
+        if content_type not in ("text", "image", "video"):
             raise ValueError(f"Unsupported content type: {content_type}")
+        
+        # Reject early when too many requests are already waiting for inference
+        with self.executor.admit(content_type), timed_stage("analyze", content_type):
+            if content_type == "text":
+                return await self._analyze_text(content, analysis_id)
+            elif content_type == "image":
+                return await self._analyze_image(content, analysis_id)
+            else:
+                return await self._analyze_video(content, analysis_id)
+    
+    async def analyze_many(
+        self,
+        items: List[Tuple[Union[str, bytes, os.PathLike], str]]
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Analyze many (content, content_type) items at once
+
+        Texts and images go through their models in full batches of
+        TEXT_BATCH_MAX_SIZE and IMAGE_BATCH_MAX_SIZE instead of one request
+        each. A failed item yields its exception in place of a result, so one
+        bad item does not fail the whole batch.
+        """
+        results: List[Union[Dict[str, Any], Exception]] = [None] * len(items)
+        text_positions = [i for i, (_, content_type) in enumerate(items) if content_type == "text"]
+        image_positions = [i for i, (_, content_type) in enumerate(items) if content_type == "image"]
+        batch_size = max(1, settings.TEXT_BATCH_MAX_SIZE)
+        image_batch_size = max(1, settings.IMAGE_BATCH_MAX_SIZE)
+        
+        # A batch takes a single admission slot
+        with self.executor.admit("batch"), timed_stage("analyze", "batch"):
+            normalized = {}
+            if text_positions and self.prefilter.enabled:
+                texts = [items[i][0] for i in text_positions]
+                normalized = dict(zip(
+                    text_positions,
+                    await self.executor.run("text", normalize_many, texts, use_process=True)
+                ))
+            pending_texts = []
+            for i in text_positions:
+                screened = self.prefilter.screen(items[i][0], normalized.get(i))
+                if screened is None:
+                    pending_texts.append(i)
+                else:
+                    results[i] = self._prefilter_result(items[i][0], screened, str(uuid.uuid4()))
+            for start in range(0, len(pending_texts), batch_size):
+                positions = pending_texts[start:start + batch_size]
+                texts = [items[i][0] for i in positions]
+                try:
+                    scores = await self.executor.run("text", self._score_text_batch, texts)
+                except Exception as e:
+                    for i in positions:
+                        results[i] = e
+                    continue
+                for i, text, (sentiment, claim_matches, stage) in zip(positions, texts, scores):
+                    results[i] = self._text_result(text, sentiment, claim_matches, str(uuid.uuid4()), stage)
+            
+            for start in range(0, len(image_positions), image_batch_size):
+                positions = image_positions[start:start + image_batch_size]
+                try:
+                    images = await self.executor.run(
+                        "image", self._classify_image_batch, [items[i][0] for i in positions]
+                    )
+                except Exception as e:
+                    images = [e] * len(positions)
+                for i, image in zip(positions, images):
+                    results[i] = image if isinstance(image, Exception) else self._image_result(*image, str(uuid.uuid4()))
+            
+            for i, (content, content_type) in enumerate(items):
+                if content_type in ("text", "image"):
+                    continue
+                try:
+                    if content_type == "video":
+                        results[i] = await self._analyze_video(content, str(uuid.uuid4()))
+                    else:
+                        raise ValueError(f"Unsupported content type: {content_type}")
+                except Exception as e:
+                    results[i] = e
+        return results
     
     async def _analyze_text(self, text: str, analysis_id: str) -> Dict[str, Any]:
         """
         Analyze text content using NLP
         """
-        # Perform sentiment analysis
-        sentiment = self.text_analyzer(text)[0]
+        # Empty, trivial and known texts are answered without the model
+        screened = self.prefilter.screen(text)
+        if screened is not None:
+            return self._prefilter_result(text, screened, analysis_id)
         
+        # Perform sentiment analysis, batched with concurrent requests
+        sentiment, claim_matches, stage = await self.text_batcher.submit(text)
+        return self._text_result(text, sentiment, claim_matches, analysis_id, stage)
+    
+    def _prefilter_result(self, text: str, screened: PrefilterExit, analysis_id: str) -> Dict[str, Any]:
+        result = self._text_result(text, screened.sentiment, screened.claim_matches, analysis_id, screened.stage)
+        result["metadata"]["prefilter_reason"] = screened.reason
+        return result
+    
+    def _text_result(
+        self,
+        text: str,
+        sentiment: Any,
+        claim_matches: List[Dict[str, Any]],
+        analysis_id: str,
+        stage: str = "model"
+    ) -> Dict[str, Any]:
         # Extract key entities and topics
         # TODO: Implement entity recognition and topic extraction
         
+        metadata = {
+            "length": len(text),
+            "language": "pt",  # TODO: Implement language detection
+            # Cascade stage that answered: rules, ngram or model
+            "prefilter_stage": stage
+        }
+        tokenized = self.text_preprocessor.get(text)
+        if tokenized is not None:
+            metadata["tokens"] = tokenized.token_count
+            metadata["windows"] = len(tokenized.windows)
+        
         return {
             "id": analysis_id,
             "type": "text",
             "content": text,
             "sentiment": sentiment,
+            "claim_matches": claim_matches,
             "entities": [],  # TODO: Implement
             "topics": [],    # TODO: Implement
-            "metadata": {
-                "length": len(text),
-                "language": "pt"  # TODO: Implement language detection
-            }
+            "metadata": metadata
         }
     
-    async def _analyze_image(self, image_data: bytes, analysis_id: str) -> Dict[str, Any]:
+    def _score_text_batch(self, texts: List[str]) -> List[Tuple[Any, List[Dict[str, Any]], str]]:
+        """
+        Sentiment, similar fact-checked claims and the answering cascade stage for a batch of texts
+        """
+        # Only texts the n-gram stage is not confident about go through the text model
+        sentiments = self.prefilter.predict_many(texts)
+        stages = ["ngram" if sentiment is not None else "model" for sentiment in sentiments]
+        remaining = [i for i, sentiment in enumerate(sentiments) if sentiment is None]
+        if remaining:
+            for i, sentiment in zip(remaining, self._analyze_text_batch([texts[i] for i in remaining])):
+                sentiments[i] = sentiment
+        with timed_stage("claim_match", "text"):
+            claim_matches = self.claims.match_many(texts)
+        return list(zip(sentiments, claim_matches, stages))
+    
+    def _analyze_text_batch(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
         """
-        Analyze image content using computer vision
+        Score a batch of texts, splitting long ones into windows and bucketing windows by length
         """
-        # Convert bytes to PIL Image
-        image = Image.open(io.BytesIO(image_data))
+        text_pipeline = self.text_analyzer
+        if getattr(text_pipeline, "tokenizer", None) is None:
+            # Models without a tokenizer take the raw texts
+            with timed_stage("inference", "text"):
+                return text_pipeline(
+                    texts,
+                    batch_size=len(texts),
+                    padding=True,
+                    truncation=True
+                )
         
-        # Perform image classification
-        classification = self.image_analyzer(image)
+        with timed_stage("tokenize", "text"):
+            tokenized = self.text_preprocessor.tokenize_many(text_pipeline.tokenizer, texts)
+        windows = [window for tokenized_text in tokenized for window in tokenized_text.windows]
         
-        # Extract image metadata
-        metadata = {
-            "format": image.format,
-            "size": image.size,
-            "mode": image.mode
-        }
+        window_scores: List[Dict[str, float]] = [None] * len(windows)
+        for batch in plan_batches([len(window) for window in windows], settings.TEXT_BATCH_MAX_SIZE):
+            start = time.perf_counter()
+            scores = score_windows(text_pipeline, [windows[i] for i in batch])
+            elapsed = time.perf_counter() - start
+            self.text_preprocessor.record_batch([len(windows[i]) for i in batch], elapsed)
+            record_stage("inference", elapsed, "text")
+            for i, window_score in zip(batch, scores):
+                window_scores[i] = window_score
         
+        # Windows of each text are contiguous; fold them back into one result per text
+        results = []
+        offset = 0
+        for tokenized_text in tokenized:
+            count = len(tokenized_text.windows)
+            results.append(aggregate_window_scores(
+                window_scores[offset:offset + count],
+                [len(window) for window in tokenized_text.windows],
+                settings.TEXT_WINDOW_AGGREGATION
+            ))
+            offset += count
+        return results
+    
+    async def _analyze_image(
+        self,
+        image_data: Union[bytes, str, os.PathLike],
+        analysis_id: str
+    ) -> Dict[str, Any]:
+        """
+        Analyze image content using computer vision, batched with concurrent requests
+        """
+        result = await self.image_batcher.submit(image_data)
+        if isinstance(result, Exception):
+            raise result
+        classification, metadata = result
+        return self._image_result(classification, metadata, analysis_id)
+    
+    def _image_result(self, classification: Any, metadata: Dict[str, Any], analysis_id: str) -> Dict[str, Any]:
         return {
             "id": analysis_id,
             "type": "image",
@@ -89,48 +347,108 @@ class ContentAnalyzer:
             "metadata": metadata
         }
     
-    async def _analyze_video(self, video_data: bytes, analysis_id: str) -> Dict[str, Any]:
+    def _image_pipeline(self) -> Tuple[Any, Optional[ImageSpec]]:
+        """
+        The image pipeline and the input spec of its processor (None for non-Hugging Face models)
+        """
+        image_pipeline = self.image_analyzer
+        cached_pipeline, spec = self._image_spec
+        if cached_pipeline is not image_pipeline:
+            spec = image_spec(image_pipeline)
+            self._image_spec = (image_pipeline, spec)
+        return image_pipeline, spec
+    
+    def _classify_image_batch(
+        self,
+        images: List[Union[bytes, str, os.PathLike]]
+    ) -> List[Union[Tuple[Any, Dict[str, Any]], Exception]]:
+        """
+        Decode and classify images from bytes or stored files in one forward pass; runs in an executor thread
+
+        Returns (classification, metadata) per image, or the exception of an
+        image that could not be decoded.
+        """
+        # A first-use load is timed as model_load, not as decode or inference
+        image_pipeline, spec = self._image_pipeline()
+        
+        with timed_stage("image_decode", "image"):
+            decoded = self.image_preprocessor.decode_many(images, spec)
+        valid = [item for item in decoded if not isinstance(item, Exception)]
+        if not valid:
+            return decoded
+        
+        with timed_stage("inference", "image"):
+            classifications = iter(self._classify_images(image_pipeline, spec, [image for image, _ in valid]))
+        return [
+            item if isinstance(item, Exception) else (next(classifications), item[1])
+            for item in decoded
+        ]
+    
+    def _classify_images(self, image_pipeline: Any, spec: Optional[ImageSpec], images: List["Image.Image"]) -> List[Any]:
+        if spec is None:
+            return image_pipeline(images, batch_size=len(images))
+        return classify_batch(image_pipeline, self.image_preprocessor.to_batch(images, spec))
+    
+    async def _analyze_video(
+        self,
+        video: Union[bytes, str, os.PathLike],
+        analysis_id: str
+    ) -> Dict[str, Any]:
         """
         Analyze video content using computer vision
+
+        ``video`` is either the raw bytes or the path of a file already spooled to disk.
         """
-        # Create a temporary file to store the video data
+        video_result = await self.executor.run("video", self._process_video, video)
+        
+        return {
+            "id": analysis_id,
+            "type": "video",
+            "metadata": video_result["metadata"],
+            "analysis": {
+                "key_frames": video_result["key_frames"],
+                "objects": video_result["objects"],
+                "scenes": video_result["scenes"]
+            }
+        }
+    
+    def _process_video(self, video: Union[bytes, str, os.PathLike]) -> Dict[str, Any]:
+        """
+        Sample and classify key frames with OpenCV; runs in an executor thread
+        """
+        if not isinstance(video, bytes):
+            return self._process_video_file(os.fspath(video))
+        
+        # Raw bytes still need a file for cv2.VideoCapture
         with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_file:
-            temp_file.write(video_data)
+            temp_file.write(video)
             temp_file_path = temp_file.name
         
         try:
-            # Open video file
-            cap = cv2.VideoCapture(temp_file_path)
-            
-            if not cap.isOpened():
-                raise ValueError("Could not open video file")
-            
-            # Extract video metadata
-            metadata = {
-                "fps": cap.get(cv2.CAP_PROP_FPS),
-                "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
-                "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            }
-            
-            # TODO: Implement video analysis
-            # - Extract key frames
-            # - Perform object detection
-            # - Analyze scene changes
-            
-            cap.release()
-            
-            return {
-                "id": analysis_id,
-                "type": "video",
-                "metadata": metadata,
-                "analysis": {
-                    "key_frames": [],  # TODO: Implement
-                    "objects": [],     # TODO: Implement
-                    "scenes": []       # TODO: Implement
-                }
-            }
+            return self._process_video_file(temp_file_path)
         finally:
             # Clean up the temporary file
             if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path) 
\ No newline at end of file
+                os.unlink(temp_file_path)
+    
+    def _process_video_file(self, path: str) -> Dict[str, Any]:
+        from app.services.video import analyze_video_file
+        
+        return analyze_video_file(
+            path,
+            self._classify_key_frames,
+            stride=settings.VIDEO_FRAME_STRIDE,
+            scene_threshold=settings.VIDEO_SCENE_THRESHOLD,
+            max_key_frames=settings.VIDEO_MAX_KEY_FRAMES,
+            batch_size=settings.VIDEO_KEY_FRAME_BATCH_SIZE
+        )
+    
+    @timed("inference", "video")
+    def _classify_key_frames(self, frames: List["Image.Image"]) -> List[Any]:
+        """
+        Classify a batch of key frames in one forward pass of the image model
+        """
+        image_pipeline, spec = self._image_pipeline()
+        if spec is not None:
+            frames = [prepare(frame, spec) for frame in frames]
+        return self._classify_images(image_pipeline, spec, frames)
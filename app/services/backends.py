@@ -0,0 +1,285 @@
+"""
+Inference backends for the text and image pipelines
+
+``torch`` runs the Hugging Face checkpoints as published. ``onnxruntime``
+runs an ONNX export through ONNX Runtime (requires ``optimum[onnxruntime]``)
+and ``torch-int8-dynamic`` applies PyTorch dynamic int8 quantization to the
+Linear layers. Exports are cached under MODEL_PATH by ``build``:
+
+    python -m app.services.backends build --backend onnxruntime --check
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+BACKENDS = ("torch", "onnxruntime", "torch-int8-dynamic")
+
+TEXT_TASK = "text-classification"
+IMAGE_TASK = "image-classification"
+
+# Tasks served by each backend, with the model classes they export to
+_TORCH_CLASSES = {
+    TEXT_TASK: "AutoModelForSequenceClassification",
+    IMAGE_TASK: "AutoModelForImageClassification"
+}
+_ORT_CLASSES = {
+    TEXT_TASK: "ORTModelForSequenceClassification",
+    IMAGE_TASK: "ORTModelForImageClassification"
+}
+
+
+# Thread pools sized from the environment when the native libraries initialize
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# (intra-op, inter-op) torch threads requested by configure_threads; 0 keeps the default
+_thread_limits = (0, 0)
+
+
+class BackendUnavailableError(RuntimeError):
+    """
+    Raised when the configured backend needs a package that is not installed
+    """
+
+
+def validate_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend} (expected one of {', '.join(BACKENDS)})")
+    return backend
+
+
+def export_dir(model_name: str, backend: str, model_path: Optional[str] = None) -> str:
+    """
+    Local directory holding the cached export of a model for a backend
+
+    The int8 backend quantizes at load time, so it shares the torch export.
+    """
+    validate_backend(backend)
+    storage = "onnx" if backend == "onnxruntime" else "torch"
+    safe_name = re.sub(r"[^A-Za-z0-9._-]+", "--", model_name)
+    return os.path.join(model_path or settings.MODEL_PATH, storage, safe_name)
+
+
+def _preprocessor(task: str, source: str):
+    from transformers import AutoImageProcessor, AutoTokenizer
+
+    if task == TEXT_TASK:
+        return AutoTokenizer.from_pretrained(source)
+    return AutoImageProcessor.from_pretrained(source)
+
+
+def _load_torch_model(task: str, source: str):
+    import transformers
+
+    return getattr(transformers, _TORCH_CLASSES[task]).from_pretrained(source)
+
+
+def _load_ort_model(task: str, source: str, export: bool):
+    try:
+        import optimum.onnxruntime
+    except ImportError as e:
+        raise BackendUnavailableError(
+            "The onnxruntime backend requires optimum[onnxruntime]"
+        ) from e
+    return getattr(optimum.onnxruntime, _ORT_CLASSES[task]).from_pretrained(source, export=export)
+
+
+def build(task: str, model_name: str, backend: str, model_path: Optional[str] = None) -> str:
+    """
+    Export a model for a backend and cache it locally; returns the export directory
+    """
+    directory = export_dir(model_name, backend, model_path)
+    if os.path.exists(os.path.join(directory, "config.json")):
+        return directory
+
+    if backend == "onnxruntime":
+        model = _load_ort_model(task, model_name, export=True)
+    else:
+        model = _load_torch_model(task, model_name)
+    os.makedirs(directory, exist_ok=True)
+    model.save_pretrained(directory)
+    _preprocessor(task, model_name).save_pretrained(directory)
+    return directory
+
+
+def _quantize_dynamic(model):
+    try:
+        import torch
+    except ImportError as e:
+        raise BackendUnavailableError("The torch-int8-dynamic backend requires torch") from e
+    # Only Linear layers have dynamic int8 kernels: all of BERT's encoder, but
+    # just the classification head of ResNet-50
+    return torch.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def configure_threads(threads: int, interop_threads: int = 0) -> None:
+    """
+    Limit the CPU threads one process uses for inference
+
+    With several workers per host, each should get about cores / workers
+    threads, otherwise their pools oversubscribe the cores. The environment
+    variables only affect libraries not initialized yet, so this is called
+    before models are loaded; torch itself is configured now if it is already
+    imported, or as soon as a pipeline is loaded.
+    """
+    global _thread_limits
+    _thread_limits = (max(0, threads), max(0, interop_threads))
+    if threads > 0:
+        for name in THREAD_ENV_VARS:
+            os.environ[name] = str(threads)
+    _apply_thread_limits()
+
+
+def _apply_thread_limits() -> None:
+    torch = sys.modules.get("torch")
+    threads, interop_threads = _thread_limits
+    if torch is None:
+        return
+    if threads and torch.get_num_threads() != threads:
+        torch.set_num_threads(threads)
+    if interop_threads and torch.get_num_interop_threads() != interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # Only allowed before the first inter-op parallel work of the process
+            pass
+
+
+def load_pipeline(task: str, model_name: str, backend: str, **kwargs):
+    """
+    Build a Hugging Face pipeline for a task on the given backend
+
+    Uses the local export when ``build`` has been run, otherwise the hub
+    checkpoint (exported on the fly for onnxruntime).
+    """
+    from transformers import pipeline
+
+    _apply_thread_limits()
+    validate_backend(backend)
+    directory = export_dir(model_name, backend)
+    cached = os.path.exists(os.path.join(directory, "config.json"))
+    source = directory if cached else model_name
+
+    if backend == "torch":
+        return pipeline(task, model=source, **kwargs)
+
+    if backend == "onnxruntime":
+        model = _load_ort_model(task, source, export=not cached)
+    else:
+        model = _quantize_dynamic(_load_torch_model(task, source))
+
+    preprocessor = _preprocessor(task, source)
+    if task == TEXT_TASK:
+        return pipeline(task, model=model, tokenizer=preprocessor, **kwargs)
+    return pipeline(task, model=model, image_processor=preprocessor, **kwargs)
+
+
+def _scores(output: Any) -> Dict[str, float]:
+    """
+    Flatten one pipeline output (a list of label/score dicts) into {label: score}
+    """
+    if output and isinstance(output[0], list):
+        output = output[0]
+    return {prediction["label"]: float(prediction["score"]) for prediction in output}
+
+
+def check_parity(
+    reference: List[Any],
+    candidate: List[Any],
+    tolerance: float
+) -> Dict[str, Any]:
+    """
+    Compare per-input pipeline outputs of a backend against the torch reference
+
+    Scores are compared on the labels both outputs report; the top label must
+    also agree. ``passed`` is true when every input is within ``tolerance``.
+    """
+    if len(reference) != len(candidate):
+        raise ValueError("Reference and candidate outputs differ in length")
+
+    max_difference = 0.0
+    top_label_matches = 0
+    for expected, actual in zip(reference, candidate):
+        expected_scores, actual_scores = _scores(expected), _scores(actual)
+        for label in expected_scores.keys() & actual_scores.keys():
+            max_difference = max(max_difference, abs(expected_scores[label] - actual_scores[label]))
+        if expected_scores and actual_scores and (
+            max(expected_scores, key=expected_scores.get) == max(actual_scores, key=actual_scores.get)
+        ):
+            top_label_matches += 1
+
+    count = len(reference)
+    return {
+        "inputs": count,
+        "max_score_difference": max_difference,
+        "top_label_agreement": top_label_matches / count if count else 1.0,
+        "tolerance": tolerance,
+        "passed": max_difference <= tolerance and top_label_matches == count
+    }
+
+
+def parity_inputs(task: str) -> List[Any]:
+    """
+    Small fixed inputs used by the parity check
+    """
+    if task == TEXT_TASK:
+        return [
+            "O governo anunciou hoje um novo programa de vacinação em todo o país.",
+            "URGENTE!!! Compartilhe antes que apaguem: a verdade que a mídia esconde.",
+            "Estudo da universidade federal aponta queda no desmatamento em 2023.",
+            "Texto curto."
+        ]
+    from PIL import Image
+
+    return [
+        Image.new("RGB", (224, 224), color)
+        for color in ((255, 0, 0), (0, 128, 0), (30, 30, 200), (240, 240, 240))
+    ]
+
+
+def _pipeline_kwargs(task: str) -> Dict[str, Any]:
+    return {"return_all_scores": True} if task == TEXT_TASK else {}
+
+
+def run_parity_check(task: str, model_name: str, backend: str, tolerance: float) -> Dict[str, Any]:
+    inputs = parity_inputs(task)
+    kwargs = _pipeline_kwargs(task)
+    reference = load_pipeline(task, model_name, "torch", **kwargs)
+    candidate = load_pipeline(task, model_name, backend, **kwargs)
+    return check_parity(
+        [reference(item) for item in inputs],
+        [candidate(item) for item in inputs],
+        tolerance
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and check inference backends")
+    parser.add_argument("command", choices=["build", "check"])
+    parser.add_argument("--backend", default=settings.INFERENCE_BACKEND, choices=BACKENDS + ("all",))
+    parser.add_argument("--check", action="store_true", help="run the parity check after building")
+    parser.add_argument("--tolerance", type=float, default=settings.INFERENCE_PARITY_TOLERANCE)
+    args = parser.parse_args()
+
+    backends = BACKENDS if args.backend == "all" else (args.backend,)
+    models = ((TEXT_TASK, settings.TEXT_MODEL_NAME), (IMAGE_TASK, settings.IMAGE_MODEL_NAME))
+    report = []
+    for backend in backends:
+        for task, model_name in models:
+            entry = {"backend": backend, "task": task, "model": model_name}
+            if args.command == "build":
+                entry["path"] = build(task, model_name, backend)
+            if (args.command == "check" or args.check) and backend != "torch":
+                entry["parity"] = run_parity_check(task, model_name, backend, args.tolerance)
+            report.append(entry)
+    print(json.dumps(report, indent=2))
+
+    if any(not entry.get("parity", {}).get("passed", True) for entry in report):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
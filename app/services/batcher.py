@@ -0,0 +1,156 @@
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.metrics import current_request, detach_request, shared_stages
+
+# Upper bounds of the batch-size histogram buckets
+HISTOGRAM_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class MicroBatcher:
+    """
+    Groups concurrent single-item requests into batches for one model call
+
+    Items submitted from many coroutines are queued and flushed either when
+    ``max_batch_size`` items are waiting or ``max_wait_ms`` has elapsed since the
+    first item of the batch arrived. ``batch_fn`` receives the list of items and
+    must return one result per item, in order; it may be sync or async.
+    Stages timed by ``batch_fn`` count towards every request in the batch.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Any],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher"
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: List[Tuple[Any, asyncio.Future, Any]] = []
+
+        self._histogram: Dict[str, int] = {f"le_{bucket}": 0 for bucket in HISTOGRAM_BUCKETS}
+        self._histogram["le_inf"] = 0
+        self._batches = 0
+        self._items = 0
+        self._max_queue_depth = 0
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait for its result from the next batch
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((item, future, current_request()))
+        self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return await future
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # Queues are bound to the loop they are first used on
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        # The task inherits the context of the request that started it; batches serve many requests
+        detach_request()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already queued before waiting for more
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self._in_flight = batch
+            await self._process(batch)
+            self._in_flight = []
+
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future, Any]]) -> None:
+        # Callers that went away do not need a forward pass
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+
+        self._record(len(batch))
+        items = [item for item, _, _ in batch]
+        try:
+            with shared_stages([timings for _, _, timings in batch]):
+                results = self.batch_fn(items)
+                if inspect.isawaitable(results):
+                    results = await results
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"{self.name}: batch function returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, batch_size: int) -> None:
+        self._batches += 1
+        self._items += batch_size
+        for bucket in HISTOGRAM_BUCKETS:
+            if batch_size <= bucket:
+                self._histogram[f"le_{bucket}"] += 1
+                return
+        self._histogram["le_inf"] += 1
+
+    async def close(self) -> None:
+        """
+        Stop the background task and fail any request still waiting
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+            self._task = None
+
+        pending = list(self._in_flight)
+        self._in_flight = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError(f"{self.name} is shutting down"))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report queue depth and the distribution of batch sizes
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self._max_queue_depth,
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_size_histogram": dict(self._histogram)
+        }
@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+from fastapi import UploadFile
+from app.core.config import settings
+
+REFERENCE_PREFIX = "blob:"
+# References come from clients; only this form maps to a path inside the store
+_CONTENT_HASH = re.compile(r"sha256:[0-9a-f]{64}")
+
+
+class UploadTooLargeError(Exception):
+    """
+    Raised as soon as an upload exceeds the configured maximum size
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the maximum size of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class StoredBlob:
+    def __init__(self, content_hash: str, size: int, path: str):
+        self.content_hash = content_hash
+        self.size = size
+        self.path = path
+
+    @property
+    def reference(self) -> str:
+        return f"{REFERENCE_PREFIX}{self.content_hash}"
+
+
+class BlobStore:
+    """
+    Local content-addressed store for uploaded media
+
+    Payloads are kept out of the verification documents, which only hold a
+    ``blob:sha256:<hex>`` reference. Identical uploads share one file.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, content_hash: str) -> str:
+        if not _CONTENT_HASH.fullmatch(content_hash):
+            raise ValueError(f"Invalid content hash: {content_hash!r}")
+        algorithm, hex_digest = content_hash.split(":", 1)
+        return os.path.join(self.root, algorithm, hex_digest[:2], hex_digest[2:4], hex_digest)
+
+    def resolve(self, reference: str) -> Optional[str]:
+        """
+        Return the file path of a ``blob:`` reference, or None if it is malformed or not stored
+        """
+        if not reference.startswith(REFERENCE_PREFIX) or not _CONTENT_HASH.fullmatch(reference[len(REFERENCE_PREFIX):]):
+            return None
+        path = self.path_for(reference[len(REFERENCE_PREFIX):])
+        return path if os.path.exists(path) else None
+
+    async def ingest(self, file: UploadFile, max_bytes: int, chunk_size: int) -> StoredBlob:
+        """
+        Stream an upload into the store in chunks, hashing it on the way
+
+        Memory use is bounded by ``chunk_size``; UploadTooLargeError is raised as
+        soon as more than ``max_bytes`` have been read.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        # Write next to the final location so the rename below is atomic
+        temp_file = tempfile.NamedTemporaryFile(dir=self.root, prefix=".upload-", delete=False)
+        try:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                digest.update(chunk)
+                await asyncio.to_thread(temp_file.write, chunk)
+            temp_file.close()
+
+            content_hash = f"sha256:{digest.hexdigest()}"
+            path = self.path_for(content_hash)
+            if os.path.exists(path):
+                os.unlink(temp_file.name)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_file.name, path)
+        except BaseException:
+            temp_file.close()
+            if os.path.exists(temp_file.name):
+                os.unlink(temp_file.name)
+            raise
+
+        return StoredBlob(content_hash, size, path)
+
+
+blob_store = BlobStore(settings.BLOB_STORE_PATH)
@@ -0,0 +1,112 @@
+import copy
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+from app.core.config import settings
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so trivially different copies of a claim hash the same
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def compute_content_hash(content: Union[str, bytes], content_type: str) -> str:
+    """
+    SHA-256 of normalized text, or of the raw bytes for media files
+    """
+    if isinstance(content, str):
+        data = normalize_text(content).encode("utf-8") if content_type == "text" else content.encode("utf-8")
+    else:
+        data = content
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+class ResultCache:
+    """
+    In-memory LRU of verification results keyed by content hash
+
+    Entries expire after ``ttl_seconds`` and the least recently used entry is
+    evicted beyond ``max_entries``. Results are only valid for the model
+    version they were produced with, so changing it empties the cache.
+    Values are copied in and out, so callers may modify the results they get.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600, model_version: str = ""):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.model_version = model_version
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+        self._persistent_hits = 0
+        self._evictions = 0
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(content_hash)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[content_hash]
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(content_hash)
+        self._hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, content_hash: str, value: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[content_hash] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+        self._entries.move_to_end(content_hash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def record_persistent_hit(self) -> None:
+        """
+        Count a miss of the memory tier that was served by the database tier
+        """
+        self._persistent_hits += 1
+
+    def set_model_version(self, model_version: str) -> None:
+        if model_version != self.model_version:
+            self.model_version = model_version
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "model_version": self.model_version,
+            "hits": self._hits,
+            "misses": self._misses,
+            "persistent_hits": self._persistent_hits,
+            "evictions": self._evictions,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "combined_hit_rate": (self._hits + self._persistent_hits) / lookups if lookups else 0.0
+        }
+
+
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+    model_version=settings.MODEL_VERSION
+)
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import numpy as np
+from pymongo.errors import OperationFailure
+from app.core.config import settings
+from app.repositories.verification import VerificationRepository
+from app.services.claims import CLAIM_ENCODER, ClaimMatcher, claim_matcher
+from app.services.executor import InferenceExecutor, inference_executor
+
+logger = logging.getLogger(__name__)
+
+# Texts this close to an indexed claim are already represented in the index
+DUPLICATE_SIMILARITY = 0.999
+
+
+class ClaimIndexer:
+    """
+    Background task that appends completed text verifications to the claim index
+
+    New verifications are read by polling ``updated_at`` (or from a change
+    stream) and embedded in small batches into the index's delta segment.
+    The delta is snapshotted periodically with the read position, so a
+    restart resumes from disk instead of re-embedding history, and merged
+    into the main matrix in the background once it grows large.
+
+    The index files have a single writer. A ``read_only`` indexer (the other
+    workers of a prefork server) does not read verifications itself: it
+    reloads the index whenever the writer has saved a new snapshot, so its
+    claims lag by up to ``snapshot_seconds``.
+    """
+
+    def __init__(
+        self,
+        repository: VerificationRepository,
+        matcher: ClaimMatcher = claim_matcher,
+        executor: InferenceExecutor = inference_executor,
+        mode: str = "poll",
+        poll_seconds: float = 5,
+        batch_size: int = 64,
+        lookback_seconds: float = 30,
+        min_confidence: float = 0.85,
+        compact_threshold: int = 5000,
+        snapshot_seconds: float = 60,
+        read_only: bool = False
+    ):
+        self.repository = repository
+        self.matcher = matcher
+        self.executor = executor
+        self.mode = mode
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.lookback_seconds = lookback_seconds
+        self.min_confidence = min_confidence
+        self.compact_threshold = compact_threshold
+        self.snapshot_seconds = snapshot_seconds
+        self.read_only = read_only
+
+        self._tasks: List[asyncio.Task] = []
+        self._dirty = False
+
+        self._ingested = 0
+        self._skipped = 0
+        self._duplicates = 0
+        self._snapshots = 0
+        self._reloads = 0
+        self._errors = 0
+
+    async def start(self) -> None:
+        if self._tasks or not self.matcher.available:
+            return
+        if self.read_only:
+            self._tasks = [asyncio.create_task(self._reload(), name="claim-index-reload")]
+            return
+        self._tasks = [
+            asyncio.create_task(self._follow(), name="claim-indexer"),
+            asyncio.create_task(self._maintain(), name="claim-index-maintenance")
+        ]
+
+    async def stop(self) -> None:
+        """
+        Stop following verifications and snapshot what was ingested since the last snapshot
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._dirty:
+            await self.snapshot()
+
+    async def snapshot(self) -> None:
+        self._dirty = False
+        await self.executor.run("claims", self.matcher.snapshot)
+        self._snapshots += 1
+
+    async def _follow(self) -> None:
+        if self.mode == "change_stream":
+            try:
+                await self._follow_change_stream()
+            except OperationFailure as e:
+                # Change streams need a replica set; standalone servers fall back to polling
+                logger.warning("Claim indexer cannot use a change stream (%s), polling instead", e)
+        while True:
+            try:
+                ingested = await self.poll_once()
+            except Exception:
+                self._errors += 1
+                logger.exception("Claim indexer poll failed")
+                ingested = 0
+            # Keep reading while there is a backlog
+            if ingested < self.batch_size:
+                await asyncio.sleep(self.poll_seconds)
+
+    async def poll_once(self) -> int:
+        """
+        Ingest the next batch of completed verifications; returns how many were read
+
+        ``updated_at`` is set by the writer, so a verification can become
+        visible after newer ones were read. Each poll re-reads the last
+        ``lookback_seconds`` before the checkpoint; the ids already read in
+        that window are kept in the checkpoint and skipped.
+        """
+        checkpoint = self.matcher.index.checkpoint or {}
+        updated_at = datetime.fromisoformat(checkpoint["updated_at"]) if checkpoint.get("updated_at") else None
+        recent: Dict[str, str] = dict(checkpoint.get("recent") or {})
+        lookback = timedelta(seconds=self.lookback_seconds)
+        verifications = [
+            verification async for verification in self.repository.iter_completed_since(
+                "text",
+                updated_at - lookback if updated_at else None,
+                list(recent),
+                limit=self.batch_size
+            )
+        ]
+        if not verifications:
+            return 0
+
+        for verification in verifications:
+            recent[str(verification["_id"])] = verification["updated_at"].isoformat()
+        newest = max(verification["updated_at"] for verification in verifications)
+        if updated_at is not None:
+            newest = max(newest, updated_at)
+        # Ids older than the next window are never read again
+        recent = {
+            verification_id: at for verification_id, at in recent.items()
+            if datetime.fromisoformat(at) >= newest - lookback
+        }
+        await self._ingest(verifications, {"updated_at": newest.isoformat(), "recent": recent})
+        return len(verifications)
+
+    async def _follow_change_stream(self) -> None:
+        checkpoint = self.matcher.index.checkpoint or {}
+        async for verification, resume_token in self.repository.watch_completed(
+            "text",
+            resume_after=checkpoint.get("resume_token")
+        ):
+            await self._ingest([verification], {
+                "resume_token": resume_token,
+                "updated_at": verification["updated_at"].isoformat(),
+                "id": str(verification["_id"])
+            })
+
+    def _claim(self, verification: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        classification = verification.get("classification_result") or {}
+        content = verification.get("content")
+        if not content or not classification.get("label"):
+            return None
+        # Only confident verdicts are reused for other texts
+        if classification.get("confidence", 0) < self.min_confidence:
+            return None
+        return {
+            "claim": content,
+            "verdict": classification["label"],
+            "url": None,
+            "source": "verification",
+            "verification_id": str(verification["_id"])
+        }
+
+    async def _ingest(self, verifications: List[Dict[str, Any]], checkpoint: Dict[str, Any]) -> None:
+        claims = [claim for claim in map(self._claim, verifications) if claim is not None]
+        self._skipped += len(verifications) - len(claims)
+        if claims:
+            vectors = await self.executor.run(
+                "claims",
+                self.matcher.registry.get(CLAIM_ENCODER),
+                [claim["claim"] for claim in claims]
+            )
+            claims, vectors = await self.executor.run("claims", self._drop_duplicates, claims, vectors)
+        else:
+            vectors = None
+
+        self.matcher.add(vectors, claims, checkpoint)
+        self._ingested += len(claims)
+        self._dirty = True
+
+    def _drop_duplicates(self, claims: List[Dict[str, Any]], vectors: np.ndarray):
+        index = self.matcher.index
+        keep = []
+        for i, vector in enumerate(vectors):
+            nearest = index.search(vector, k=1, nprobe=self.matcher.nprobe)
+            if nearest and nearest[0][1] >= DUPLICATE_SIMILARITY:
+                self._duplicates += 1
+            else:
+                keep.append(i)
+        return [claims[i] for i in keep], vectors[keep]
+
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(self.snapshot_seconds)
+            try:
+                if self.matcher.index.delta_count >= self.compact_threshold:
+                    await self.executor.run("claims", self.matcher.compact)
+                    self._dirty = True
+                if self._dirty:
+                    await self.snapshot()
+            except Exception:
+                self._errors += 1
+                logger.exception("Claim index maintenance failed")
+
+    async def _reload(self) -> None:
+        version = self.matcher.snapshot_version()
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                current = self.matcher.snapshot_version()
+                if current != version:
+                    await self.executor.run("claims", self.matcher.reload)
+                    version = current
+                    self._reloads += 1
+            except Exception:
+                self._errors += 1
+                logger.exception("Claim index reload failed")
+
+    def stats(self) -> Dict[str, Any]:
+        index = self.matcher.index
+        return {
+            "running": bool(self._tasks),
+            "mode": "read_only" if self.read_only else self.mode,
+            "ingested": self._ingested,
+            "skipped": self._skipped,
+            "duplicates": self._duplicates,
+            "snapshots": self._snapshots,
+            "reloads": self._reloads,
+            "errors": self._errors,
+            "checkpoint": (index.checkpoint or {}).get("updated_at") if index is not None else None
+        }
+
+
+def create_claim_indexer(repository: VerificationRepository) -> ClaimIndexer:
+    return ClaimIndexer(
+        repository,
+        mode=settings.CLAIM_INDEXER_MODE,
+        poll_seconds=settings.CLAIM_INDEXER_POLL_SECONDS,
+        batch_size=settings.CLAIM_INDEXER_BATCH_SIZE,
+        lookback_seconds=settings.CLAIM_INDEXER_LOOKBACK_SECONDS,
+        min_confidence=settings.CLAIM_INDEXER_MIN_CONFIDENCE,
+        compact_threshold=settings.CLAIM_INDEX_COMPACT_THRESHOLD,
+        snapshot_seconds=settings.CLAIM_INDEX_SNAPSHOT_SECONDS
+    )
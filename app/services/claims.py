@@ -0,0 +1,733 @@
+"""
+Claim matching against a local corpus of already fact-checked claims
+
+The corpus (JSONL or Parquet with ``claim``, ``verdict`` and ``url`` fields)
+is embedded once and stored under CLAIM_INDEX_PATH as a memory-mapped
+float16 or int8 matrix of L2-normalized vectors. Large corpora also get an
+inverted-file (IVF) index: vectors are clustered with spherical k-means and
+stored grouped by cluster, so a query only scans the few closest clusters.
+
+    python -m app.services.claims build --corpus data/fact_checks.jsonl
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.services.model_registry import ModelRegistry, model_registry
+
+CLAIM_ENCODER = "claims"
+
+EMBEDDINGS_FILE = "embeddings.npy"
+SCALES_FILE = "scales.npy"
+CLAIMS_FILE = "claims.jsonl"
+OFFSETS_FILE = "claims.offsets.npy"
+IVF_FILE = "ivf.npz"
+META_FILE = "index.json"
+DELTA_FILE = "delta.npz"
+DELTA_CLAIMS_FILE = "delta.json"
+
+DTYPES = ("float16", "int8")
+
+# Rows scanned per matrix product in an exhaustive search
+SEARCH_CHUNK_ROWS = 65536
+
+_VERDICT_KEYS = {
+    "verdadeiro": "VERIFIED", "verificado": "VERIFIED", "true": "VERIFIED", "verified": "VERIFIED",
+    "falso": "FAKE", "false": "FAKE", "fake": "FAKE", "boato": "FAKE",
+    "enganoso": "SUSPICIOUS", "impreciso": "SUSPICIOUS", "distorcido": "SUSPICIOUS",
+    "suspeito": "SUSPICIOUS", "misleading": "SUSPICIOUS", "suspicious": "SUSPICIOUS"
+}
+
+
+def verdict_label(verdict: Optional[str]) -> str:
+    """
+    Map a fact-checker verdict to one of the platform's classification labels
+    """
+    key = _VERDICT_KEYS.get((verdict or "").strip().lower(), "SUSPICIOUS")
+    return settings.CLASSIFICATION_LABELS[key]
+
+
+def read_corpus(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield ``{claim, verdict, url}`` records from a JSONL or Parquet corpus
+    """
+    if path.endswith(".parquet"):
+        import pandas as pd
+
+        rows = pd.read_parquet(path).to_dict("records")
+    else:
+        rows = (json.loads(line) for line in open(path, encoding="utf-8") if line.strip())
+
+    for row in rows:
+        claim = row.get("claim") or row.get("text")
+        if not claim:
+            continue
+        yield {
+            "claim": claim,
+            "verdict": row.get("verdict") or row.get("rating"),
+            "url": row.get("url"),
+            "source": row.get("source")
+        }
+
+
+class TextEncoder:
+    """
+    Mean-pooled, L2-normalized sentence embeddings from a BERT checkpoint
+    """
+
+    def __init__(self, model_name: str, max_length: int = 256):
+        from transformers import AutoModel, AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+        self.max_length = max_length
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        import torch
+
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="pt"
+        )
+        with torch.inference_mode():
+            hidden = self.model(**encoded).last_hidden_state
+        mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1)
+        return normalize(pooled.numpy())
+
+
+def _load_claim_encoder() -> TextEncoder:
+    return TextEncoder(settings.CLAIM_MODEL_NAME)
+
+
+def register_claim_encoder(registry: ModelRegistry) -> None:
+    registry.register(
+        CLAIM_ENCODER,
+        modality="claims",
+        loader=_load_claim_encoder,
+        warmup_input=lambda: ["Texto de aquecimento do modelo."]
+    )
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert normalized float32 vectors to the storage dtype
+
+    int8 uses one scale per row, so ``stored @ query * scale`` is the cosine.
+    """
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    peak = np.maximum(np.abs(vectors).max(axis=1), 1e-12)
+    quantized = np.round(vectors * (127 / peak)[:, None]).astype(np.int8)
+    return quantized, (peak / 127).astype(np.float32)
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    clusters: int,
+    iterations: int = 10,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Cluster normalized vectors by cosine similarity; returns normalized centroids
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign_clusters(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=clusters)
+        # Re-seed empty clusters with random vectors
+        empty = np.nonzero(counts == 0)[0]
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+def assign_clusters(vectors: np.ndarray, centroids: np.ndarray, chunk_rows: int = 8192) -> np.ndarray:
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk_rows):
+        block = np.asarray(vectors[start:start + chunk_rows], dtype=np.float32)
+        assignments[start:start + chunk_rows] = (block @ centroids.T).argmax(axis=1)
+    return assignments
+
+
+def default_ivf_lists(count: int) -> int:
+    # Exhaustive search only stays in the low milliseconds for a few thousand claims
+    return 0 if count < 5000 else int(4 * math.sqrt(count))
+
+
+def write_index(
+    output_dir: str,
+    count: int,
+    dim: int,
+    vector_batches: Iterable[np.ndarray],
+    claims: Iterable[Dict[str, Any]],
+    dtype: str = "float16",
+    ivf_lists: int = 0,
+    metadata: Optional[Dict[str, Any]] = None,
+    centroids: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """
+    Write normalized vectors and their claims to an index directory
+
+    Vectors are streamed in batches straight into a memory-mapped file, so the
+    corpus never has to fit in memory as float32. Passing ``centroids`` reuses
+    an existing IVF clustering instead of training a new one.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    staging = output_dir + ".building"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    embeddings = np.lib.format.open_memmap(
+        os.path.join(staging, EMBEDDINGS_FILE), mode="w+", dtype=dtype, shape=(count, dim)
+    )
+    scales = np.empty(count, dtype=np.float32) if dtype == "int8" else None
+    written = 0
+    for batch in vector_batches:
+        stored, batch_scales = quantize(normalize(batch), dtype)
+        embeddings[written:written + len(stored)] = stored
+        if scales is not None:
+            scales[written:written + len(stored)] = batch_scales
+        written += len(stored)
+    if written != count:
+        raise ValueError(f"Expected {count} vectors, got {written}")
+
+    lines = [json.dumps(claim, ensure_ascii=False).encode("utf-8") + b"\n" for claim in claims]
+    if len(lines) != count:
+        raise ValueError(f"Expected {count} claims, got {len(lines)}")
+
+    order = None
+    if centroids is not None:
+        ivf_lists = len(centroids)
+    if ivf_lists:
+        if centroids is None:
+            # Train on a sample, then store vectors grouped by their closest centroid
+            rng = np.random.default_rng(0)
+            sample_size = min(count, ivf_lists * 32)
+            sample = np.sort(rng.choice(count, sample_size, replace=False))
+            sample_vectors = _dequantize(embeddings[sample], None if scales is None else scales[sample])
+            centroids = spherical_kmeans(sample_vectors, ivf_lists)
+        assignments = assign_clusters(_Dequantized(embeddings, scales), centroids)
+        order = np.argsort(assignments, kind="stable")
+        list_offsets = np.searchsorted(assignments[order], np.arange(ivf_lists + 1)).astype(np.int64)
+        np.savez(os.path.join(staging, IVF_FILE), centroids=centroids, list_offsets=list_offsets)
+
+        ordered = np.lib.format.open_memmap(
+            os.path.join(staging, EMBEDDINGS_FILE + ".ordered"), mode="w+", dtype=dtype, shape=(count, dim)
+        )
+        for start in range(0, count, SEARCH_CHUNK_ROWS):
+            ordered[start:start + SEARCH_CHUNK_ROWS] = embeddings[order[start:start + SEARCH_CHUNK_ROWS]]
+        ordered.flush()
+        del embeddings, ordered
+        os.replace(os.path.join(staging, EMBEDDINGS_FILE + ".ordered"), os.path.join(staging, EMBEDDINGS_FILE))
+        if scales is not None:
+            scales = scales[order]
+    else:
+        embeddings.flush()
+        del embeddings
+
+    if scales is not None:
+        np.save(os.path.join(staging, SCALES_FILE), scales)
+
+    # Claims are read back by byte offset, so they are never all loaded at once
+    offsets = np.empty(count + 1, dtype=np.int64)
+    with open(os.path.join(staging, CLAIMS_FILE), "wb") as claims_file:
+        position = 0
+        for i, index in enumerate(order if order is not None else range(count)):
+            offsets[i] = position
+            claims_file.write(lines[index])
+            position += len(lines[index])
+        offsets[count] = position
+    np.save(os.path.join(staging, OFFSETS_FILE), offsets)
+
+    meta = dict(metadata or {})
+    meta.update({"count": count, "dim": dim, "dtype": dtype, "ivf_lists": ivf_lists, "built_at": time.time()})
+    with open(os.path.join(staging, META_FILE), "w") as meta_file:
+        json.dump(meta, meta_file)
+
+    # Keep the previous index until the new one is in place
+    previous = output_dir + ".previous"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(output_dir):
+        os.replace(output_dir, previous)
+    os.replace(staging, output_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+    return meta
+
+
+def _dequantize(rows: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    rows = np.asarray(rows, dtype=np.float32)
+    return rows if scales is None else rows * scales[:, None]
+
+
+class _Dequantized:
+    """
+    Sliceable float32 view over stored rows, for chunked cluster assignment
+    """
+
+    def __init__(self, embeddings: np.ndarray, scales: Optional[np.ndarray]):
+        self.embeddings = embeddings
+        self.scales = scales
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    def __getitem__(self, item: slice) -> np.ndarray:
+        return _dequantize(self.embeddings[item], None if self.scales is None else self.scales[item])
+
+
+def build_index(
+    corpus_path: str,
+    output_dir: str,
+    embed: Callable[[List[str]], np.ndarray],
+    dtype: str = "float16",
+    ivf_lists: Optional[int] = None,
+    batch_size: int = 64
+) -> Dict[str, Any]:
+    """
+    Embed a corpus and write its index; ``ivf_lists=None`` picks a size from the corpus
+    """
+    claims = list(read_corpus(corpus_path))
+    if not claims:
+        raise ValueError(f"No claims found in {corpus_path}")
+    first = embed([claims[0]["claim"]])
+
+    def batches() -> Iterator[np.ndarray]:
+        for start in range(0, len(claims), batch_size):
+            yield embed([claim["claim"] for claim in claims[start:start + batch_size]])
+
+    if ivf_lists is None:
+        ivf_lists = default_ivf_lists(len(claims))
+    return write_index(
+        output_dir, len(claims), first.shape[1], batches(), claims, dtype, ivf_lists,
+        {"corpus": os.path.abspath(corpus_path), "model": settings.CLAIM_MODEL_NAME}
+    )
+
+
+class ClaimIndex:
+    """
+    Memory-mapped claim embeddings with exhaustive or IVF top-k cosine search
+
+    Claims added after the index was built go to an in-memory delta segment
+    that is searched exhaustively next to the main matrix. Readers only see
+    rows that were fully written, so appends never block or slow queries;
+    ``compact`` later merges the delta into a new main matrix.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.meta: Dict[str, Any] = {"count": 0, "dim": None, "dtype": "float16", "ivf_lists": 0}
+        self.embeddings = None
+        self.scales = None
+        self.offsets = None
+        self.centroids = None
+        self.list_offsets = None
+        self._claims_fd = None
+        if os.path.exists(os.path.join(directory, META_FILE)):
+            self._open_main(directory)
+
+        self._delta = np.empty((0, self.meta["dim"] or 0), dtype=np.float32)
+        self._delta_count = 0
+        self._delta_claims: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.checkpoint: Optional[Dict[str, Any]] = self.meta.get("checkpoint")
+        # Delta rows already merged into this index by the compaction that created it
+        self._compacted_delta = 0
+        self._load_delta()
+
+    def _open_main(self, directory: str) -> None:
+        with open(os.path.join(directory, META_FILE)) as meta_file:
+            self.meta = json.load(meta_file)
+        self.embeddings = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode="r")
+        scales_path = os.path.join(directory, SCALES_FILE)
+        self.scales = np.load(scales_path) if os.path.exists(scales_path) else None
+        self.offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode="r")
+        if self.meta.get("ivf_lists"):
+            ivf = np.load(os.path.join(directory, IVF_FILE))
+            self.centroids = ivf["centroids"]
+            self.list_offsets = ivf["list_offsets"]
+        self._claims_fd = os.open(os.path.join(directory, CLAIMS_FILE), os.O_RDONLY)
+
+    @property
+    def main_count(self) -> int:
+        return 0 if self.embeddings is None else len(self.embeddings)
+
+    @property
+    def delta_count(self) -> int:
+        return self._delta_count
+
+    def __len__(self) -> int:
+        return self.main_count + self._delta_count
+
+    def close(self) -> None:
+        if self._claims_fd is not None:
+            os.close(self._claims_fd)
+            self._claims_fd = None
+
+    def __del__(self):
+        self.close()
+
+    def claim(self, position: int) -> Dict[str, Any]:
+        if position >= self.main_count:
+            return dict(self._delta_claims[position - self.main_count])
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return json.loads(os.pread(self._claims_fd, end - start, start))
+
+    def append(
+        self,
+        vectors: np.ndarray,
+        claims: List[Dict[str, Any]],
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Add claims to the delta segment; ``checkpoint`` records how far the source was read
+        """
+        vectors = normalize(vectors)
+        with self._lock:
+            count = self._delta_count
+            if count + len(vectors) > len(self._delta):
+                # Grow into a new buffer; searches still holding the old one are unaffected
+                capacity = max(1024, 2 * (count + len(vectors)))
+                grown = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+                if count:
+                    grown[:count] = self._delta[:count]
+                self._delta = grown
+            self._delta[count:count + len(vectors)] = vectors
+            self._delta_claims.extend(claims)
+            # Publish the rows only once they are written
+            self._delta_count = count + len(vectors)
+            if checkpoint is not None:
+                self.checkpoint = checkpoint
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> Iterator[Tuple[int, int]]:
+        """
+        Row ranges to scan: the closest IVF lists, or the whole matrix in chunks
+        """
+        if self.centroids is None:
+            for start in range(0, self.main_count, SEARCH_CHUNK_ROWS):
+                yield start, min(start + SEARCH_CHUNK_ROWS, self.main_count)
+            return
+        nprobe = min(nprobe, len(self.centroids))
+        closest = np.argpartition(self.centroids @ query, -nprobe)[-nprobe:]
+        for cluster in np.sort(closest):
+            start, end = int(self.list_offsets[cluster]), int(self.list_offsets[cluster + 1])
+            if end > start:
+                yield start, end
+
+    def search(self, query: np.ndarray, k: int = 5, nprobe: int = 8) -> List[Tuple[int, float]]:
+        """
+        Return ``(position, cosine similarity)`` of the ``k`` closest claims, best first
+        """
+        query = normalize(query).reshape(-1)
+        positions = []
+        similarities = []
+
+        def keep(scores: np.ndarray, offset: int) -> None:
+            top = np.argpartition(scores, -k)[-k:] if len(scores) > k else np.arange(len(scores))
+            positions.append(top + offset)
+            similarities.append(scores[top])
+
+        for start, end in self._candidates(query, nprobe):
+            scores = np.asarray(self.embeddings[start:end], dtype=np.float32) @ query
+            if self.scales is not None:
+                scores *= self.scales[start:end]
+            keep(scores, start)
+
+        # Count before buffer: a buffer read later always holds the counted rows
+        delta_count = self._delta_count
+        delta = self._delta
+        if delta_count:
+            keep(delta[:delta_count] @ query, self.main_count)
+        if not positions:
+            return []
+
+        positions = np.concatenate(positions)
+        similarities = np.concatenate(similarities)
+        best = np.argsort(-similarities, kind="stable")[:k]
+        return [(int(positions[i]), float(similarities[i])) for i in best]
+
+    def _iter_main_rows(self) -> Iterator[np.ndarray]:
+        for start in range(0, self.main_count, SEARCH_CHUNK_ROWS):
+            end = min(start + SEARCH_CHUNK_ROWS, self.main_count)
+            yield _dequantize(self.embeddings[start:end], None if self.scales is None else self.scales[start:end])
+
+    def _iter_main_claims(self) -> Iterator[Dict[str, Any]]:
+        if self._claims_fd is None:
+            return
+        with open(os.path.join(self.directory, CLAIMS_FILE), encoding="utf-8") as claims_file:
+            for line in claims_file:
+                yield json.loads(line)
+
+    def compact(self) -> "ClaimIndex":
+        """
+        Write main and delta rows as a new main matrix and return the index opened on it
+
+        Runs without holding the lock: rows appended meanwhile are carried over
+        to the new index by ``carry_over``.
+        """
+        with self._lock:
+            delta_count = self._delta_count
+            delta = self._delta
+            delta_claims = self._delta_claims[:delta_count]
+            checkpoint = self.checkpoint
+        count = self.main_count + delta_count
+        dim = self.meta["dim"] or delta.shape[1]
+
+        def batches() -> Iterator[np.ndarray]:
+            yield from self._iter_main_rows()
+            for start in range(0, delta_count, SEARCH_CHUNK_ROWS):
+                yield delta[start:min(start + SEARCH_CHUNK_ROWS, delta_count)]
+
+        def claims() -> Iterator[Dict[str, Any]]:
+            yield from self._iter_main_claims()
+            yield from delta_claims
+
+        # Keep the trained clustering; only small indexes grow into IVF here
+        centroids = self.centroids
+        ivf_lists = 0 if centroids is not None else default_ivf_lists(count)
+        metadata = {key: value for key, value in self.meta.items() if key not in ("count", "dim", "ivf_lists")}
+        metadata["checkpoint"] = checkpoint
+        write_index(
+            self.directory, count, dim, batches(), claims(),
+            self.meta.get("dtype", "float16"), ivf_lists, metadata, centroids
+        )
+        compacted = ClaimIndex(self.directory)
+        compacted._compacted_delta = delta_count
+        return compacted
+
+    def carry_over(self, compacted: "ClaimIndex") -> None:
+        """
+        Append the rows added since ``compacted`` was built; call before swapping it in
+        """
+        with self._lock:
+            start = compacted._compacted_delta
+            if self._delta_count > start:
+                compacted.append(
+                    self._delta[start:self._delta_count],
+                    self._delta_claims[start:self._delta_count],
+                    self.checkpoint
+                )
+            elif self.checkpoint is not None:
+                compacted.checkpoint = self.checkpoint
+
+    def save_delta(self) -> None:
+        """
+        Snapshot the delta segment and checkpoint next to the main matrix
+        """
+        with self._lock:
+            delta_count = self._delta_count
+            delta = self._delta[:delta_count].copy()
+            claims = self._delta_claims[:delta_count]
+            checkpoint = self.checkpoint
+        os.makedirs(self.directory, exist_ok=True)
+
+        temp_path = os.path.join(self.directory, DELTA_FILE + ".tmp")
+        with open(temp_path, "wb") as delta_file:
+            np.savez(delta_file, vectors=delta)
+        with open(os.path.join(self.directory, DELTA_CLAIMS_FILE + ".tmp"), "w", encoding="utf-8") as claims_file:
+            json.dump({"checkpoint": checkpoint, "claims": claims}, claims_file, ensure_ascii=False)
+        # Vectors first: a crash in between leaves the older claims file, which is detected on load
+        os.replace(temp_path, os.path.join(self.directory, DELTA_FILE))
+        os.replace(
+            os.path.join(self.directory, DELTA_CLAIMS_FILE + ".tmp"),
+            os.path.join(self.directory, DELTA_CLAIMS_FILE)
+        )
+
+    def _load_delta(self) -> None:
+        delta_path = os.path.join(self.directory, DELTA_FILE)
+        claims_path = os.path.join(self.directory, DELTA_CLAIMS_FILE)
+        if not (os.path.exists(delta_path) and os.path.exists(claims_path)):
+            return
+        vectors = np.load(delta_path)["vectors"]
+        with open(claims_path, encoding="utf-8") as claims_file:
+            snapshot = json.load(claims_file)
+        if len(vectors) != len(snapshot["claims"]):
+            # Torn snapshot: fall back to the main matrix and its checkpoint
+            return
+        if len(vectors):
+            self.append(vectors, snapshot["claims"])
+        self.checkpoint = snapshot["checkpoint"]
+
+
+class ClaimMatcher:
+    """
+    Finds already fact-checked claims similar to incoming texts
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry = model_registry,
+        index_path: str = settings.CLAIM_INDEX_PATH,
+        top_k: int = 5,
+        nprobe: int = 8
+    ):
+        self.registry = registry
+        self.index_path = index_path
+        self.top_k = top_k
+        self.nprobe = nprobe
+        self.index: Optional[ClaimIndex] = None
+        self._lock = threading.Lock()
+        # Serializes appends with the swap to a compacted index
+        self._write_lock = threading.Lock()
+        self._queries = 0
+        self._search_seconds = 0.0
+        self._compactions = 0
+        self._last_compaction_seconds: Optional[float] = None
+
+    @property
+    def available(self) -> bool:
+        return self.index is not None
+
+    def load(self) -> bool:
+        """
+        Open the index and its delta snapshot; returns whether it holds claims to match
+
+        Without a built corpus the index is only opened (empty) when the
+        incremental indexer will fill it; ``available`` tells it apart from
+        claim matching being off.
+        """
+        if not settings.CLAIM_MATCHING_ENABLED:
+            return False
+        if not settings.CLAIM_INDEXER_ENABLED and not os.path.exists(os.path.join(self.index_path, META_FILE)):
+            return False
+        self.index = ClaimIndex(self.index_path)
+        return len(self.index) > 0
+
+    def add(
+        self,
+        vectors: Optional[np.ndarray],
+        claims: List[Dict[str, Any]],
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Append claims to the current index, or only advance its checkpoint when there are none
+        """
+        with self._write_lock:
+            if claims:
+                self.index.append(vectors, claims, checkpoint)
+            elif checkpoint is not None:
+                self.index.checkpoint = checkpoint
+
+    def compact(self) -> None:
+        """
+        Merge the delta segment into a new main matrix and swap it in; blocking
+
+        Queries keep using the current index until the swap.
+        """
+        start = time.perf_counter()
+        current = self.index
+        compacted = current.compact()
+        with self._write_lock:
+            current.carry_over(compacted)
+            self.index = compacted
+        self._compactions += 1
+        self._last_compaction_seconds = time.perf_counter() - start
+
+    def snapshot(self) -> None:
+        with self._write_lock:
+            index = self.index
+        index.save_delta()
+
+    def snapshot_version(self) -> Tuple[int, int]:
+        """
+        Modification times of the main matrix and of the delta snapshot on disk (0 if missing)
+        """
+        version = []
+        for name in (META_FILE, DELTA_CLAIMS_FILE):
+            try:
+                version.append(os.stat(os.path.join(self.index_path, name)).st_mtime_ns)
+            except FileNotFoundError:
+                version.append(0)
+        return version[0], version[1]
+
+    def reload(self) -> None:
+        """
+        Reopen the index from disk, as snapshotted by the process that writes it; blocking
+
+        Queries keep using the current index until the swap.
+        """
+        index = ClaimIndex(self.index_path)
+        with self._write_lock:
+            self.index = index
+
+    def match_many(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Top-k corpus matches for every text; blocking, runs in an executor thread
+        """
+        if self.index is None or not len(self.index):
+            return [[] for _ in texts]
+
+        embeddings = self.registry.get(CLAIM_ENCODER)(texts)
+        index = self.index
+        start = time.perf_counter()
+        results = []
+        for embedding in embeddings:
+            matches = []
+            for position, similarity in index.search(embedding, self.top_k, self.nprobe):
+                claim = index.claim(position)
+                claim["label"] = verdict_label(claim.get("verdict"))
+                claim["similarity"] = similarity
+                matches.append(claim)
+            results.append(matches)
+
+        with self._lock:
+            self._queries += len(texts)
+            self._search_seconds += time.perf_counter() - start
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        if self.index is None:
+            return {"available": False}
+        with self._lock:
+            return {
+                "available": True,
+                "size": len(self.index),
+                "delta_size": self.index.delta_count,
+                "dtype": self.index.meta["dtype"],
+                "ivf_lists": self.index.meta["ivf_lists"],
+                "queries": self._queries,
+                "mean_search_ms": 1000 * self._search_seconds / self._queries if self._queries else 0.0,
+                "compactions": self._compactions,
+                "last_compaction_seconds": self._last_compaction_seconds
+            }
+
+
+claim_matcher = ClaimMatcher(
+    top_k=settings.CLAIM_TOP_K,
+    nprobe=settings.CLAIM_IVF_NPROBE
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the claim-matching index")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--corpus", required=True, help="JSONL or Parquet file of fact-checked claims")
+    parser.add_argument("--output", default=settings.CLAIM_INDEX_PATH)
+    parser.add_argument("--dtype", default="float16", choices=DTYPES)
+    parser.add_argument("--ivf-lists", type=int, default=None, help="0 disables IVF; default depends on corpus size")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    meta = build_index(
+        args.corpus, args.output, _load_claim_encoder(), args.dtype, args.ivf_lists, args.batch_size
+    )
+    print(json.dumps(meta, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,111 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Union
 import numpy as np
 from app.core.config import settings
+from app.core.metrics import timed_stage
+from app.services.scoring import CLASSES, CONTENT_TYPES, ScoringModel, feature_matrix, load_scoring_model
 
 class ContentClassifier:
-    def __init__(self):
+    def __init__(self, model: Optional[ScoringModel] = None):
         self.confidence_threshold = settings.CONFIDENCE_THRESHOLD
         self.labels = settings.CLASSIFICATION_LABELS
+        self.model = model or load_scoring_model()
     
     async def classify(self, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Classify content based on analysis results
         """
         content_type = analysis_result["type"]
-        
-        if content_type == "text":
-            return await self._classify_text(analysis_result)
-        elif content_type == "image":
-            return await self._classify_image(analysis_result)
-        elif content_type == "video":
-            return await self._classify_video(analysis_result)
-        else:
+        if content_type not in CONTENT_TYPES:
             raise ValueError(f"Unsupported content type: {content_type}")
-    
-    async def _classify_text(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Classify text content based on sentiment, entities, and topics
-        """
-        # TODO: Implement more sophisticated text classification
-        # For now, using a simple rule-based approach
-        
-        sentiment = analysis["sentiment"]
-        entities = analysis["entities"]
-        topics = analysis["topics"]
         
-        # Calculate confidence score (placeholder implementation)
-        confidence = 0.8
-        
-        # Determine classification based on sentiment and content
-        if confidence >= self.confidence_threshold:
-            label = self.labels["VERIFIED"]
-        elif confidence >= 0.5:
-            label = self.labels["SUSPICIOUS"]
-        else:
-            label = self.labels["FAKE"]
-        
-        return {
-            "label": label,
-            "confidence": confidence,
-            "explanation": self._generate_explanation(label, analysis),
-            "sources": self._get_sources(analysis)
-        }
+        with timed_stage("classify", content_type):
+            result = self.classify_many([analysis_result])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
     
-    async def _classify_image(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Classify image content based on visual analysis
+    def classify_many(self, analysis_results: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception]]:
         """
-        # TODO: Implement image classification
-        # For now, using a placeholder implementation
+        Classify many analysis results with one vectorized scoring pass
         
-        confidence = 0.7
-        label = self.labels["SUSPICIOUS"]
+        Texts closely matching fact-checked claims take the verdict of those
+        claims; everything else is scored by the model. Items that cannot be
+        classified get their exception in place of a result.
+        """
+        results: List[Union[Dict[str, Any], Exception]] = [None] * len(analysis_results)
+        scored = []
+        for i, analysis in enumerate(analysis_results):
+            if analysis.get("type") not in CONTENT_TYPES:
+                results[i] = ValueError(f"Unsupported content type: {analysis.get('type')}")
+                continue
+            # Close matches with already fact-checked claims decide the verdict
+            claim_matches = [
+                match for match in analysis.get("claim_matches") or []
+                if match["similarity"] >= settings.CLAIM_MATCH_THRESHOLD
+            ]
+            if claim_matches:
+                results[i] = self._classify_from_claims(claim_matches)
+            else:
+                scored.append(i)
+        if not scored:
+            return results
         
-        return {
-            "label": label,
-            "confidence": confidence,
-            "explanation": "Image analysis pending implementation",
-            "sources": []
-        }
+        analyses = [analysis_results[i] for i in scored]
+        try:
+            scored_results: List[Union[Dict[str, Any], Exception]] = self._score(analyses)
+        except Exception:
+            # Score one by one so a malformed item only fails itself
+            scored_results = []
+            for analysis in analyses:
+                try:
+                    scored_results.extend(self._score([analysis]))
+                except Exception as e:
+                    scored_results.append(e)
+        for i, result in zip(scored, scored_results):
+            results[i] = result
+        return results
     
-    async def _classify_video(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+    def _score(self, analyses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        matrix, content_types = feature_matrix(analyses)
+        classes, confidences = self.model.predict(matrix, content_types)
+        results = []
+        for analysis, class_index, confidence in zip(analyses, classes.tolist(), confidences.tolist()):
+            label = self.labels[CLASSES[class_index]]
+            results.append({
+                "label": label,
+                "confidence": confidence,
+                "explanation": self._generate_explanation(label, analysis),
+                "sources": self._get_sources(analysis)
+            })
+        return results
+    
+    def _classify_from_claims(self, claim_matches: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Classify video content based on visual and temporal analysis
+        Similarity-weighted vote of the verdicts of matching fact-checked claims
         """
-        # TODO: Implement video classification
-        # For now, using a placeholder implementation
+        votes: Dict[str, float] = {}
+        for match in claim_matches:
+            votes[match["label"]] = votes.get(match["label"], 0.0) + match["similarity"]
+        label = max(votes, key=votes.get)
+        
+        # Agreement between matches scaled by how close the best one is
+        supporting = [match for match in claim_matches if match["label"] == label]
+        best = max(supporting, key=lambda match: match["similarity"])
+        confidence = best["similarity"] * votes[label] / sum(votes.values())
         
-        confidence = 0.6
-        label = self.labels["SUSPICIOUS"]
+        sources = []
+        for match in sorted(supporting, key=lambda match: match["similarity"], reverse=True):
+            if match.get("url") and match["url"] not in sources:
+                sources.append(match["url"])
         
         return {
             "label": label,
             "confidence": confidence,
-            "explanation": "Video analysis pending implementation",
-            "sources": []
+            "explanation": (
+                f"O conteúdo corresponde a uma alegação já verificada como \"{best.get('verdict') or label}\": "
+                f"\"{best['claim']}\" (similaridade {best['similarity']:.2f})."
+            ),
+            "sources": sources
         }
     
     def _generate_explanation(self, label: str, analysis: Dict[str, Any]) -> str:
@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from app.core.config import settings
+
+
+class ExecutorSaturatedError(Exception):
+    """
+    Raised when the inference queue is full and a request must be rejected
+    """
+
+    def __init__(self, modality: str, retry_after: int):
+        super().__init__(f"Inference queue is full for {modality} content, retry later")
+        self.modality = modality
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Runs blocking model inference off the event loop with admission control
+
+    A thread pool serves torch/cv2/PIL calls, which release the GIL; an optional
+    process pool serves pure-Python work. ``admit`` bounds the number of requests
+    waiting for inference and ``run`` bounds how many run at once per modality.
+    """
+
+    def __init__(
+        self,
+        thread_workers: int,
+        process_workers: int = 0,
+        max_queue: int = 64,
+        concurrency: Optional[Dict[str, int]] = None,
+        retry_after: int = 5
+    ):
+        self.thread_workers = max(1, thread_workers)
+        self.process_workers = max(0, process_workers)
+        self.max_queue = max_queue
+        self.concurrency = concurrency or {}
+        self.retry_after = retry_after
+
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._pending: Dict[str, int] = {}
+        self._running: Dict[str, int] = {}
+        self._rejected: Dict[str, int] = {}
+
+    @property
+    def pending(self) -> int:
+        return sum(self._pending.values())
+
+    @contextmanager
+    def admit(self, modality: str) -> Iterator[None]:
+        """
+        Reserve a queue slot for one request or raise ExecutorSaturatedError
+        """
+        if self.max_queue and self.pending >= self.max_queue:
+            self._rejected[modality] = self._rejected.get(modality, 0) + 1
+            raise ExecutorSaturatedError(modality, self.retry_after)
+
+        self._pending[modality] = self._pending.get(modality, 0) + 1
+        try:
+            yield
+        finally:
+            self._pending[modality] -= 1
+
+    async def run(
+        self,
+        modality: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        use_process: bool = False
+    ) -> Any:
+        """
+        Run a blocking function in a worker pool under the modality concurrency limit
+
+        ``use_process`` sends a picklable module-level function to the process
+        pool, or to the thread pool when no process workers are configured.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool(use_process)
+
+        async with self._semaphore(modality, loop):
+            self._running[modality] = self._running.get(modality, 0) + 1
+            call = functools.partial(fn, *args)
+            if pool is self._thread_pool:
+                # Stages timed in the worker thread count towards the calling request
+                call = functools.partial(contextvars.copy_context().run, call)
+            try:
+                return await loop.run_in_executor(pool, call)
+            finally:
+                self._running[modality] -= 1
+
+    def _get_pool(self, use_process: bool) -> Executor:
+        if use_process and self.process_workers:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+            return self._process_pool
+
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.thread_workers,
+                thread_name_prefix="inference"
+            )
+        return self._thread_pool
+
+    def _semaphore(self, modality: str, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        if self._loop is not loop:
+            # Semaphores are bound to the loop they are first used on
+            self._loop = loop
+            self._semaphores = {}
+        if modality not in self._semaphores:
+            limit = self.concurrency.get(modality) or self.thread_workers
+            self._semaphores[modality] = asyncio.Semaphore(limit)
+        return self._semaphores[modality]
+
+    def shutdown(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report queued, running and rejected requests per modality
+        """
+        return {
+            "thread_workers": self.thread_workers,
+            "process_workers": self.process_workers,
+            "max_queue": self.max_queue,
+            "pending": dict(self._pending),
+            "running": dict(self._running),
+            "rejected": dict(self._rejected),
+            "concurrency": dict(self.concurrency)
+        }
+
+
+inference_executor = InferenceExecutor(
+    thread_workers=settings.INFERENCE_THREAD_WORKERS or os.cpu_count() or 1,
+    process_workers=settings.INFERENCE_PROCESS_WORKERS,
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    concurrency={
+        "text": settings.INFERENCE_CONCURRENCY_TEXT,
+        "image": settings.INFERENCE_CONCURRENCY_IMAGE,
+        "video": settings.INFERENCE_CONCURRENCY_VIDEO
+    },
+    retry_after=settings.INFERENCE_RETRY_AFTER_SECONDS
+)
@@ -0,0 +1,284 @@
+import io
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+ImageSource = Union[bytes, str, os.PathLike]
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+# Resize with Image.reduce first when shrinking by more than this factor, then resample the rest
+REDUCING_GAP = 2.0
+# EXIF tags kept in the image metadata
+EXIF_TAGS = {
+    0x010F: "make",
+    0x0110: "model",
+    0x0112: "orientation",
+    0x0131: "software",
+    0x0132: "datetime"
+}
+GPS_IFD = 0x8825
+
+
+class ImageSpec:
+    """
+    Input geometry and normalization of an image model, read from its Hugging Face image processor
+
+    Images are resized so their shortest edge is ``resize_shortest`` (or
+    straight to ``resize_to``), then center cropped to ``crop``.
+    """
+
+    def __init__(
+        self,
+        crop: Tuple[int, int],
+        resize_shortest: Optional[int] = None,
+        resize_to: Optional[Tuple[int, int]] = None,
+        mean: Sequence[float] = IMAGENET_MEAN,
+        std: Sequence[float] = IMAGENET_STD,
+        rescale_factor: float = 1 / 255,
+        resample: int = 2
+    ):
+        # (width, height), as PIL sizes
+        self.crop = crop
+        self.resize_shortest = resize_shortest
+        self.resize_to = resize_to
+        self.resample = resample
+        # Normalization folded into one multiply-add per channel
+        std = np.asarray(std, dtype=np.float32)
+        self.scale = (rescale_factor / std).reshape(3, 1, 1).astype(np.float32)
+        self.offset = (-np.asarray(mean, dtype=np.float32) / std).reshape(3, 1, 1).astype(np.float32)
+
+    @classmethod
+    def from_processor(cls, processor: Any) -> Optional["ImageSpec"]:
+        """
+        Spec of a ConvNext/ViT-style image processor, or None when its geometry is not understood
+        """
+        size = getattr(processor, "size", None)
+        if not isinstance(size, dict):
+            return None
+        kwargs = {
+            "mean": getattr(processor, "image_mean", None) or IMAGENET_MEAN,
+            "std": getattr(processor, "image_std", None) or IMAGENET_STD,
+            "rescale_factor": getattr(processor, "rescale_factor", 1 / 255),
+            "resample": int(getattr(processor, "resample", 2))
+        }
+        crop_size = getattr(processor, "crop_size", None) if getattr(processor, "do_center_crop", False) else None
+        if "shortest_edge" in size:
+            edge = size["shortest_edge"]
+            crop_pct = getattr(processor, "crop_pct", None)
+            if crop_pct and edge < 384:
+                # ConvNextImageProcessor: resize to edge / crop_pct, then crop to edge
+                return cls((edge, edge), resize_shortest=int(edge / crop_pct), **kwargs)
+            if crop_pct:
+                return cls((edge, edge), resize_to=(edge, edge), **kwargs)
+            if crop_size:
+                return cls((crop_size["width"], crop_size["height"]), resize_shortest=edge, **kwargs)
+            return None
+        if "height" in size and "width" in size:
+            resize_to = (size["width"], size["height"])
+            crop = (crop_size["width"], crop_size["height"]) if crop_size else resize_to
+            return cls(crop, resize_to=resize_to, **kwargs)
+        return None
+
+    def resized_size(self, size: Tuple[int, int]) -> Tuple[int, int]:
+        """
+        Size an image of ``size`` is resized to before the center crop
+        """
+        if self.resize_to is not None:
+            return self.resize_to
+        width, height = size
+        if width <= height:
+            return self.resize_shortest, max(1, round(height * self.resize_shortest / width))
+        return max(1, round(width * self.resize_shortest / height)), self.resize_shortest
+
+
+def _open(source: ImageSource) -> "Image.Image":
+    from PIL import Image
+
+    return Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def _metadata(image: "Image.Image") -> Dict[str, Any]:
+    metadata: Dict[str, Any] = {
+        "format": image.format,
+        "size": image.size,
+        "mode": image.mode
+    }
+    exif = image.getexif()
+    if exif:
+        # Values are JSON-safe: numbers stay numbers, everything else becomes text
+        metadata["exif"] = {
+            name: exif[tag] if isinstance(exif[tag], (int, float)) else str(exif[tag])
+            for tag, name in EXIF_TAGS.items() if tag in exif
+        }
+        metadata["exif"]["has_gps"] = GPS_IFD in exif
+    return metadata
+
+
+def read_metadata(source: ImageSource) -> Dict[str, Any]:
+    """
+    Format, size, mode and EXIF of an image, read from its header without decoding pixels
+    """
+    with _open(source) as image:
+        return _metadata(image)
+
+
+def decode(source: ImageSource, spec: Optional[ImageSpec]) -> Tuple["Image.Image", Dict[str, Any]]:
+    """
+    Decode an image at the model input resolution; returns the RGB image and its original metadata
+
+    JPEGs are decoded with ``draft``, which lets libjpeg scale by 1/2, 1/4 or
+    1/8 while decoding, so a 12 MP photo is never materialized at full size.
+    The remaining resize goes through ``Image.reduce`` for large factors.
+    Without a spec the image is decoded at full size.
+    """
+    image = _open(source)
+    metadata = _metadata(image)
+    if spec is None:
+        image.load()
+        return image, metadata
+
+    if image.format == "JPEG":
+        # The draft scale keeps at least the resized size on both axes
+        image.draft("RGB", spec.resized_size(image.size))
+    image.load()
+    return prepare(image, spec), metadata
+
+
+def center_crop(image: "Image.Image", crop: Tuple[int, int]) -> "Image.Image":
+    width, height = image.size
+    if (width, height) == crop:
+        return image
+    left = (width - crop[0]) // 2
+    top = (height - crop[1]) // 2
+    return image.crop((left, top, left + crop[0], top + crop[1]))
+
+
+def prepare(image: "Image.Image", spec: ImageSpec) -> "Image.Image":
+    """
+    Resize and crop an already decoded image (e.g. a video frame) to the model input
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    target = spec.resized_size(image.size)
+    if image.size != target:
+        image = image.resize(target, spec.resample, reducing_gap=REDUCING_GAP)
+    return center_crop(image, spec.crop)
+
+
+class ImagePreprocessor:
+    """
+    Turns decoded images into normalized float32 batches in reusable buffers
+
+    Each executor thread keeps one (batch, 3, height, width) buffer, grown
+    to the largest batch it has seen, so steady-state batches allocate no
+    tensor memory; the model reads it without a copy through
+    ``torch.from_numpy``.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self._images = 0
+        self._batches = 0
+        self._source_pixels = 0
+        self._decode_seconds = 0.0
+
+    def buffer(self, batch_size: int, spec: ImageSpec) -> np.ndarray:
+        shape = (batch_size, 3, spec.crop[1], spec.crop[0])
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.shape[0] < batch_size or buffer.shape[1:] != shape[1:]:
+            buffer = np.empty(shape, dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer[:batch_size]
+
+    def to_batch(self, images: Sequence["Image.Image"], spec: ImageSpec) -> np.ndarray:
+        """
+        Normalize prepared images into the thread's buffer; valid until the thread's next batch
+        """
+        batch = self.buffer(len(images), spec)
+        for i, image in enumerate(images):
+            # HWC uint8 into CHW float32 in place
+            batch[i] = np.asarray(image, dtype=np.uint8).transpose(2, 0, 1)
+        batch *= spec.scale
+        batch += spec.offset
+        with self._lock:
+            self._batches += 1
+        return batch
+
+    def decode_many(
+        self,
+        sources: Sequence[ImageSource],
+        spec: Optional[ImageSpec]
+    ) -> List[Union[Tuple["Image.Image", Dict[str, Any]], Exception]]:
+        """
+        Decode many images; an image that cannot be decoded yields its exception in place
+        """
+        results: List[Union[Tuple["Image.Image", Dict[str, Any]], Exception]] = []
+        start = time.perf_counter()
+        source_pixels = 0
+        for source in sources:
+            try:
+                image, metadata = decode(source, spec)
+            except Exception as e:
+                results.append(e)
+                continue
+            results.append((image, metadata))
+            source_pixels += metadata["size"][0] * metadata["size"][1]
+        with self._lock:
+            self._images += len(sources)
+            self._source_pixels += source_pixels
+            self._decode_seconds += time.perf_counter() - start
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "images": self._images,
+                "batches": self._batches,
+                "source_megapixels": self._source_pixels / 1e6,
+                "decode_seconds": self._decode_seconds,
+                "mean_decode_ms": 1000 * self._decode_seconds / self._images if self._images else 0.0
+            }
+
+
+def image_spec(image_pipeline: Any) -> Optional[ImageSpec]:
+    """
+    Spec of a pipeline's image processor; None for callables that are not Hugging Face pipelines
+    """
+    processor = getattr(image_pipeline, "image_processor", None)
+    if processor is None or not hasattr(image_pipeline, "model"):
+        return None
+    return ImageSpec.from_processor(processor)
+
+
+def classify_batch(image_pipeline: Any, pixel_values: np.ndarray, top_k: int = 5) -> List[List[Dict[str, Any]]]:
+    """
+    Run a normalized batch through the pipeline's model in one forward pass
+
+    Returns the image-classification pipeline output for each image: the
+    ``top_k`` labels with their scores.
+    """
+    import torch
+
+    model = image_pipeline.model
+    with torch.inference_mode():
+        logits = model(pixel_values=torch.from_numpy(pixel_values)).logits
+
+    # Same activation the image-classification pipeline applies
+    config = model.config
+    if config.problem_type == "multi_label_classification" or config.num_labels == 1:
+        probabilities = logits.sigmoid()
+    else:
+        probabilities = logits.softmax(-1)
+    scores, indices = probabilities.topk(min(top_k, probabilities.shape[-1]), dim=-1)
+    return [
+        [{"label": config.id2label[j], "score": score} for score, j in zip(row_scores, row_indices)]
+        for row_scores, row_indices in zip(scores.tolist(), indices.tolist())
+    ]
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Union
+from app.core.config import settings
+from app.models.database import VerificationUpdate
+from app.services.verification import VerificationService
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """
+    Raised when the verification job queue cannot accept more jobs
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("Verification job queue is full, retry later")
+        self.retry_after = retry_after
+
+
+class VerificationJob:
+    def __init__(
+        self,
+        verification_id: str,
+        content: Union[str, bytes],
+        content_type: str,
+        content_hash: Optional[str] = None,
+        perceptual_hash: Optional[str] = None
+    ):
+        self.verification_id = verification_id
+        self.content = content
+        self.content_type = content_type
+        self.content_hash = content_hash
+        self.perceptual_hash = perceptual_hash
+
+
+class VerificationJobQueue:
+    """
+    In-process queue drained by a pool of background verification workers
+
+    Jobs are records already inserted as "pending"; workers move them to
+    "processing" and then to "completed" or "failed" through the repository.
+    Coroutines in this process can wait for a job to finish with ``wait``.
+    """
+
+    def __init__(
+        self,
+        service: VerificationService,
+        workers: int = 4,
+        max_size: int = 1000,
+        retry_after: int = 5
+    ):
+        self.service = service
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self.retry_after = retry_after
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._events: Dict[str, asyncio.Event] = {}
+
+        self._processed = 0
+        self._failed = 0
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"verification-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Stop the workers; jobs still queued stay "pending" in the database
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for event in self._events.values():
+            event.set()
+        self._events = {}
+
+    async def enqueue(
+        self,
+        verification_id: str,
+        content: Union[str, bytes],
+        content_type: str,
+        content_hash: Optional[str] = None,
+        perceptual_hash: Optional[str] = None
+    ) -> None:
+        """
+        Queue a pending verification for background processing
+        """
+        if self._queue is None:
+            await self.start()
+        try:
+            self._queue.put_nowait(VerificationJob(
+                verification_id,
+                content,
+                content_type,
+                content_hash,
+                perceptual_hash
+            ))
+        except asyncio.QueueFull:
+            raise JobQueueFullError(self.retry_after)
+        self._events[verification_id] = asyncio.Event()
+
+    def free_slots(self) -> int:
+        if self._queue is None:
+            return self.max_size
+        return self.max_size - self._queue.qsize()
+
+    async def wait(self, verification_id: str, timeout: float) -> None:
+        """
+        Wait until a job queued in this process finishes, or at most ``timeout`` seconds
+
+        Jobs queued by other processes cannot be observed, so callers fall back
+        to polling the repository at ``timeout`` intervals.
+        """
+        event = self._events.get(verification_id)
+        if event is None:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception:
+                logger.exception("Could not record the result of verification %s", job.verification_id)
+            finally:
+                self._queue.task_done()
+                event = self._events.pop(job.verification_id, None)
+                if event is not None:
+                    event.set()
+
+    async def _run(self, job: VerificationJob) -> None:
+        repository = self.service.repository
+        try:
+            await repository.update(job.verification_id, VerificationUpdate(status="processing"))
+            await self.service.process(
+                job.verification_id,
+                job.content,
+                job.content_type,
+                job.content_hash,
+                job.perceptual_hash
+            )
+            self._processed += 1
+        except Exception as e:
+            self._failed += 1
+            logger.warning("Verification %s failed: %s", job.verification_id, e)
+            await self.service.record_failure(job.verification_id, str(e))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self.max_size,
+            "processed": self._processed,
+            "failed": self._failed
+        }
+
+
+def create_job_queue(service: VerificationService) -> VerificationJobQueue:
+    return VerificationJobQueue(
+        service,
+        workers=settings.JOB_WORKERS,
+        max_size=settings.JOB_QUEUE_MAX_SIZE,
+        retry_after=settings.INFERENCE_RETRY_AFTER_SECONDS
+    )
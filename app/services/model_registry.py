@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from app.core.metrics import record_stage
+
+
+def current_rss_bytes() -> int:
+    """
+    Return the resident set size of the current process in bytes
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Fall back to the peak RSS on platforms without procfs
+        import resource
+        import sys
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def memory_usage(pid: Any = "self") -> Optional[Dict[str, int]]:
+    """
+    RSS of a process split into memory shared with other processes and private memory
+
+    Read from /proc/<pid>/smaps_rollup (Linux 4.14+). PSS charges each shared
+    page to its sharers in equal parts, so the PSS of all workers adds up to
+    their real footprint; None where smaps_rollup is not available.
+    """
+    fields: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as rollup:
+            for line in rollup:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except (OSError, ValueError):
+        return None
+    return {
+        "rss_bytes": fields.get("Rss", 0),
+        "pss_bytes": fields.get("Pss", 0),
+        "shared_bytes": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private_bytes": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+
+def _parameter_bytes(model: Any) -> Optional[int]:
+    """
+    Return the size of the weights held by a Hugging Face pipeline, if known
+    """
+    torch_model = getattr(model, "model", None)
+    if torch_model is None or not hasattr(torch_model, "parameters"):
+        return None
+    return sum(p.numel() * p.element_size() for p in torch_model.parameters())
+
+
+class ModelSpec:
+    def __init__(
+        self,
+        name: str,
+        modality: str,
+        loader: Callable[[], Any],
+        warmup_input: Optional[Callable[[], Any]] = None
+    ):
+        self.name = name
+        self.modality = modality
+        self.loader = loader
+        self.warmup_input = warmup_input
+
+
+class LoadedModel:
+    def __init__(self, model: Any, load_time: float, rss_delta: int):
+        self.model = model
+        self.load_time = load_time
+        self.rss_delta = rss_delta
+        self.parameter_bytes = _parameter_bytes(model)
+        self.loaded_at = time.time()
+        self.warmup_time: Optional[float] = None
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that loads each model once and shares it between requests
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, ModelSpec] = {}
+        self._models: Dict[str, LoadedModel] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(
+        self,
+        name: str,
+        modality: str,
+        loader: Callable[[], Any],
+        warmup_input: Optional[Callable[[], Any]] = None
+    ) -> None:
+        """
+        Register a model loader under a name; the model is not loaded yet
+        """
+        self._specs[name] = ModelSpec(name, modality, loader, warmup_input)
+        self._locks.setdefault(name, threading.Lock())
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._specs
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str) -> Any:
+        """
+        Return the shared model instance, loading it on first use
+        """
+        loaded = self._models.get(name)
+        if loaded is None:
+            loaded = self.load(name)
+        return loaded.model
+
+    def load(self, name: str) -> LoadedModel:
+        """
+        Load a model if it is not loaded yet and record its load cost
+        """
+        if name not in self._specs:
+            raise KeyError(f"Model not registered: {name}")
+
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            if name in self._models:
+                return self._models[name]
+
+            rss_before = current_rss_bytes()
+            start = time.perf_counter()
+            model = self._specs[name].loader()
+            load_time = time.perf_counter() - start
+            record_stage("model_load", load_time, self._specs[name].modality)
+            rss_delta = max(current_rss_bytes() - rss_before, 0)
+
+            loaded = LoadedModel(model, load_time, rss_delta)
+            self._models[name] = loaded
+            return loaded
+
+    def load_all(self, modalities: Optional[List[str]] = None) -> None:
+        """
+        Load every registered model, optionally restricted to some modalities
+        """
+        for name, spec in self._specs.items():
+            if modalities is None or spec.modality in modalities:
+                self.load(name)
+
+    def warmup(self, name: Optional[str] = None) -> None:
+        """
+        Run a dummy input through loaded models so the first request is not slowed down
+        """
+        names = [name] if name is not None else list(self._models)
+        for model_name in names:
+            spec = self._specs[model_name]
+            if spec.warmup_input is None:
+                continue
+            loaded = self.load(model_name)
+            start = time.perf_counter()
+            loaded.model(spec.warmup_input())
+            loaded.warmup_time = time.perf_counter() - start
+
+    def unload(self, name: str) -> None:
+        with self._locks.get(name, threading.Lock()):
+            self._models.pop(name, None)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Report load state, load time and memory usage per model
+        """
+        stats = {}
+        for name, spec in self._specs.items():
+            loaded = self._models.get(name)
+            stats[name] = {
+                "modality": spec.modality,
+                "loaded": loaded is not None,
+                "load_time_seconds": loaded.load_time if loaded else None,
+                "warmup_time_seconds": loaded.warmup_time if loaded else None,
+                "rss_delta_bytes": loaded.rss_delta if loaded else None,
+                "parameter_bytes": loaded.parameter_bytes if loaded else None,
+                "loaded_at": loaded.loaded_at if loaded else None
+            }
+        return stats
+
+
+model_registry = ModelRegistry()
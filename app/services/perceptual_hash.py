@@ -0,0 +1,187 @@
+import io
+import os
+from array import array
+from itertools import combinations
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+HASH_BITS = 64
+
+# Number of set bits of every byte value, for vectorized popcounts
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """
+    Orthonormal DCT-II basis, so a 2D DCT is ``M @ X @ M.T``
+    """
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def _to_grayscale(image: Union["Image.Image", np.ndarray]) -> "Image.Image":
+    # PIL is imported on first use to keep it out of application startup
+    from PIL import Image
+
+    if isinstance(image, np.ndarray):
+        # OpenCV frames are BGR; luminance only needs the channel order reversed
+        image = Image.fromarray(image[..., ::-1] if image.ndim == 3 else image)
+    return image.convert("L")
+
+
+def dhash(image: Union["Image.Image", np.ndarray]) -> int:
+    """
+    64-bit difference hash: sign of horizontal gradients on a 9x8 thumbnail
+    """
+    from PIL import Image
+
+    pixels = np.asarray(_to_grayscale(image).resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(image: Union["Image.Image", np.ndarray]) -> int:
+    """
+    64-bit perceptual hash: low-frequency DCT coefficients of a 32x32 thumbnail above their median
+    """
+    from PIL import Image
+
+    pixels = np.asarray(_to_grayscale(image).resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low_frequencies = (_DCT_32 @ pixels @ _DCT_32.T)[:8, :8]
+    return _bits_to_int(low_frequencies > np.median(low_frequencies))
+
+
+def image_phash(image_data: Union[bytes, str, os.PathLike]) -> int:
+    """
+    Perceptual hash of encoded image bytes or file; decodes a reduced JPEG draft when possible
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_data) if isinstance(image_data, bytes) else image_data) as image:
+        image.draft("L", (64, 64))
+        return phash(image)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def hash_to_hex(value: int) -> str:
+    return f"{value:016x}"
+
+
+def hash_from_hex(value: str) -> int:
+    return int(value, 16)
+
+
+class MultiIndexHashIndex:
+    """
+    Near-neighbour index over 64-bit hashes using multi-index hashing
+
+    Each hash is split into ``chunks`` substrings, each indexed in its own
+    table. Two hashes within Hamming distance ``r`` have at least one chunk
+    within ``r // chunks`` of each other, so a query probes every table with
+    all variants of its chunk up to that radius and only verifies the few
+    candidates found, instead of scanning every stored hash.
+    """
+
+    def __init__(self, max_distance: int = 6, chunks: int = 4):
+        if HASH_BITS % chunks:
+            raise ValueError("chunks must divide the hash size")
+        self.max_distance = max_distance
+        self.chunks = chunks
+        self.chunk_bits = HASH_BITS // chunks
+        self._chunk_mask = (1 << self.chunk_bits) - 1
+
+        # Unsigned 64-bit storage keeps millions of hashes compact
+        self._hashes = array("Q")
+        self._keys: List[Any] = []
+        self._tables: List[Dict[int, array]] = [{} for _ in range(chunks)]
+        self._flip_masks = self._build_flip_masks(max_distance // chunks)
+
+    def _build_flip_masks(self, radius: int) -> List[int]:
+        masks = [0]
+        for flips in range(1, radius + 1):
+            for positions in combinations(range(self.chunk_bits), flips):
+                mask = 0
+                for position in positions:
+                    mask |= 1 << position
+                masks.append(mask)
+        return masks
+
+    def _split(self, value: int) -> Iterable[Tuple[int, int]]:
+        for chunk in range(self.chunks):
+            yield chunk, (value >> (chunk * self.chunk_bits)) & self._chunk_mask
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add(self, value: int, key: Any) -> None:
+        position = len(self._hashes)
+        self._hashes.append(value)
+        self._keys.append(key)
+        for chunk, substring in self._split(value):
+            bucket = self._tables[chunk].get(substring)
+            if bucket is None:
+                bucket = self._tables[chunk][substring] = array("Q")
+            bucket.append(position)
+
+    def search(self, value: int, max_distance: Optional[int] = None) -> List[Tuple[Any, int]]:
+        """
+        Return ``(key, distance)`` pairs within ``max_distance``, closest first
+        """
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+
+        buckets = []
+        for chunk, substring in self._split(value):
+            table = self._tables[chunk]
+            for mask in self._flip_masks:
+                bucket = table.get(substring ^ mask)
+                if bucket is not None:
+                    buckets.append(np.frombuffer(bucket, dtype=np.uint64))
+        if not buckets:
+            return []
+
+        # Verify all candidates at once instead of one Python comparison each
+        positions = np.unique(np.concatenate(buckets))
+        hashes = np.frombuffer(self._hashes, dtype=np.uint64)[positions]
+        differing = (hashes ^ np.uint64(value)).view(np.uint8).reshape(-1, 8)
+        distances = _POPCOUNT_TABLE[differing].sum(axis=1)
+
+        within = np.nonzero(distances <= max_distance)[0]
+        within = within[np.argsort(distances[within], kind="stable")]
+        return [(self._keys[int(positions[i])], int(distances[i])) for i in within]
+
+    def nearest(self, value: int, max_distance: Optional[int] = None) -> Optional[Tuple[Any, int]]:
+        matches = self.search(value, max_distance)
+        return matches[0] if matches else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._hashes),
+            "max_distance": self.max_distance,
+            "chunks": self.chunks,
+            "probes_per_query": self.chunks * len(self._flip_masks)
+        }
+
+
+perceptual_index = MultiIndexHashIndex(
+    max_distance=settings.PHASH_MAX_DISTANCE,
+    chunks=settings.PHASH_INDEX_CHUNKS
+)
@@ -0,0 +1,395 @@
+"""
+Cheap pre-filter cascade in front of the text model
+
+Texts go through increasingly expensive stages and leave at the first one
+that can answer:
+
+1. rules: empty texts, URLs only and texts shorter than PREFILTER_MIN_WORDS
+   get an empty sentiment; texts containing a phrase of the lexicon (known
+   hoaxes or verified statements, in the claim corpus format) are answered
+   with that phrase as a fact-checked claim match. Nothing else runs.
+2. ngram: a linear model over hashed word 1- and 2-grams, distilled from
+   the text model, answers when its top label reaches
+   PREFILTER_NGRAM_CONFIDENCE. Claim matching still runs.
+3. model: the transformer, for everything else.
+
+Train the n-gram stage on a sample of real traffic; texts without a
+``label`` are labeled by the text model itself:
+
+    python -m app.services.prefilter train --data data/texts.jsonl [--output models/prefilter.npz]
+
+Phrases are matched with pyahocorasick when it is installed (worth it for
+large lexicons) and with one compiled regular expression otherwise.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import record_stage
+from app.services.claims import read_corpus, verdict_label
+
+STAGES = ("rules", "ngram", "model")
+NGRAM_FEATURES = 1 << 18
+
+_URL = re.compile(r"(?:https?://|www\.)\S+")
+_WORD = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lowercase, strip accents and collapse whitespace, so phrases match however they are typed
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.split())
+
+
+def normalize_many(texts: Sequence[str]) -> List[str]:
+    """
+    Normalize a batch of texts; pure Python, so batches run in the process pool
+    """
+    return [normalize_text(text) for text in texts]
+
+
+def ngram_features(normalized: str, n_features: int = NGRAM_FEATURES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hashed word 1- and 2-gram indexes and their L2-normalized counts
+    """
+    words = _WORD.findall(normalized)
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not grams:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    # crc32 is stable across processes, unlike hash()
+    indexes, counts = np.unique(
+        np.fromiter((zlib.crc32(gram.encode()) % n_features for gram in grams), dtype=np.int64, count=len(grams)),
+        return_counts=True
+    )
+    values = counts.astype(np.float32)
+    return indexes, values / np.linalg.norm(values)
+
+
+class PrefilterExit:
+    def __init__(self, stage: str, reason: str, sentiment: Any, claim_matches: List[Dict[str, Any]]):
+        self.stage = stage
+        self.reason = reason
+        self.sentiment = sentiment
+        self.claim_matches = claim_matches
+
+
+class PhraseLexicon:
+    """
+    Phrases of known hoaxes or verified statements, found as whole words in normalized texts
+    """
+
+    def __init__(self, entries: Sequence[Dict[str, Any]]):
+        self.entries = []
+        phrases = {}
+        for entry in entries:
+            phrase = normalize_text(entry["claim"])
+            if phrase and phrase not in phrases:
+                phrases[phrase] = len(self.entries)
+                self.entries.append({
+                    "claim": entry["claim"],
+                    "verdict": entry.get("verdict"),
+                    "label": verdict_label(entry.get("verdict")),
+                    "url": entry.get("url")
+                })
+        self._automaton = None
+        self._pattern = None
+        if not phrases:
+            return
+        try:
+            import ahocorasick
+        except ImportError:
+            # Longest first, so overlapping phrases prefer the most specific one
+            alternatives = sorted(phrases, key=len, reverse=True)
+            self._pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, alternatives)) + r")\b")
+            self._phrases = phrases
+        else:
+            self._automaton = ahocorasick.Automaton()
+            for phrase, index in phrases.items():
+                self._automaton.add_word(phrase, (index, len(phrase)))
+            self._automaton.make_automaton()
+
+    @classmethod
+    def from_file(cls, path: str) -> "PhraseLexicon":
+        if not os.path.exists(path):
+            return cls([])
+        return cls(list(read_corpus(path)))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def find(self, normalized: str) -> List[Dict[str, Any]]:
+        """
+        Lexicon entries whose phrase appears in the text
+        """
+        found = set()
+        if self._pattern is not None:
+            found.update(self._phrases[match.group()] for match in self._pattern.finditer(normalized))
+        elif self._automaton is not None:
+            for end, (index, length) in self._automaton.iter(normalized):
+                start = end - length + 1
+                # Whole words only, as with the regular expression
+                if (start == 0 or not normalized[start - 1].isalnum()) and (
+                    end + 1 == len(normalized) or not normalized[end + 1].isalnum()
+                ):
+                    found.add(index)
+        return [self.entries[index] for index in sorted(found)]
+
+
+class NgramModel:
+    """
+    Multinomial logistic regression over hashed n-grams, predicting the text model's labels
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: Sequence[str], version: str = "1"):
+        # (features, labels) and (labels,)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.labels = list(labels)
+        self.version = version
+
+    def probabilities(self, normalized_texts: Sequence[str]) -> np.ndarray:
+        logits = np.tile(self.bias, (len(normalized_texts), 1))
+        for i, text in enumerate(normalized_texts):
+            indexes, values = ngram_features(text, len(self.weights))
+            if len(indexes):
+                logits[i] += values @ self.weights[indexes]
+        logits -= logits.max(axis=1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=1, keepdims=True)
+        return logits
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, weights=self.weights, bias=self.bias, labels=np.asarray(self.labels), version=np.asarray(self.version))
+
+    @classmethod
+    def load(cls, path: str) -> "NgramModel":
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"], [str(label) for label in data["labels"]], str(data["version"]))
+
+
+class TextCascade:
+    """
+    Runs the rules and n-gram stages, and counts where texts leave the cascade
+    """
+
+    def __init__(
+        self,
+        lexicon: Optional[PhraseLexicon] = None,
+        model: Optional[NgramModel] = None,
+        enabled: bool = True,
+        min_words: int = 2,
+        ngram_confidence: float = 0.95
+    ):
+        self.lexicon = lexicon if lexicon is not None else PhraseLexicon([])
+        self.model = model
+        self.enabled = enabled
+        self.min_words = min_words
+        self.ngram_confidence = ngram_confidence
+        self._lock = threading.Lock()
+
+        self._exits = {stage: 0 for stage in STAGES}
+        self._reasons: Dict[str, int] = {}
+        self._seconds = {stage: 0.0 for stage in STAGES[:2]}
+        self._screened = {stage: 0 for stage in STAGES[:2]}
+
+    @classmethod
+    def from_settings(cls) -> "TextCascade":
+        model = None
+        if os.path.exists(settings.PREFILTER_MODEL_PATH):
+            model = NgramModel.load(settings.PREFILTER_MODEL_PATH)
+        return cls(
+            PhraseLexicon.from_file(settings.PREFILTER_LEXICON_PATH),
+            model,
+            enabled=settings.PREFILTER_ENABLED,
+            min_words=settings.PREFILTER_MIN_WORDS,
+            ngram_confidence=settings.PREFILTER_NGRAM_CONFIDENCE
+        )
+
+    def screen(self, text: str, normalized: Optional[str] = None) -> Optional[PrefilterExit]:
+        """
+        Rules stage: an answer for trivial texts and lexicon phrases, or None to go on
+        """
+        if not self.enabled:
+            return None
+        start = time.perf_counter()
+        if normalized is None:
+            normalized = normalize_text(text)
+        reason = None
+        claim_matches: List[Dict[str, Any]] = []
+        words = len(_WORD.findall(_URL.sub(" ", normalized)))
+        if not normalized:
+            reason = "empty"
+        elif words == 0:
+            reason = "url_only"
+        elif words < self.min_words:
+            reason = "too_short"
+        elif len(self.lexicon):
+            claim_matches = [{**entry, "similarity": 1.0} for entry in self.lexicon.find(normalized)]
+            if claim_matches:
+                reason = "lexicon"
+        self._record("rules", time.perf_counter() - start, 1, reason)
+        if reason is None:
+            return None
+        return PrefilterExit("rules", reason, [], claim_matches)
+
+    def predict_many(self, texts: Sequence[str]) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        N-gram stage: a pipeline-style sentiment per confident text, None for those needing the model
+        """
+        if not self.enabled or self.model is None or not texts:
+            self._count_model(len(texts))
+            return [None] * len(texts)
+        start = time.perf_counter()
+        probabilities = self.model.probabilities([normalize_text(text) for text in texts])
+        confident = probabilities.max(axis=1) >= self.ngram_confidence
+        results = [
+            [{"label": label, "score": float(score)} for label, score in zip(self.model.labels, row)]
+            if is_confident else None
+            for row, is_confident in zip(probabilities.tolist(), confident.tolist())
+        ]
+        exits = int(confident.sum())
+        self._record("ngram", time.perf_counter() - start, len(texts), "ngram" if exits else None, exits)
+        self._count_model(len(texts) - exits)
+        return results
+
+    def _record(self, stage: str, seconds: float, screened: int, reason: Optional[str], exits: int = 1) -> None:
+        record_stage(f"prefilter_{stage}", seconds, "text")
+        with self._lock:
+            self._seconds[stage] += seconds
+            self._screened[stage] += screened
+            if reason is not None:
+                self._exits[stage] += exits
+                self._reasons[reason] = self._reasons.get(reason, 0) + exits
+
+    def _count_model(self, count: int) -> None:
+        with self._lock:
+            self._exits["model"] += count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._exits.values())
+            return {
+                "enabled": self.enabled,
+                "lexicon_phrases": len(self.lexicon),
+                "ngram_model": self.model.version if self.model is not None else None,
+                "ngram_confidence": self.ngram_confidence,
+                "texts": total,
+                "exits": dict(self._exits),
+                "exit_rates": {stage: count / total if total else 0.0 for stage, count in self._exits.items()},
+                "reasons": dict(self._reasons),
+                "mean_ms": {
+                    stage: 1000 * self._seconds[stage] / self._screened[stage] if self._screened[stage] else 0.0
+                    for stage in self._seconds
+                }
+            }
+
+
+def _teacher_labels(texts: List[str]) -> List[str]:
+    """
+    Top label of the text model for each text
+    """
+    from app.services.analyzer import ContentAnalyzer
+
+    analyzer = ContentAnalyzer()
+    labels = []
+    batch_size = max(1, settings.TEXT_BATCH_MAX_SIZE)
+    for start in range(0, len(texts), batch_size):
+        for sentiment in analyzer._analyze_text_batch(texts[start:start + batch_size]):
+            labels.append(max(sentiment, key=lambda prediction: prediction["score"])["label"])
+    return labels
+
+
+def train(
+    data_path: str,
+    output: str,
+    holdout: float = 0.2,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Distill the text model into the n-gram stage and report coverage and agreement on held-out texts
+    """
+    from scipy.sparse import csr_matrix
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+
+    texts, labels = [], []
+    with open(data_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                texts.append(item["text"])
+                labels.append(item.get("label"))
+    missing = [i for i, label in enumerate(labels) if label is None]
+    if missing:
+        for i, label in zip(missing, _teacher_labels([texts[i] for i in missing])):
+            labels[i] = label
+
+    rows, columns, values = [], [], []
+    for row, text in enumerate(texts):
+        indexes, weights = ngram_features(normalize_text(text))
+        rows.extend([row] * len(indexes))
+        columns.extend(indexes.tolist())
+        values.extend(weights.tolist())
+    matrix = csr_matrix((values, (rows, columns)), shape=(len(texts), NGRAM_FEATURES), dtype=np.float32)
+    classes = sorted(set(labels))
+    targets = np.asarray([classes.index(label) for label in labels])
+
+    train_rows, holdout_rows = train_test_split(
+        np.arange(len(texts)), test_size=holdout, random_state=seed, stratify=targets
+    )
+    model = LogisticRegression(max_iter=1000, C=10.0)
+    model.fit(matrix[train_rows], targets[train_rows])
+
+    if len(classes) == 2:
+        # One logit for the positive class; split it so the softmax matches the sigmoid
+        weights = np.stack([-model.coef_[0] / 2, model.coef_[0] / 2], axis=1)
+        bias = np.asarray([-model.intercept_[0] / 2, model.intercept_[0] / 2])
+    else:
+        weights, bias = model.coef_.T, model.intercept_
+    ngram_model = NgramModel(weights, bias, classes, version=os.path.basename(output))
+    ngram_model.save(output)
+
+    probabilities = ngram_model.probabilities([normalize_text(texts[i]) for i in holdout_rows])
+    agrees = probabilities.argmax(axis=1) == targets[holdout_rows]
+    confidence = probabilities.max(axis=1)
+    return {
+        "output": output,
+        "texts": len(texts),
+        "teacher_labeled": len(missing),
+        "labels": classes,
+        "holdout_agreement": float(agrees.mean()),
+        # Share of texts leaving at the n-gram stage, and how often they agree with the text model
+        "by_confidence": {
+            str(threshold): {
+                "exit_rate": float((confidence >= threshold).mean()),
+                "agreement": float(agrees[confidence >= threshold].mean()) if (confidence >= threshold).any() else None
+            }
+            for threshold in (0.8, 0.9, 0.95, 0.99)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the n-gram stage of the text pre-filter")
+    parser.add_argument("command", choices=["train"])
+    parser.add_argument("--data", required=True, help="JSONL of {text, label?}")
+    parser.add_argument("--output", default=settings.PREFILTER_MODEL_PATH)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    args = parser.parse_args()
+    print(json.dumps(train(args.data, args.output, args.holdout), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Scoring engine of ContentClassifier: fixed-length features and a linear model
+
+Every analysis result (text, image or video) becomes one row of
+``FEATURE_NAMES``, and a multinomial logistic regression turns rows into
+probabilities of the three classification labels with a single matrix
+product, so thousands of items are scored in one vectorized call. A label
+is only given when its probability reaches the threshold calibrated for
+that label and content type; otherwise the item is "Suspeito" (needs
+review).
+
+Models are trained with scikit-learn and saved as plain NumPy arrays
+(feature scaling folded into the weights), so serving needs NumPy only:
+
+    python -m app.services.scoring train --data data/labeled.jsonl [--target-precision 0.9]
+
+Each line of the training data holds an ``analysis_result`` and its
+``label`` (a key or a value of CLASSIFICATION_LABELS). Without a trained
+model, a built-in prior is used that follows the verdicts of matching
+fact-checked claims and otherwise answers "Suspeito".
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = ("text", "image", "video")
+# Class order of the model outputs, as CLASSIFICATION_LABELS keys
+CLASSES = ("VERIFIED", "SUSPICIOUS", "FAKE")
+ABSTAIN_CLASS = CLASSES.index("SUSPICIOUS")
+
+FEATURE_NAMES = (
+    "is_text",
+    "is_image",
+    "is_video",
+    # Model predictions: sentiment for texts, ImageNet classes for images and key frames
+    "top_score",
+    "score_margin",
+    "score_entropy",
+    # Similar fact-checked claims, with the similarity-weighted share of each verdict
+    "claim_max_similarity",
+    "claim_verified_share",
+    "claim_suspicious_share",
+    "claim_fake_share",
+    "log_claim_count",
+    "log_entity_count",
+    "log_topic_count",
+    "log_length",
+    "log_pixels",
+    "aspect_ratio",
+    "log_key_frame_count",
+    "log_scene_count",
+    "log_object_count",
+    "key_frame_mean_top_score",
+    "log_duration"
+)
+_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+# Built-in prior: (feature, weights per class in CLASSES order)
+_PRIOR_WEIGHTS = (
+    ("claim_verified_share", (3.0, 0.0, -1.0)),
+    ("claim_suspicious_share", (0.0, 1.0, 0.0)),
+    ("claim_fake_share", (-1.0, 0.0, 3.0))
+)
+_PRIOR_BIAS = (0.0, 1.0, 0.0)
+
+
+def _prediction_scores(value: Any) -> List[float]:
+    """
+    Scores of a pipeline output ([{label, score}] or [[...]]), highest first
+    """
+    if isinstance(value, Mapping):
+        value = [value]
+    if isinstance(value, list) and len(value) == 1 and isinstance(value[0], list):
+        value = value[0]
+    if not isinstance(value, list):
+        return []
+    return sorted(
+        (float(item["score"]) for item in value if isinstance(item, Mapping) and "score" in item),
+        reverse=True
+    )
+
+
+def _set_prediction_features(row: np.ndarray, scores: List[float]) -> None:
+    if not scores:
+        return
+    row[_INDEX["top_score"]] = scores[0]
+    row[_INDEX["score_margin"]] = scores[0] - (scores[1] if len(scores) > 1 else 0.0)
+    total = sum(scores)
+    if total > 0 and len(scores) > 1:
+        entropy = -sum(s / total * math.log(s / total) for s in scores if s > 0)
+        row[_INDEX["score_entropy"]] = entropy / math.log(len(scores))
+
+
+def _log_count(value: Any) -> float:
+    return math.log1p(len(value)) if isinstance(value, (list, tuple)) else 0.0
+
+
+def features(analysis: Mapping, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Feature row of one analysis result; raises ValueError for unknown content types
+    """
+    content_type = analysis.get("type")
+    if content_type not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported content type: {content_type}")
+    row = out if out is not None else np.zeros(len(FEATURE_NAMES), dtype=np.float32)
+    row[CONTENT_TYPES.index(content_type)] = 1.0
+    metadata = analysis.get("metadata") or {}
+
+    if content_type == "text":
+        _set_prediction_features(row, _prediction_scores(analysis.get("sentiment")))
+        matches = analysis.get("claim_matches") or []
+        if matches:
+            label_keys = {label: key for key, label in settings.CLASSIFICATION_LABELS.items()}
+            similarities = {key: 0.0 for key in CLASSES}
+            for match in matches:
+                key = label_keys.get(match.get("label"))
+                if key is not None:
+                    similarities[key] += match["similarity"]
+            total = sum(similarities.values())
+            row[_INDEX["claim_max_similarity"]] = max(match["similarity"] for match in matches)
+            if total > 0:
+                row[_INDEX["claim_verified_share"]] = similarities["VERIFIED"] / total
+                row[_INDEX["claim_suspicious_share"]] = similarities["SUSPICIOUS"] / total
+                row[_INDEX["claim_fake_share"]] = similarities["FAKE"] / total
+        row[_INDEX["log_claim_count"]] = _log_count(matches)
+        row[_INDEX["log_entity_count"]] = _log_count(analysis.get("entities"))
+        row[_INDEX["log_topic_count"]] = _log_count(analysis.get("topics"))
+        row[_INDEX["log_length"]] = math.log1p(metadata.get("length") or 0)
+
+    elif content_type == "image":
+        _set_prediction_features(row, _prediction_scores(analysis.get("classification")))
+        size = metadata.get("size")
+        if size and len(size) == 2 and size[0] and size[1]:
+            row[_INDEX["log_pixels"]] = math.log(size[0] * size[1])
+            row[_INDEX["aspect_ratio"]] = size[0] / size[1]
+
+    else:
+        video = analysis.get("analysis") or {}
+        key_frames = video.get("key_frames") or []
+        row[_INDEX["log_key_frame_count"]] = _log_count(key_frames)
+        row[_INDEX["log_scene_count"]] = _log_count(video.get("scenes"))
+        row[_INDEX["log_object_count"]] = _log_count(video.get("objects"))
+        top_scores = [
+            scores[0] for scores in (_prediction_scores(frame.get("classification")) for frame in key_frames) if scores
+        ]
+        if top_scores:
+            row[_INDEX["key_frame_mean_top_score"]] = sum(top_scores) / len(top_scores)
+        fps = metadata.get("fps") or 0
+        if fps > 0:
+            row[_INDEX["log_duration"]] = math.log1p((metadata.get("frame_count") or 0) / fps)
+    return row
+
+
+def feature_matrix(analyses: Sequence[Mapping]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Feature matrix and content-type indexes of many analysis results
+    """
+    matrix = np.zeros((len(analyses), len(FEATURE_NAMES)), dtype=np.float32)
+    for i, analysis in enumerate(analyses):
+        features(analysis, matrix[i])
+    return matrix, matrix[:, :len(CONTENT_TYPES)].argmax(axis=1)
+
+
+class ScoringModel:
+    """
+    Multinomial logistic regression over FEATURE_NAMES with per-type, per-label thresholds
+    """
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        thresholds: np.ndarray,
+        version: str = "prior"
+    ):
+        # (features, classes), (classes,) and (content types, classes)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.thresholds = np.asarray(thresholds, dtype=np.float32)
+        self.version = version
+
+    @classmethod
+    def prior(cls, threshold: float = None) -> "ScoringModel":
+        """
+        The built-in model used until one is trained
+        """
+        weights = np.zeros((len(FEATURE_NAMES), len(CLASSES)), dtype=np.float32)
+        for name, values in _PRIOR_WEIGHTS:
+            weights[_INDEX[name]] = values
+        thresholds = np.full(
+            (len(CONTENT_TYPES), len(CLASSES)),
+            settings.CONFIDENCE_THRESHOLD if threshold is None else threshold,
+            dtype=np.float32
+        )
+        thresholds[:, ABSTAIN_CLASS] = 0.0
+        return cls(weights, np.asarray(_PRIOR_BIAS), thresholds)
+
+    def probabilities(self, matrix: np.ndarray) -> np.ndarray:
+        logits = matrix @ self.weights + self.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=1, keepdims=True)
+        return logits
+
+    def predict(self, matrix: np.ndarray, content_types: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Class indexes and their probabilities; labels below their threshold become SUSPICIOUS
+        """
+        probabilities = self.probabilities(matrix)
+        rows = np.arange(len(matrix))
+        best = probabilities.argmax(axis=1)
+        confident = probabilities[rows, best] >= self.thresholds[content_types, best]
+        labels = np.where(confident, best, ABSTAIN_CLASS)
+        return labels, probabilities[rows, labels]
+
+    def fingerprint(self) -> str:
+        """
+        Short digest of the parameters, so retrained models never share a version
+        """
+        digest = hashlib.sha256()
+        for array in (self.weights, self.bias, self.thresholds):
+            digest.update(array.tobytes())
+        return digest.hexdigest()[:12]
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                weights=self.weights,
+                bias=self.bias,
+                thresholds=self.thresholds,
+                feature_names=np.asarray(FEATURE_NAMES),
+                classes=np.asarray(CLASSES),
+                content_types=np.asarray(CONTENT_TYPES),
+                version=np.asarray(self.version)
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "ScoringModel":
+        with np.load(path) as data:
+            if tuple(data["feature_names"]) != FEATURE_NAMES or tuple(data["classes"]) != CLASSES:
+                raise ValueError(f"{path} was trained on other features; retrain it")
+            return cls(data["weights"], data["bias"], data["thresholds"], str(data["version"]))
+
+
+def load_scoring_model(path: Optional[str] = None) -> ScoringModel:
+    """
+    The trained model at SCORING_MODEL_PATH, or the built-in prior when there is none
+    """
+    path = path or settings.SCORING_MODEL_PATH
+    if os.path.exists(path):
+        return ScoringModel.load(path)
+    logger.info("No scoring model at %s; using the built-in prior", path)
+    return ScoringModel.prior()
+
+
+def calibrate_thresholds(
+    probabilities: np.ndarray,
+    labels: np.ndarray,
+    content_types: np.ndarray,
+    target_precision: float,
+    default: float
+) -> np.ndarray:
+    """
+    Per content type and label, the lowest probability threshold reaching the target precision
+
+    Items whose predicted label scores below its threshold are answered as
+    SUSPICIOUS, so the given labels keep ``target_precision`` on held-out
+    data. Combinations without held-out predictions keep ``default``.
+    """
+    thresholds = np.full((len(CONTENT_TYPES), len(CLASSES)), default, dtype=np.float32)
+    thresholds[:, ABSTAIN_CLASS] = 0.0
+    predicted = probabilities.argmax(axis=1)
+    confidence = probabilities.max(axis=1)
+    for type_index in range(len(CONTENT_TYPES)):
+        for class_index in range(len(CLASSES)):
+            if class_index == ABSTAIN_CLASS:
+                continue
+            selected = (content_types == type_index) & (predicted == class_index)
+            if not selected.any():
+                continue
+            # Precision of the predictions at or above each candidate threshold, highest first
+            order = np.argsort(-confidence[selected])
+            scores = confidence[selected][order]
+            correct = (labels[selected][order] == class_index).cumsum()
+            precision = correct / np.arange(1, len(scores) + 1)
+            reaching = np.nonzero(precision >= target_precision)[0]
+            thresholds[type_index, class_index] = scores[reaching[-1]] if len(reaching) else 1.01
+    return thresholds
+
+
+def _label_index(label: str) -> int:
+    if label in CLASSES:
+        return CLASSES.index(label)
+    for key, value in settings.CLASSIFICATION_LABELS.items():
+        if value == label:
+            return CLASSES.index(key)
+    raise ValueError(f"Unknown label: {label}")
+
+
+def train(
+    data_path: str,
+    output: str,
+    target_precision: float = 0.9,
+    holdout: float = 0.2,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Fit the model on labeled analysis results, calibrate thresholds on a held-out split and save it
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    analyses = []
+    labels = []
+    with open(data_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                analyses.append(item["analysis_result"])
+                labels.append(_label_index(item["label"]))
+    matrix, content_types = feature_matrix(analyses)
+    labels = np.asarray(labels)
+
+    train_rows, holdout_rows = train_test_split(
+        np.arange(len(labels)), test_size=holdout, random_state=seed, stratify=labels
+    )
+    scaler = StandardScaler().fit(matrix[train_rows])
+    model = LogisticRegression(max_iter=1000, C=1.0)
+    model.fit(scaler.transform(matrix[train_rows]), labels[train_rows])
+
+    # Fold the scaling into the weights so serving is a single matrix product
+    coef = np.zeros((len(CLASSES), len(FEATURE_NAMES)))
+    intercept = np.full(len(CLASSES), -1e4)
+    for row, class_index in enumerate(model.classes_):
+        coef[class_index] = model.coef_[row] if len(model.classes_) > 2 else (2 * row - 1) * model.coef_[0] / 2
+        intercept[class_index] = model.intercept_[row] if len(model.classes_) > 2 else (2 * row - 1) * model.intercept_[0] / 2
+    weights = (coef / scaler.scale_).T
+    bias = intercept - (coef * scaler.mean_ / scaler.scale_).sum(axis=1)
+
+    scoring = ScoringModel(weights, bias, np.zeros((len(CONTENT_TYPES), len(CLASSES))), version=os.path.basename(output))
+    probabilities = scoring.probabilities(matrix[holdout_rows])
+    scoring.thresholds = calibrate_thresholds(
+        probabilities, labels[holdout_rows], content_types[holdout_rows], target_precision, settings.CONFIDENCE_THRESHOLD
+    )
+    scoring.version = f"{os.path.basename(output)}@{scoring.fingerprint()}"
+    scoring.save(output)
+
+    predicted, _ = scoring.predict(matrix[holdout_rows], content_types[holdout_rows])
+    answered = predicted != ABSTAIN_CLASS
+    return {
+        "output": output,
+        "items": len(labels),
+        "holdout_items": len(holdout_rows),
+        "holdout_accuracy": float((probabilities.argmax(axis=1) == labels[holdout_rows]).mean()),
+        "holdout_answered": float(answered.mean()),
+        "holdout_answered_precision": float((predicted[answered] == labels[holdout_rows][answered]).mean())
+        if answered.any() else None,
+        "thresholds": {
+            content_type: dict(zip(CLASSES, scoring.thresholds[i].tolist()))
+            for i, content_type in enumerate(CONTENT_TYPES)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the classification scoring model")
+    parser.add_argument("command", choices=["train"])
+    parser.add_argument("--data", required=True, help="JSONL of {analysis_result, label}")
+    parser.add_argument("--output", default=settings.SCORING_MODEL_PATH)
+    parser.add_argument("--target-precision", type=float, default=0.9)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    args = parser.parse_args()
+    print(json.dumps(train(args.data, args.output, args.target_precision, args.holdout), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class TokenizedText:
+    def __init__(self, windows: List[List[int]], token_count: int):
+        # Every window already includes the model's special tokens
+        self.windows = windows
+        self.token_count = token_count
+
+
+def token_cache_key(text: str) -> str:
+    """
+    SHA-256 of the exact text; the tokenizer is cased, so no normalization
+    """
+    return f"sha256:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def split_windows(token_ids: List[int], window_size: int, overlap: int) -> List[List[int]]:
+    """
+    Split token ids into windows of at most ``window_size`` sharing ``overlap`` tokens
+    """
+    if len(token_ids) <= window_size:
+        return [token_ids]
+    step = max(1, window_size - overlap)
+    windows = []
+    start = 0
+    while True:
+        windows.append(token_ids[start:start + window_size])
+        if start + window_size >= len(token_ids):
+            return windows
+        start += step
+
+
+def plan_batches(lengths: Sequence[int], batch_size: int) -> List[List[int]]:
+    """
+    Group input positions into batches of similar length to reduce padding
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batch_size = max(1, batch_size)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def aggregate_window_scores(
+    window_scores: List[Dict[str, float]],
+    weights: List[int],
+    method: str = "mean"
+) -> List[Dict[str, Any]]:
+    """
+    Combine per-window label scores into one pipeline-style ``[{label, score}]`` list
+
+    ``mean`` weights every window by its token count; ``max`` keeps the highest
+    score seen for every label, so a claim in any window is not diluted.
+    """
+    labels = list(window_scores[0])
+    if method == "max":
+        combined = {label: max(scores[label] for scores in window_scores) for label in labels}
+    else:
+        total = sum(weights) or len(weights)
+        combined = {
+            label: sum(scores[label] * (weight or 1) for scores, weight in zip(window_scores, weights)) / total
+            for label in labels
+        }
+    return [{"label": label, "score": combined[label]} for label in labels]
+
+
+def score_windows(text_pipeline: Any, windows: List[List[int]]) -> List[Dict[str, float]]:
+    """
+    Run already tokenized windows through the pipeline's model in one padded forward pass
+    """
+    import torch
+
+    tokenizer, model = text_pipeline.tokenizer, text_pipeline.model
+    encoded = tokenizer.pad({"input_ids": windows}, padding=True, return_tensors="pt")
+    if "token_type_ids" in tokenizer.model_input_names and "token_type_ids" not in encoded:
+        encoded["token_type_ids"] = torch.zeros_like(encoded["input_ids"])
+
+    with torch.inference_mode():
+        logits = model(**encoded).logits
+
+    # Same activation the text-classification pipeline applies
+    config = model.config
+    if config.problem_type == "multi_label_classification" or config.num_labels == 1:
+        probabilities = logits.sigmoid()
+    else:
+        probabilities = logits.softmax(-1)
+    return [
+        {config.id2label[j]: float(score) for j, score in enumerate(row)}
+        for row in probabilities.tolist()
+    ]
+
+
+class TextPreprocessor:
+    """
+    Tokenizes texts once, splits long ones into overlapping windows and caches the result
+
+    Long articles are no longer truncated at the model limit: every window is
+    scored and the scores are aggregated. Tokenized texts are cached by hash,
+    so re-analyzing the same text skips the tokenizer.
+    """
+
+    def __init__(self, max_length: int = 512, overlap: int = 128, cache_max_entries: int = 10000):
+        self.max_length = max_length
+        self.overlap = overlap
+        self.cache_max_entries = cache_max_entries
+        self._cache: "OrderedDict[str, TokenizedText]" = OrderedDict()
+        # Batches are tokenized from several executor threads
+        self._lock = threading.Lock()
+
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._tokens = 0
+        self._windows = 0
+        self._tokenize_seconds = 0.0
+        self._inference_tokens = 0
+        self._inference_seconds = 0.0
+        self._padded_slots = 0
+
+    def get(self, text: str) -> Optional[TokenizedText]:
+        key = token_cache_key(text)
+        with self._lock:
+            tokenized = self._cache.get(key)
+            if tokenized is not None:
+                self._cache.move_to_end(key)
+            return tokenized
+
+    def tokenize_many(self, tokenizer: Any, texts: List[str]) -> List[TokenizedText]:
+        """
+        Tokenize texts into windows, calling the fast tokenizer once for all cache misses
+        """
+        keys = [token_cache_key(text) for text in texts]
+        results: List[Optional[TokenizedText]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                tokenized = self._cache.get(key)
+                if tokenized is not None:
+                    self._cache.move_to_end(key)
+                    self._cache_hits += 1
+                    results[i] = tokenized
+                else:
+                    self._cache_misses += 1
+                    missing.setdefault(key, []).append(i)
+
+        if missing:
+            start = time.perf_counter()
+            first_positions = [positions[0] for positions in missing.values()]
+            encoded = tokenizer([texts[i] for i in first_positions], add_special_tokens=False)["input_ids"]
+            window_size = self.max_length - tokenizer.num_special_tokens_to_add(pair=False)
+            tokenized_texts = [
+                TokenizedText(
+                    [tokenizer.build_inputs_with_special_tokens(window)
+                     for window in split_windows(token_ids, window_size, self.overlap)],
+                    len(token_ids)
+                )
+                for token_ids in encoded
+            ]
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self._tokenize_seconds += elapsed
+                for (key, positions), tokenized in zip(missing.items(), tokenized_texts):
+                    self._tokens += tokenized.token_count
+                    self._windows += len(tokenized.windows)
+                    for i in positions:
+                        results[i] = tokenized
+                    self._cache[key] = tokenized
+                while len(self._cache) > self.cache_max_entries:
+                    self._cache.popitem(last=False)
+        return results
+
+    def record_batch(self, lengths: List[int], seconds: float) -> None:
+        """
+        Account one forward pass: real tokens against padded slots
+        """
+        with self._lock:
+            self._inference_tokens += sum(lengths)
+            self._padded_slots += len(lengths) * max(lengths, default=0)
+            self._inference_seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_length": self.max_length,
+                "overlap": self.overlap,
+                "cache_size": len(self._cache),
+                "cache_hits": self._cache_hits,
+                "cache_misses": self._cache_misses,
+                "tokens": self._tokens,
+                "windows": self._windows,
+                "tokenize_tokens_per_second": (
+                    self._tokens / self._tokenize_seconds if self._tokenize_seconds else 0.0
+                ),
+                "inference_tokens_per_second": (
+                    self._inference_tokens / self._inference_seconds if self._inference_seconds else 0.0
+                ),
+                "padding_waste_ratio": (
+                    1 - self._inference_tokens / self._padded_slots if self._padded_slots else 0.0
+                )
+            }
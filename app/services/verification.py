@@ -0,0 +1,305 @@
+from typing import Dict, Any, List, Optional, Tuple, Union
+from app.core.config import settings
+from app.core.metrics import timed_stage
+from app.models.database import VerificationCreate, VerificationInDB, VerificationUpdate
+from app.repositories.verification import VerificationRepository
+from app.services.analyzer import ContentAnalyzer
+from app.services.classifier import ContentClassifier
+from app.services.cache import ResultCache, result_cache
+from app.services.perceptual_hash import (
+    MultiIndexHashIndex,
+    hash_from_hex,
+    hash_to_hex,
+    image_phash,
+    perceptual_index
+)
+from app.services.write_behind import WriteBehindBuffer
+
+class VerificationService:
+    """
+    Runs the analyze-classify-store cycle shared by the sync routes and the job workers
+    """
+
+    def __init__(
+        self,
+        repository: VerificationRepository,
+        analyzer: ContentAnalyzer,
+        classifier: ContentClassifier,
+        cache: ResultCache = result_cache,
+        near_duplicates: MultiIndexHashIndex = perceptual_index,
+        write_behind: Optional[WriteBehindBuffer] = None
+    ):
+        self.repository = repository
+        self.analyzer = analyzer
+        self.classifier = classifier
+        self.cache = cache
+        self.near_duplicates = near_duplicates
+        self.write_behind = write_behind
+
+    async def store(
+        self,
+        verification: VerificationCreate,
+        result: VerificationUpdate
+    ) -> str:
+        """
+        Write a verification with its final result in a single write; returns its id
+
+        With write-behind enabled the document is buffered and written with
+        other results in a later bulk write.
+        """
+        with timed_stage("store", verification.content_type):
+            if self.write_behind is None:
+                return str((await self.repository.create(verification, result)).id)
+            document = await self.repository.document(verification, result)
+            await self.write_behind.insert(document)
+            return str(document["_id"])
+
+    async def _record(self, verification_id: str, result: VerificationUpdate, content_type: str = "none") -> None:
+        with timed_stage("update", content_type):
+            if self.write_behind is None:
+                await self.repository.update(verification_id, result)
+            else:
+                await self.write_behind.update(verification_id, await self.repository.update_fields(result))
+
+    async def get_status(self, verification_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Status and results of a verification, including results not written yet
+        """
+        if self.write_behind is not None:
+            buffered = self.write_behind.get(verification_id)
+            if buffered is not None and buffered.get("status") is not None:
+                # Buffered results are in their storage format, like stored ones
+                return await self.repository.status_of(buffered)
+        return await self.repository.get_status(verification_id)
+
+    async def load_perceptual_index(self) -> None:
+        """
+        Rebuild the in-memory near-duplicate index from stored verifications
+        """
+        async for verification_id, value in self.repository.iter_perceptual_hashes(
+            self.cache.model_version
+        ):
+            self.near_duplicates.add(hash_from_hex(value), verification_id)
+
+    async def find_near_duplicate(
+        self,
+        image_data: Union[bytes, str]
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Return the image's perceptual hash and the verdict of a near-duplicate, if any
+        """
+        if not settings.PHASH_ENABLED:
+            return None, None
+
+        with timed_stage("perceptual_hash", "image"):
+            value = await self.analyzer.executor.run("image", image_phash, image_data)
+        match = self.near_duplicates.nearest(value)
+        if match is None:
+            return hash_to_hex(value), None
+
+        verification_id, distance = match
+        prior = await self.get_status(verification_id)
+        if prior is None or prior.get("status") != "completed":
+            return hash_to_hex(value), None
+
+        analysis_result = dict(prior.get("analysis_result") or {})
+        analysis_result["near_duplicate"] = {
+            "verification_id": verification_id,
+            "hamming_distance": distance
+        }
+        return hash_to_hex(value), {
+            "analysis_result": analysis_result,
+            "classification_result": prior.get("classification_result")
+        }
+
+    async def find_cached(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a previous result for the same content, from memory or from MongoDB
+        """
+        cached = self.cache.get(content_hash)
+        if cached is not None or not settings.RESULT_CACHE_PERSISTENT:
+            return cached
+
+        verification = await self.repository.find_by_content_hash(
+            content_hash,
+            self.cache.model_version
+        )
+        if verification is None:
+            return None
+
+        cached = {
+            "analysis_result": verification["analysis_result"],
+            "classification_result": verification["classification_result"]
+        }
+        self.cache.set(content_hash, cached)
+        self.cache.record_persistent_hit()
+        return cached
+
+    async def find_cached_many(self, content_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Previous results for many hashes: memory tier first, then one MongoDB query for the rest
+        """
+        found = {}
+        missing = []
+        for content_hash in content_hashes:
+            cached = self.cache.get(content_hash)
+            if cached is not None:
+                found[content_hash] = cached
+            else:
+                missing.append(content_hash)
+
+        if missing and settings.RESULT_CACHE_PERSISTENT:
+            verifications = await self.repository.find_many_by_content_hash(
+                missing,
+                self.cache.model_version
+            )
+            for content_hash, verification in verifications.items():
+                cached = {
+                    "analysis_result": verification["analysis_result"],
+                    "classification_result": verification["classification_result"]
+                }
+                self.cache.set(content_hash, cached)
+                self.cache.record_persistent_hit()
+                found[content_hash] = cached
+        return found
+
+    async def process_many(
+        self,
+        verifications: List[VerificationCreate],
+        contents: List[str]
+    ) -> List[VerificationInDB]:
+        """
+        Verify many items and store them, with their final results, in a single insert
+        """
+        with timed_stage("cache_lookup", "batch"):
+            cached = await self.find_cached_many(
+                list({v.content_hash for v in verifications if v.content_hash})
+            )
+        results: List[Optional[VerificationUpdate]] = [None] * len(verifications)
+        pending = []
+        for i, verification in enumerate(verifications):
+            hit = cached.get(verification.content_hash)
+            if hit is not None:
+                results[i] = VerificationUpdate(status="completed", **hit)
+            else:
+                pending.append(i)
+
+        analyses = await self.analyzer.analyze_many(
+            [(contents[i], verifications[i].content_type) for i in pending]
+        )
+        analyzed = [
+            (i, analysis_result) for i, analysis_result in zip(pending, analyses)
+            if not isinstance(analysis_result, Exception)
+        ]
+        with timed_stage("classify", "batch"):
+            classifications = self.classifier.classify_many([analysis_result for _, analysis_result in analyzed])
+        classified = {i: classification for (i, _), classification in zip(analyzed, classifications)}
+        for i, analysis_result in zip(pending, analyses):
+            classification_result = classified.get(i, analysis_result)
+            if isinstance(classification_result, Exception):
+                results[i] = VerificationUpdate(status="failed", error=str(classification_result))
+                continue
+
+            results[i] = VerificationUpdate(
+                analysis_result=analysis_result,
+                classification_result=classification_result,
+                status="completed"
+            )
+            if verifications[i].content_hash:
+                self.cache.set(verifications[i].content_hash, {
+                    "analysis_result": analysis_result,
+                    "classification_result": classification_result
+                })
+
+        with timed_stage("store", "batch"):
+            return await self.repository.create_many(verifications, results)
+
+    async def verify(
+        self,
+        verification: VerificationCreate,
+        content: Union[str, bytes]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Analyze and classify content, then store the verification once with its result
+
+        Returns the new verification id and the classification. A failed
+        analysis is stored as "failed" before the error is raised.
+        """
+        try:
+            analysis_result = await self.analyzer.analyze(
+                content=content,
+                content_type=verification.content_type
+            )
+            classification_result = await self.classifier.classify(analysis_result)
+        except Exception as e:
+            await self.store(verification, VerificationUpdate(status="failed", error=str(e)))
+            raise
+
+        verification_id = await self.store(
+            verification,
+            VerificationUpdate(
+                analysis_result=analysis_result,
+                classification_result=classification_result,
+                status="completed"
+            )
+        )
+        self._remember(
+            verification_id,
+            analysis_result,
+            classification_result,
+            verification.content_hash,
+            verification.perceptual_hash
+        )
+        return verification_id, classification_result
+
+    def _remember(
+        self,
+        verification_id: str,
+        analysis_result: Dict[str, Any],
+        classification_result: Dict[str, Any],
+        content_hash: Optional[str],
+        perceptual_hash: Optional[str]
+    ) -> None:
+        if content_hash is not None:
+            self.cache.set(content_hash, {
+                "analysis_result": analysis_result,
+                "classification_result": classification_result
+            })
+        if perceptual_hash is not None:
+            self.near_duplicates.add(hash_from_hex(perceptual_hash), str(verification_id))
+
+    async def process(
+        self,
+        verification_id: str,
+        content: Union[str, bytes],
+        content_type: str,
+        content_hash: Optional[str] = None,
+        perceptual_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze and classify content, then store the result on an existing verification record
+        """
+        # Analyze content
+        analysis_result = await self.analyzer.analyze(
+            content=content,
+            content_type=content_type
+        )
+
+        # Classify content
+        classification_result = await self.classifier.classify(analysis_result)
+
+        # Update verification record with results
+        await self._record(
+            verification_id,
+            VerificationUpdate(
+                analysis_result=analysis_result,
+                classification_result=classification_result,
+                status="completed"
+            ),
+            content_type
+        )
+        self._remember(verification_id, analysis_result, classification_result, content_hash, perceptual_hash)
+        return classification_result
+
+    async def record_failure(self, verification_id: str, error: str) -> None:
+        await self._record(verification_id, VerificationUpdate(status="failed", error=error))
@@ -0,0 +1,166 @@
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import cv2
+import numpy as np
+from PIL import Image
+from app.services.perceptual_hash import hash_to_hex, phash
+
+# Key frames are downscaled before being buffered for classification
+KEY_FRAME_MAX_SIDE = 448
+
+
+def iter_sampled_frames(cap: "cv2.VideoCapture", stride: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield (frame index, BGR frame) for every ``stride``-th frame
+
+    Skipped frames are only grabbed, not decoded into images, and only one
+    frame is alive at a time, so memory does not depend on video length.
+    """
+    stride = max(1, stride)
+    index = 0
+    while True:
+        if index % stride == 0:
+            ok, frame = cap.read()
+            if not ok:
+                return
+            yield index, frame
+        elif not cap.grab():
+            return
+        index += 1
+
+
+def _histogram(frame: np.ndarray) -> np.ndarray:
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    histogram = cv2.calcHist([hsv], [0, 1], None, [16, 16], [0, 180, 0, 256])
+    return cv2.normalize(histogram, histogram).flatten()
+
+
+def _downscale(frame: np.ndarray) -> Image.Image:
+    height, width = frame.shape[:2]
+    scale = KEY_FRAME_MAX_SIDE / max(height, width)
+    if scale < 1:
+        frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+def analyze_video_file(
+    path: str,
+    classify_batch: Callable[[List[Image.Image]], List[Any]],
+    stride: int = 5,
+    scene_threshold: float = 0.4,
+    max_key_frames: int = 32,
+    batch_size: int = 8
+) -> Dict[str, Any]:
+    """
+    Sample frames, split scenes on histogram changes and classify one key frame per scene
+
+    Key frames are classified in batches of ``batch_size`` as they are found,
+    so at most one batch of downscaled frames is held in memory.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError("Could not open video file")
+
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        metadata = {
+            "fps": fps,
+            "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        }
+
+        def timestamp(frame_index: int) -> Optional[float]:
+            return frame_index / fps if fps else None
+
+        key_frames: List[Dict[str, Any]] = []
+        scenes: List[Dict[str, Any]] = []
+        pending_images: List[Image.Image] = []
+        pending_frames: List[Dict[str, Any]] = []
+
+        classification_seconds = 0.0
+
+        def flush() -> None:
+            nonlocal classification_seconds
+            if not pending_images:
+                return
+            flush_start = time.perf_counter()
+            for key_frame, classification in zip(pending_frames, classify_batch(pending_images)):
+                key_frame["classification"] = classification
+            pending_images.clear()
+            pending_frames.clear()
+            classification_seconds += time.perf_counter() - flush_start
+
+        previous_histogram = None
+        last_index = 0
+        sampled = 0
+        start = time.perf_counter()
+
+        for index, frame in iter_sampled_frames(cap, stride):
+            sampled += 1
+            last_index = index
+            histogram = _histogram(frame)
+            is_new_scene = previous_histogram is None or cv2.compareHist(
+                previous_histogram, histogram, cv2.HISTCMP_BHATTACHARYYA
+            ) > scene_threshold
+            previous_histogram = histogram
+
+            if not is_new_scene:
+                continue
+
+            if scenes:
+                scenes[-1]["end_frame"] = index - 1
+                scenes[-1]["end_time"] = timestamp(index - 1)
+            scenes.append({"start_frame": index, "start_time": timestamp(index)})
+
+            if len(key_frames) >= max_key_frames:
+                continue
+            image = _downscale(frame)
+            key_frame = {
+                "frame_index": index,
+                "timestamp": timestamp(index),
+                "perceptual_hash": hash_to_hex(phash(image))
+            }
+            key_frames.append(key_frame)
+            pending_images.append(image)
+            pending_frames.append(key_frame)
+            if len(pending_images) >= batch_size:
+                flush()
+
+        flush()
+        # Decode throughput excludes the time spent classifying key frames
+        elapsed = time.perf_counter() - start - classification_seconds
+        if scenes:
+            scenes[-1]["end_frame"] = last_index
+            scenes[-1]["end_time"] = timestamp(last_index)
+
+        frames_read = last_index + 1 if sampled else 0
+        metadata.update({
+            "frames_read": frames_read,
+            "frames_sampled": sampled,
+            "decode_seconds": elapsed,
+            "classification_seconds": classification_seconds,
+            "decode_fps": frames_read / elapsed if elapsed > 0 else 0.0
+        })
+    finally:
+        cap.release()
+
+    return {
+        "metadata": metadata,
+        "key_frames": key_frames,
+        "scenes": scenes,
+        "objects": _aggregate_objects(key_frames)
+    }
+
+
+def _aggregate_objects(key_frames: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Highest score and number of key frames for every label seen in the video
+    """
+    objects: Dict[str, Dict[str, Any]] = {}
+    for key_frame in key_frames:
+        for prediction in key_frame.get("classification") or []:
+            entry = objects.setdefault(prediction["label"], {"label": prediction["label"], "score": 0.0, "frames": 0})
+            entry["score"] = max(entry["score"], prediction["score"])
+            entry["frames"] += 1
+    return sorted(objects.values(), key=lambda entry: entry["score"], reverse=True)
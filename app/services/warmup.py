@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.services.claims import ClaimMatcher, claim_matcher
+from app.services.executor import InferenceExecutor, inference_executor
+from app.services.model_registry import ModelRegistry, model_registry
+
+logger = logging.getLogger(__name__)
+
+# Upper bound of the delay between warm-up attempts
+MAX_RETRY_SECONDS = 300
+
+
+def preload_modalities() -> Optional[List[str]]:
+    """
+    Modalities whose models are loaded at startup, or None when models load on first use
+    """
+    if settings.MODEL_LAZY_LOADING:
+        return None
+    return [m.strip() for m in settings.MODEL_PRELOAD_MODALITIES.split(",") if m.strip()]
+
+
+class ModelWarmup:
+    """
+    Loads the claim index and the preloaded models in a background task after startup
+
+    The worker accepts connections (and answers /healthz) while models load;
+    ``ready`` turns true once loading and the warm-up pass have finished, which
+    is what /readyz reports so orchestrators only route traffic to warm
+    workers. Requests arriving earlier still work: the registry loads a model
+    on first use and concurrent loads of the same model wait for each other.
+    A failed attempt is retried with exponential backoff when ``retry_seconds``
+    is set; otherwise ``wait`` raises its error. Work that needs the loaded
+    models (the claim indexer) is registered with ``on_ready``.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry = model_registry,
+        executor: InferenceExecutor = inference_executor,
+        claims: ClaimMatcher = claim_matcher
+    ):
+        self.registry = registry
+        self.executor = executor
+        self.claims = claims
+
+        self._task: Optional[asyncio.Task] = None
+        self._callbacks: List[Callable[[], Awaitable[None]]] = []
+        self._loaded = False
+        self._claims_available: Optional[bool] = None
+        self._exception: Optional[Exception] = None
+        self.error: Optional[str] = None
+        self._attempts = 0
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return (
+            self._task is not None
+            and self._task.done()
+            and not self._task.cancelled()
+            and self.error is None
+        )
+
+    def start(self, modalities: Optional[List[str]], warmup: bool = True, retry_seconds: float = 0) -> None:
+        """
+        Start loading; ``modalities`` None loads only the claim index (lazy model loading)
+        """
+        if self._task is not None:
+            return
+        self._started_at = time.perf_counter()
+        self._task = asyncio.create_task(self._run(modalities, warmup, retry_seconds), name="model-warmup")
+
+    async def wait(self) -> None:
+        """
+        Wait for the warm-up to finish; raises the error of a failed attempt that is not retried
+        """
+        if self._task is not None:
+            await asyncio.shield(self._task)
+        if self._exception is not None:
+            raise self._exception
+
+    async def on_ready(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """
+        Run ``callback`` once the models are loaded, or now if they already are
+        """
+        if self._loaded:
+            await callback()
+        else:
+            self._callbacks.append(callback)
+
+    async def _run(self, modalities: Optional[List[str]], warmup: bool, retry_seconds: float) -> None:
+        delay = retry_seconds
+        try:
+            while True:
+                self._attempts += 1
+                try:
+                    await self._load(modalities, warmup)
+                    break
+                except Exception as e:
+                    self.error = str(e)
+                    logger.exception("Model warm-up failed (attempt %d)", self._attempts)
+                    if retry_seconds <= 0:
+                        self._exception = e
+                        return
+                await asyncio.sleep(delay)
+                delay = min(2 * delay, MAX_RETRY_SECONDS)
+            self.error = None
+            self._loaded = True
+        finally:
+            self._finished_at = time.perf_counter()
+
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                await callback()
+            except Exception:
+                logger.exception("Post warm-up task failed")
+
+    async def _load(self, modalities: Optional[List[str]], warmup: bool) -> None:
+        # Opened once; a retry only loads the models
+        if self._claims_available is None:
+            self._claims_available = await self.executor.run("startup", self.claims.load)
+        if modalities is None:
+            return
+        # The claim encoder is only needed when the index holds claims
+        if not self._claims_available:
+            modalities = [m for m in modalities if m != "claims"]
+        await self.executor.run("startup", self.registry.load_all, modalities)
+        if warmup:
+            await self.executor.run("startup", self.registry.warmup)
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        seconds = None
+        if self._started_at is not None:
+            seconds = (self._finished_at or time.perf_counter()) - self._started_at
+        return {
+            "started": self._task is not None,
+            "finished": self._finished_at is not None,
+            "ready": self.ready,
+            "error": self.error,
+            "attempts": self._attempts,
+            "seconds": seconds
+        }
+
+
+model_warmup = ModelWarmup()
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.core.config import settings
+from app.repositories.verification import VerificationRepository
+
+logger = logging.getLogger(__name__)
+
+# An insert retried after it was written the first time
+DUPLICATE_KEY = 11000
+
+
+class WriteBehindBuffer:
+    """
+    Buffers final verification results and writes them in periodic bulk_write batches
+
+    Requests return as soon as their result is buffered; a background task
+    flushes up to ``batch_size`` operations every ``flush_ms`` (or as soon as a
+    batch is full) in one unordered ``bulk_write``. The buffer is bounded:
+    when ``max_size`` operations are waiting, writers wait for the next flush.
+    Buffered documents are served by ``get`` until they are written, and
+    ``stop`` flushes everything. Operations of a failed write are retried,
+    alone and with exponential backoff from ``retry_ms``, before newer ones
+    are flushed; they stay readable meanwhile. Results buffered when the
+    process dies are lost, which is the trade-off of this mode over direct
+    writes.
+    """
+
+    def __init__(
+        self,
+        repository: VerificationRepository,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_ms: float = 100,
+        retry_ms: float = 200,
+        max_retry_ms: float = 10000
+    ):
+        self.repository = repository
+        self.max_size = max(1, max_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_ms) / 1000
+        self.retry_delay = max(0.0, retry_ms) / 1000
+        self.max_retry_delay = max(self.retry_delay, max_retry_ms / 1000)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # The batch being collected; flushes hold the lock so stop never interrupts one
+        self._batch: List[Any] = []
+        self._lock = asyncio.Lock()
+        # Latest known state of every verification with unwritten operations
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_operations: Dict[str, int] = {}
+
+        self._buffered = 0
+        self._flushes = 0
+        self._written = 0
+        self._retried = 0
+        self._failed = 0
+        self._flushed_operations = 0
+        self._max_batch_size = 0
+        self._flush_seconds = 0.0
+        self._max_flush_seconds = 0.0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.create_task(self._run(), name="write-behind")
+
+    async def stop(self) -> None:
+        """
+        Stop the flush task and write everything still buffered
+        """
+        if self._task is not None:
+            async with self._lock:
+                self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._queue is not None:
+            remaining, self._batch = self._batch + self._take(self._queue.qsize()), []
+            for i in range(0, len(remaining), self.batch_size):
+                unwritten = await self._flush(remaining[i:i + self.batch_size])
+                if unwritten:
+                    # Shutting down: there is no later flush to retry in
+                    self._failed += len(unwritten)
+                    self._release(unwritten)
+                    logger.error("Dropped %d unwritten operations at shutdown", len(unwritten))
+
+    async def insert(self, document: Dict[str, Any]) -> None:
+        """
+        Buffer a complete verification document, which must already have its _id
+        """
+        verification_id = str(document["_id"])
+        # A copy, as later updates change the pending state while the insert is encoded
+        self._pending[verification_id] = dict(document)
+        await self._put(verification_id, InsertOne(document))
+
+    async def update(self, verification_id: str, fields: Dict[str, Any]) -> None:
+        """
+        Buffer fields to set on a stored (or buffered) verification
+        """
+        verification_id = str(verification_id)
+        pending = self._pending.get(verification_id)
+        if pending is not None:
+            pending.update(fields)
+        else:
+            self._pending[verification_id] = {"_id": ObjectId(verification_id), **fields}
+        await self._put(
+            verification_id,
+            UpdateOne({"_id": ObjectId(verification_id)}, {"$set": fields})
+        )
+
+    def get(self, verification_id: str) -> Optional[Dict[str, Any]]:
+        """
+        The buffered state of a verification not written yet, if any
+        """
+        return self._pending.get(str(verification_id))
+
+    async def _put(self, verification_id: str, operation: Any) -> None:
+        if self._queue is None:
+            await self.start()
+        self._pending_operations[verification_id] = self._pending_operations.get(verification_id, 0) + 1
+        # Waits for the next flush when the buffer is full
+        await self._queue.put((verification_id, operation))
+        self._buffered += 1
+
+    def _take(self, limit: int) -> List[Any]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        delay = self.retry_delay
+        while True:
+            if self._batch:
+                # Retry the unwritten operations of the last flush before newer ones
+                await asyncio.sleep(delay)
+                delay = min(2 * delay, self.max_retry_delay)
+            else:
+                delay = self.retry_delay
+                self._batch = [await self._queue.get()]
+                deadline = loop.time() + self.flush_interval
+                while len(self._batch) < self.batch_size:
+                    self._batch.extend(self._take(self.batch_size - len(self._batch)))
+                    timeout = deadline - loop.time()
+                    if len(self._batch) >= self.batch_size or timeout <= 0:
+                        break
+                    try:
+                        self._batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            async with self._lock:
+                self._batch = await self._flush(self._batch)
+                self._retried += len(self._batch)
+
+    async def _flush(self, batch: List[Any]) -> List[Any]:
+        """
+        Write a batch; returns the operations that were not confirmed written
+        """
+        if not batch:
+            return []
+        start = time.perf_counter()
+        try:
+            await self.repository.bulk_write([operation for _, operation in batch])
+            unwritten = []
+            self._release(batch)
+        except BulkWriteError as e:
+            if e.details.get("writeConcernErrors"):
+                # Applied, but not confirmed at the write concern: write it all again
+                unwritten = batch
+            else:
+                failed = {
+                    error["index"] for error in e.details.get("writeErrors", [])
+                    if error.get("code") != DUPLICATE_KEY
+                }
+                unwritten = [entry for i, entry in enumerate(batch) if i in failed]
+                self._release([entry for i, entry in enumerate(batch) if i not in failed])
+            logger.warning("Write-behind flush wrote %d of %d operations", len(batch) - len(unwritten), len(batch))
+        except Exception:
+            unwritten = batch
+            logger.exception("Write-behind flush of %d operations failed", len(batch))
+        elapsed = time.perf_counter() - start
+
+        self._flushes += 1
+        self._flushed_operations += len(batch)
+        self._max_batch_size = max(self._max_batch_size, len(batch))
+        self._flush_seconds += elapsed
+        self._max_flush_seconds = max(self._max_flush_seconds, elapsed)
+        self._written += len(batch) - len(unwritten)
+        return unwritten
+
+    def _release(self, entries: List[Any]) -> None:
+        """
+        Stop serving the buffered state of verifications whose operations are all done
+        """
+        for verification_id, _ in entries:
+            remaining = self._pending_operations[verification_id] - 1
+            if remaining:
+                self._pending_operations[verification_id] = remaining
+            else:
+                del self._pending_operations[verification_id]
+                self._pending.pop(verification_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self.max_size,
+            "operations": self._buffered,
+            "written": self._written,
+            "retried": self._retried,
+            "failed": self._failed,
+            "flushes": self._flushes,
+            "mean_batch_size": self._flushed_operations / self._flushes if self._flushes else 0.0,
+            "max_batch_size": self._max_batch_size,
+            "mean_flush_ms": 1000 * self._flush_seconds / self._flushes if self._flushes else 0.0,
+            "max_flush_ms": 1000 * self._max_flush_seconds
+        }
+
+
+def create_write_behind(repository: VerificationRepository) -> Optional[WriteBehindBuffer]:
+    """
+    The write-behind buffer, or None when results are written directly (PERSISTENCE_WRITE_BEHIND)
+    """
+    if not settings.PERSISTENCE_WRITE_BEHIND:
+        return None
+    return WriteBehindBuffer(
+        repository,
+        max_size=settings.WRITE_BEHIND_MAX_SIZE,
+        batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+        flush_ms=settings.WRITE_BEHIND_FLUSH_MS,
+        retry_ms=settings.WRITE_BEHIND_RETRY_MS
+    )
@@ -0,0 +1,89 @@
+"""
+Latency, throughput and score parity of the inference backends
+
+Loads the text and image pipelines on every backend, measures single-input
+latency (p50/p99) and batched throughput, and compares scores with torch.
+Run ``python -m app.services.backends build --backend all`` first so the
+exports are cached instead of rebuilt.
+
+Usage: python -m benchmarks.bench_backends [--backends torch,onnxruntime,torch-int8-dynamic]
+"""
+import argparse
+import json
+import time
+from app.core.config import settings
+from app.services.backends import (
+    BACKENDS,
+    IMAGE_TASK,
+    TEXT_TASK,
+    check_parity,
+    load_pipeline,
+    parity_inputs
+)
+
+
+def _percentile(latencies, fraction):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+def measure(model, inputs, iterations: int, batch_size: int):
+    # Warm up once so lazy initialization is not measured
+    model(inputs[0])
+
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        model(inputs[i % len(inputs)])
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    batch = [inputs[i % len(inputs)] for i in range(batch_size)]
+    start = time.perf_counter()
+    outputs = model(batch, batch_size=batch_size)
+    throughput = len(outputs) / (time.perf_counter() - start)
+
+    return {
+        "latency_p50_ms": 1000 * _percentile(latencies, 0.5),
+        "latency_p99_ms": 1000 * _percentile(latencies, 0.99),
+        "throughput_per_second": throughput
+    }
+
+
+def run(backends, iterations: int = 50, batch_size: int = 16, tolerance: float = 0.02):
+    models = ((TEXT_TASK, settings.TEXT_MODEL_NAME), (IMAGE_TASK, settings.IMAGE_MODEL_NAME))
+    results = []
+    for task, model_name in models:
+        inputs = parity_inputs(task)
+        kwargs = {"return_all_scores": True} if task == TEXT_TASK else {}
+        reference_outputs = None
+        # torch always runs first: it is the parity reference
+        for backend in ["torch"] + [b for b in backends if b != "torch"]:
+            start = time.perf_counter()
+            model = load_pipeline(task, model_name, backend, **kwargs)
+            entry = {"task": task, "backend": backend, "load_seconds": time.perf_counter() - start}
+            entry.update(measure(model, inputs, iterations, batch_size))
+
+            outputs = [model(item) for item in inputs]
+            if reference_outputs is None:
+                reference_outputs = outputs
+            else:
+                entry["parity"] = check_parity(reference_outputs, outputs, tolerance)
+            if backend in backends:
+                results.append(entry)
+    return {"benchmark": "backends", "iterations": iterations, "batch_size": batch_size, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--tolerance", type=float, default=settings.INFERENCE_PARITY_TOLERANCE)
+    args = parser.parse_args()
+
+    backends = args.backends.split(",")
+    print(json.dumps(run(backends, args.iterations, args.batch_size, args.tolerance), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Throughput of POST /verify/batch against one POST /verify per item
+
+Requires a running server. Usage:
+python -m benchmarks.bench_batch_verify --url http://localhost:8000 [--items 256] [--batch-size 64]
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+
+
+def make_texts(count: int, run_id: str):
+    # Distinct texts so the result cache does not short-circuit the comparison
+    return [f"Benchmark {run_id} item {i}: o governo anunciou uma nova medida hoje." for i in range(count)]
+
+
+async def run(url: str, items: int = 256, batch_size: int = 64, concurrency: int = 8):
+    api = url.rstrip("/") + "/api/v1"
+    run_id = str(time.time_ns())
+    async with httpx.AsyncClient(timeout=300) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def verify_one(text):
+            async with semaphore:
+                response = await client.post(f"{api}/verify", json={"content": text, "content_type": "text"})
+                response.raise_for_status()
+
+        texts = make_texts(items, f"{run_id}-single")
+        start = time.perf_counter()
+        await asyncio.gather(*(verify_one(text) for text in texts))
+        single_seconds = time.perf_counter() - start
+
+        texts = make_texts(items, f"{run_id}-batch")
+        start = time.perf_counter()
+        for offset in range(0, items, batch_size):
+            response = await client.post(f"{api}/verify/batch", json={"items": [
+                {"content": text, "content_type": "text"} for text in texts[offset:offset + batch_size]
+            ]})
+            response.raise_for_status()
+        batch_seconds = time.perf_counter() - start
+
+    return {
+        "benchmark": "batch_verify",
+        "items": items,
+        "batch_size": batch_size,
+        "single_concurrency": concurrency,
+        "single_items_per_second": items / single_seconds,
+        "batch_items_per_second": items / batch_seconds,
+        "speedup": single_seconds / batch_seconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--items", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.url, args.items, args.batch_size, args.concurrency)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Query latency and recall of the claim-matching index as the corpus grows
+
+Builds synthetic indexes of clustered 768-d embeddings (the size of the
+Portuguese BERT model) and queries them with perturbed stored vectors.
+Recall is measured against an exhaustive search over the same index.
+Latency is measured again while another thread appends claims to the
+delta segment, as the incremental indexer does, and the time to reopen
+the index from disk with a delta snapshot is reported.
+
+Usage: python -m benchmarks.bench_claim_index [--sizes 100000,1000000] [--dtype int8]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from app.services.claims import ClaimIndex, default_ivf_lists, normalize, write_index
+
+DIM = 768
+
+
+def synthetic_batches(count: int, topics: int, batch_size: int = 10000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, DIM)).astype(np.float32)
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        members = centers[rng.integers(topics, size=size)]
+        yield members + rng.normal(scale=0.8, size=(size, DIM)).astype(np.float32)
+
+
+def query_latencies(index, probes, k, nprobe):
+    latencies = []
+    found = []
+    for probe in probes:
+        start = time.perf_counter()
+        found.append([position for position, _ in index.search(probe, k, nprobe)])
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies, found
+
+
+def percentile_ms(latencies, fraction):
+    return 1000 * latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+def run(sizes, dtype: str = "int8", queries: int = 200, k: int = 5, nprobe: int = 8):
+    results = []
+    for size in sorted(sizes):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = os.path.join(tmp, "claims")
+            ivf_lists = default_ivf_lists(size)
+            start = time.perf_counter()
+            write_index(
+                directory, size, DIM, synthetic_batches(size, topics=max(10, size // 1000)),
+                ({"claim": str(i), "verdict": "falso"} for i in range(size)), dtype, ivf_lists
+            )
+            build_seconds = time.perf_counter() - start
+
+            index = ClaimIndex(directory)
+            rng = np.random.default_rng(1)
+            positions = rng.integers(size, size=queries)
+            probes = normalize(
+                np.asarray(index.embeddings[positions], dtype=np.float32)
+                + rng.normal(scale=0.02, size=(queries, DIM)).astype(np.float32)
+            )
+
+            latencies, found = query_latencies(index, probes, k, nprobe)
+
+            # Exhaustive search over the same rows is the recall reference
+            recall_queries = min(queries, 20)
+            centroids, index.centroids = index.centroids, None
+            hits = 0
+            for probe, approximate in zip(probes[:recall_queries], found):
+                exact = {position for position, _ in index.search(probe, k)}
+                hits += len(exact & set(approximate))
+            index.centroids = centroids
+
+            # Append batches of 64 claims concurrently with the queries
+            stop = threading.Event()
+            appended = synthetic_batches(10 ** 9, topics=100, batch_size=64, seed=2)
+
+            def ingest():
+                while not stop.is_set():
+                    batch = next(appended)
+                    index.append(batch, [{"claim": "nova", "verdict": "falso"}] * len(batch))
+                    time.sleep(0.005)
+
+            ingest_thread = threading.Thread(target=ingest)
+            ingest_thread.start()
+            ingest_latencies, _ = query_latencies(index, probes, k, nprobe)
+            stop.set()
+            ingest_thread.join()
+            delta_size = index.delta_count
+
+            index.save_delta()
+            index.close()
+            start = time.perf_counter()
+            ClaimIndex(directory).close()
+            open_seconds = time.perf_counter() - start
+
+            results.append({
+                "size": size,
+                "dtype": dtype,
+                "ivf_lists": ivf_lists,
+                "nprobe": nprobe,
+                "build_seconds": build_seconds,
+                "query_p50_ms": percentile_ms(latencies, 0.5),
+                "query_p99_ms": percentile_ms(latencies, 0.99),
+                "recall_at_k": hits / (recall_queries * k),
+                "ingest_query_p50_ms": percentile_ms(ingest_latencies, 0.5),
+                "ingest_query_p99_ms": percentile_ms(ingest_latencies, 0.99),
+                "ingest_delta_size": delta_size,
+                "open_with_delta_seconds": open_seconds
+            })
+    return {"benchmark": "claim_index", "dim": DIM, "k": k, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--dtype", default="int8", choices=["float16", "int8"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=8)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(json.dumps(run(sizes, args.dtype, args.queries, args.k, args.nprobe), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Image ingestion: decode and normalization throughput and peak memory per image
+
+Compares the full-resolution decode the image pipeline used to receive
+(``Image.open`` + ``load``, then a resize to the model input) with the
+ingestion stage (JPEG draft decoding at the model resolution, ``reduce``
+for the rest, normalization into a reused float32 batch). Synthetic phone
+sized photos are generated once; each mode runs in a fresh interpreter so
+the peak RSS increase it reports (per image in flight) is its own. Linux only.
+
+Usage: python -m benchmarks.bench_image_ingest [--megapixels 12] [--images 40] [--batch-size 8]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict
+import numpy as np
+from PIL import Image
+
+MODES = ("full_decode", "ingest")
+
+_PROBE = """
+import io, json, sys, time
+import numpy as np
+from PIL import Image
+from app.services.image_preprocessing import ImagePreprocessor, ImageSpec
+from benchmarks.bench_image_ingest import RESNET_SPEC
+
+mode, path, count, batch_size = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+data = open(path, "rb").read()
+spec = ImageSpec(**RESNET_SPEC)
+preprocessor = ImagePreprocessor()
+
+def peak_rss_kb():
+    # VmHWM starts over at exec, unlike ru_maxrss, which keeps the parent's peak
+    for line in open("/proc/self/status"):
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1])
+
+baseline = peak_rss_kb()
+
+def full_decode(data):
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    image = image.convert("RGB").resize(spec.resized_size(image.size), spec.resample)
+    return np.asarray(image, dtype=np.float32)
+
+start = time.perf_counter()
+for offset in range(0, count, batch_size):
+    n = min(batch_size, count - offset)
+    if mode == "full_decode":
+        batch = [full_decode(data) for _ in range(n)]
+    else:
+        images = [image for image, _ in preprocessor.decode_many([data] * n, spec)]
+        batch = preprocessor.to_batch(images, spec)
+elapsed = time.perf_counter() - start
+peak = peak_rss_kb()
+print(json.dumps({"seconds": elapsed, "peak_rss_increase_kb": peak - baseline}))
+"""
+
+# Input geometry of microsoft/resnet-50
+RESNET_SPEC = {"crop": (224, 224), "resize_shortest": 256, "resample": 3}
+
+
+def sample_photo(megapixels: float, seed: int = 0) -> bytes:
+    """
+    A 4:3 JPEG with smooth gradients and noise, compressed like a phone photo
+    """
+    height = int((megapixels * 1e6 * 3 / 4) ** 0.5)
+    width = height * 4 // 3
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    pixels += rng.normal(scale=12, size=pixels.shape).astype(np.float32)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.clip(0, 255).astype(np.uint8)).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def run_mode(mode: str, path: str, images: int, batch_size: int) -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE, mode, path, str(images), str(batch_size)],
+        capture_output=True,
+        text=True
+    )
+    if output.returncode != 0:
+        return {"error": output.stderr.strip().splitlines()[-1]}
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    return {
+        "images_per_second": images / result["seconds"],
+        "ms_per_image": 1000 * result["seconds"] / images,
+        "peak_memory_per_image_mb": result["peak_rss_increase_kb"] / 1024 / batch_size
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megapixels", type=float, default=12)
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "photo.jpg")
+        with open(path, "wb") as f:
+            f.write(sample_photo(args.megapixels))
+        results: Dict[str, Any] = {
+            "benchmark": "image_ingest",
+            "megapixels": args.megapixels,
+            "jpeg_bytes": os.path.getsize(path),
+            "batch_size": args.batch_size
+        }
+        for mode in MODES:
+            results[mode] = run_mode(mode, path, args.images, args.batch_size)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Lookup cost of the perceptual-hash near-duplicate index as it grows
+
+Usage: python -m benchmarks.bench_perceptual_index [--sizes 10000,100000,1000000]
+"""
+import argparse
+import json
+import random
+import time
+from app.services.perceptual_hash import MultiIndexHashIndex
+
+
+def run(sizes, queries: int = 2000, max_distance: int = 6, chunks: int = 4, seed: int = 0):
+    rng = random.Random(seed)
+    index = MultiIndexHashIndex(max_distance=max_distance, chunks=chunks)
+    results = []
+
+    for size in sorted(sizes):
+        start = time.perf_counter()
+        while len(index) < size:
+            index.add(rng.getrandbits(64), len(index))
+        build_seconds = time.perf_counter() - start
+
+        # Half of the queries are perturbed copies of stored hashes, half are random
+        stored = [index._hashes[rng.randrange(len(index))] for _ in range(queries // 2)]
+        probes = []
+        for value in stored:
+            for _ in range(rng.randrange(max_distance + 1)):
+                value ^= 1 << rng.randrange(64)
+            probes.append(value)
+        probes += [rng.getrandbits(64) for _ in range(queries - len(probes))]
+
+        latencies = []
+        found = 0
+        for probe in probes:
+            start = time.perf_counter()
+            found += index.nearest(probe) is not None
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+        results.append({
+            "size": size,
+            "build_seconds": build_seconds,
+            "lookup_mean_us": 1e6 * sum(latencies) / len(latencies),
+            "lookup_p50_us": 1e6 * latencies[len(latencies) // 2],
+            "lookup_p99_us": 1e6 * latencies[int(len(latencies) * 0.99) - 1],
+            "hit_rate": found / len(probes)
+        })
+    return {"benchmark": "perceptual_index", "max_distance": max_distance, "chunks": chunks, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--max-distance", type=int, default=6)
+    parser.add_argument("--chunks", type=int, default=4)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(json.dumps(run(sizes, args.queries, args.max_distance, args.chunks), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Listing cost of VerificationRepository over a large collection
+
+Fills a separate ``<DATABASE_NAME>_bench`` database on MONGODB_URL with
+synthetic verifications (large content and analysis results, like real
+ones) and compares deep skip/limit pages with keyset pages, full documents
+with projected summaries, and to_list with streaming iteration.
+
+Usage: python -m benchmarks.bench_repository [--documents 1000000] [--depth 500000]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.core.database import close_mongo_connection, connect_to_mongo, get_database
+from app.repositories.verification import SUMMARY_PROJECTION, VerificationRepository, encode_cursor
+
+
+def synthetic_document(i: int, start: datetime, rng: random.Random):
+    created_at = start + timedelta(milliseconds=i * 10)
+    return {
+        "content": "Texto de exemplo para benchmark. " * rng.randint(20, 200),
+        "content_type": rng.choice(["text", "text", "text", "image", "video"]),
+        "content_hash": f"sha256:{rng.getrandbits(256):064x}",
+        "model_version": settings.MODEL_VERSION,
+        "status": rng.choice(["completed"] * 8 + ["failed", "pending"]),
+        "analysis_result": {
+            "type": "text",
+            "sentiment": [{"label": f"LABEL_{j}", "score": rng.random()} for j in range(2)],
+            "claim_matches": [{"claim": "alegação " * 30, "similarity": rng.random()} for _ in range(5)]
+        },
+        "classification_result": {"label": "Suspeito", "confidence": rng.random(), "sources": []},
+        "created_at": created_at,
+        "updated_at": created_at
+    }
+
+
+async def fill(collection, documents: int, batch_size: int = 5000):
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    for offset in range(0, documents, batch_size):
+        await collection.insert_many(
+            [synthetic_document(i, start, rng) for i in range(offset, min(offset + batch_size, documents))],
+            ordered=False
+        )
+
+
+async def timed(coroutine):
+    start = time.perf_counter()
+    result = await coroutine
+    return result, 1000 * (time.perf_counter() - start)
+
+
+async def run(documents: int, depth: int, page_size: int, export_size: int, refill: bool):
+    settings.DATABASE_NAME = f"{settings.DATABASE_NAME}_bench"
+    await connect_to_mongo()
+    repository = VerificationRepository()
+    collection = get_database().verifications
+    if refill or await collection.estimated_document_count() != documents:
+        await collection.drop()
+        await fill(collection, documents)
+    await repository.create_indexes()
+
+    sort = [("created_at", -1), ("_id", -1)]
+    _, skip_ms = await timed(collection.find({}, sort=sort).skip(depth).limit(page_size).to_list(page_size))
+
+    # Cursor of the document just before the same depth
+    boundary = await collection.find({}, {"created_at": 1}, sort=sort).skip(depth - 1).limit(1).to_list(1)
+    cursor = encode_cursor(boundary[0]["created_at"], boundary[0]["_id"])
+    _, keyset_ms = await timed(repository.list_page(page_size, cursor))
+
+    _, full_page_ms = await timed(collection.find({}, sort=sort).limit(page_size).to_list(page_size))
+    _, projected_page_ms = await timed(
+        collection.find({}, SUMMARY_PROJECTION, sort=sort).limit(page_size).to_list(page_size)
+    )
+
+    tracemalloc.start()
+    _, to_list_ms = await timed(collection.find({}, sort=sort).limit(export_size).to_list(export_size))
+    to_list_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+
+    async def stream():
+        count = 0
+        async for _ in repository.iter_verifications(limit=export_size):
+            count += 1
+        return count
+
+    _, stream_ms = await timed(stream())
+    stream_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    await close_mongo_connection()
+
+    return {
+        "benchmark": "repository",
+        "documents": documents,
+        "depth": depth,
+        "page_size": page_size,
+        "skip_limit_page_ms": skip_ms,
+        "keyset_page_ms": keyset_ms,
+        "full_document_page_ms": full_page_ms,
+        "projected_page_ms": projected_page_ms,
+        "export_size": export_size,
+        "to_list_full_ms": to_list_ms,
+        "to_list_full_peak_bytes": to_list_peak,
+        "stream_projected_ms": stream_ms,
+        "stream_projected_peak_bytes": stream_peak
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=1000000)
+    parser.add_argument("--depth", type=int, default=500000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--export-size", type=int, default=100000)
+    parser.add_argument("--refill", action="store_true")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(
+        run(args.documents, args.depth, args.page_size, args.export_size, args.refill)
+    ), indent=2))
+
+
+if __name__ == "__main__":
+    main()
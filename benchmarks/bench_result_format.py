@@ -0,0 +1,128 @@
+"""
+Stored size and read cost of full versus compact analysis results
+
+Encodes synthetic text, image and video verifications in both formats and
+measures the mean BSON document size, and the time to decode a document and
+read its verdict: the full format through VerificationInDB, the compact one
+through the lazy CompactResult view. Runs offline, without MongoDB.
+
+Usage: python -m benchmarks.bench_result_format [--documents 5000] [--top-k 5]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+import bson
+from app.models.database import VerificationInDB
+from app.repositories.result_codec import CompactResult, LabelVocabulary, encode_result
+
+IMAGE_LABELS = [f"imagenet class {i}" for i in range(1000)]
+
+
+def predictions(rng: random.Random, labels, count: int):
+    return [{"label": label, "score": rng.random()} for label in rng.sample(labels, count)]
+
+
+def synthetic_result(i: int, rng: random.Random):
+    content_type = ("text", "text", "image", "video")[i % 4]
+    if content_type == "text":
+        content = "O governo anunciou hoje uma nova medida econômica. " * rng.randint(5, 60)
+        return content, {
+            "id": f"analysis-{i}",
+            "type": "text",
+            "content": content,
+            "sentiment": [[{"label": f"LABEL_{j}", "score": rng.random()} for j in range(3)]],
+            "claim_matches": [],
+            "entities": [],
+            "topics": [],
+            "metadata": {"length": len(content), "language": "pt", "tokens": 300, "windows": 1}
+        }
+    if content_type == "image":
+        return "blob:sha256:" + "0" * 64, {
+            "id": f"analysis-{i}",
+            "type": "image",
+            "classification": predictions(rng, IMAGE_LABELS, 5),
+            "metadata": {"format": "JPEG", "size": [1024, 768], "mode": "RGB"}
+        }
+    key_frames = [
+        {"frame_index": 25 * j, "timestamp": j, "perceptual_hash": "f" * 16,
+         "classification": predictions(rng, IMAGE_LABELS, 5)}
+        for j in range(rng.randint(4, 32))
+    ]
+    return "blob:sha256:" + "1" * 64, {
+        "id": f"analysis-{i}",
+        "type": "video",
+        "metadata": {"fps": 25.0, "frame_count": 3000},
+        "analysis": {"key_frames": key_frames, "objects": [], "scenes": []}
+    }
+
+
+def document(i: int, content: str, analysis_result):
+    now = datetime.utcnow()
+    return {
+        "content": content,
+        "content_type": analysis_result["type"],
+        "content_hash": f"sha256:{i:064x}",
+        "model_version": "1",
+        "status": "completed",
+        "analysis_result": analysis_result,
+        "classification_result": {"label": "Suspeito", "confidence": 0.6, "explanation": "", "sources": []},
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+def read_full(raw: bytes):
+    return VerificationInDB.model_validate(bson.decode(raw)).classification_result["label"]
+
+
+def read_compact(raw: bytes, vocabulary: LabelVocabulary):
+    verification = bson.decode(raw)
+    verification["analysis_result"] = CompactResult(verification["analysis_result"], vocabulary)
+    return verification["classification_result"]["label"]
+
+
+async def run(documents: int, top_k: int):
+    rng = random.Random(0)
+    vocabulary = LabelVocabulary()
+    full, compact = [], []
+    for i in range(documents):
+        content, analysis_result = synthetic_result(i, rng)
+        full.append(bson.encode(document(i, content, analysis_result)))
+        compact.append(bson.encode(document(
+            i, content, await encode_result(analysis_result, vocabulary, top_k=top_k)
+        )))
+
+    start = time.perf_counter()
+    for raw in full:
+        read_full(raw)
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for raw in compact:
+        read_compact(raw, vocabulary)
+    compact_seconds = time.perf_counter() - start
+
+    return {
+        "benchmark": "result_format",
+        "documents": documents,
+        "top_k": top_k,
+        "full_mean_bytes": sum(map(len, full)) / documents,
+        "compact_mean_bytes": sum(map(len, compact)) / documents,
+        "full_read_us": 1e6 * full_seconds / documents,
+        "compact_read_us": 1e6 * compact_seconds / documents
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.documents, args.top_k)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
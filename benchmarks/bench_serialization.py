@@ -0,0 +1,130 @@
+"""
+Response encoding cost of /status and /verify: FastAPI defaults against the orjson path
+
+The default path is what the routes did before: /status returned the stored
+document's fields through jsonable_encoder and the stdlib JSON encoder, and
+/verify built a VerificationResponse that FastAPI validated and serialized.
+The fast path encodes the same dicts directly with FastJSONResponse. Runs
+offline, on synthetic stored documents.
+
+Usage: python -m benchmarks.bench_serialization [--iterations 20000]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.api.responses import FastJSONResponse
+from app.api.routes import VerificationResponse, _status_payload
+from app.repositories.result_codec import CompactResult, LabelVocabulary, encode_result, plain_result
+
+
+def status_document(vocabulary: LabelVocabulary):
+    rng = random.Random(0)
+    analysis_result = {
+        "id": "analysis-1",
+        "type": "video",
+        "metadata": {"fps": 25.0, "frame_count": 3000, "decode_fps": 412.5},
+        "analysis": {
+            "key_frames": [
+                {"frame_index": 25 * i, "timestamp": float(i), "perceptual_hash": "f" * 16,
+                 "classification": [{"label": f"class {rng.randrange(1000)}", "score": rng.random()} for _ in range(5)]}
+                for i in range(16)
+            ],
+            "objects": [{"label": f"class {i}", "score": rng.random(), "frames": 2} for i in range(20)],
+            "scenes": [{"start_frame": 100 * i, "end_frame": 100 * i + 99} for i in range(16)]
+        }
+    }
+    raw = asyncio.run(encode_result(analysis_result, vocabulary))
+    return {
+        "_id": ObjectId(),
+        "status": "completed",
+        "analysis_result": raw,
+        "classification_result": {
+            "label": "Suspeito",
+            "confidence": 0.6,
+            "explanation": "Video analysis pending implementation",
+            "sources": []
+        }
+    }
+
+
+def timed(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return 1e6 * (time.perf_counter() - start) / iterations
+
+
+def run(iterations: int):
+    vocabulary = LabelVocabulary()
+    document = status_document(vocabulary)
+
+    def fresh_payload():
+        # Every request reads a new document, so lazy decoding is not cached between runs
+        return _status_payload({**document, "analysis_result": CompactResult(document["analysis_result"], vocabulary)})
+
+    def status_default():
+        payload = fresh_payload()
+        payload["analysis_result"] = plain_result(payload["analysis_result"])
+        return JSONResponse(jsonable_encoder(payload)).body
+
+    def status_fast():
+        return FastJSONResponse(fresh_payload()).body
+
+    classification_result = document["classification_result"]
+    response_field = create_response_field(name="response", type_=VerificationResponse, mode="serialization")
+    verification_id = str(document["_id"])
+
+    def verify_default():
+        model = VerificationResponse(
+            verification_id=verification_id,
+            status="completed",
+            confidence=classification_result["confidence"],
+            classification=classification_result["label"],
+            explanation=classification_result["explanation"],
+            sources=classification_result["sources"]
+        )
+        content = asyncio.run(serialize_response(field=response_field, response_content=model))
+        return JSONResponse(content).body
+
+    def verify_fast():
+        return FastJSONResponse({
+            "verification_id": verification_id,
+            "status": "completed",
+            "confidence": classification_result["confidence"],
+            "classification": classification_result["label"],
+            "explanation": classification_result["explanation"],
+            "sources": classification_result["sources"]
+        }).body
+
+    assert json.loads(status_default()) == json.loads(status_fast())
+    assert json.loads(verify_default()) == json.loads(verify_fast())
+
+    # asyncio.run dominates a single serialize_response call, so time it alone and subtract
+    loop_overhead = timed(lambda: asyncio.run(asyncio.sleep(0)), iterations // 10)
+    return {
+        "benchmark": "serialization",
+        "iterations": iterations,
+        "status_default_us": timed(status_default, iterations),
+        "status_orjson_us": timed(status_fast, iterations),
+        "status_bytes": len(status_fast()),
+        "verify_default_us": timed(verify_default, iterations // 10) - loop_overhead,
+        "verify_orjson_us": timed(verify_fast, iterations)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.iterations), indent=2))
+
+
+if __name__ == "__main__":
+    main()
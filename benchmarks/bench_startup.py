@@ -0,0 +1,121 @@
+"""
+Worker startup cost: import time of the application modules and time to first byte
+
+Each measurement runs in a fresh interpreter, so nothing is already
+imported or cached. The import part reports, per module, the median import
+time and which heavy libraries (torch, transformers, cv2, PIL, ...) the
+import pulled in. With --serve the benchmark also starts uvicorn on a free
+port and reports the time from process start to the first /healthz
+response and to the first 200 from /readyz (models loaded and warm).
+
+Usage: python -m benchmarks.bench_startup [--modules app.api.routes,app.main] [--repeat 5]
+       python -m benchmarks.bench_startup --serve [--app app.main:app] [--ready-timeout 600]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+import httpx
+
+HEAVY_MODULES = ("torch", "transformers", "optimum", "cv2", "PIL", "pandas", "sklearn")
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, repeat: int) -> Dict[str, Any]:
+    samples = []
+    heavy: List[str] = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True
+        )
+        if output.returncode != 0:
+            return {"error": output.stderr.strip().splitlines()[-1]}
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        heavy = result["heavy"]
+    return {
+        "median_ms": 1000 * statistics.median(samples),
+        "min_ms": 1000 * min(samples),
+        "heavy_modules_loaded": heavy
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(client: httpx.Client, path: str, deadline: float, process: subprocess.Popen) -> Optional[float]:
+    """
+    Poll until the path answers 200; returns the time it did, or None on timeout or exit
+    """
+    while time.perf_counter() < deadline and process.poll() is None:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def measure_serve(app: str, ready_timeout: float) -> Dict[str, Any]:
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+            deadline = start + ready_timeout
+            first_byte = _wait_for(client, "/healthz", deadline, process)
+            ready = _wait_for(client, "/readyz", deadline, process) if first_byte is not None else None
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        "app": app,
+        "time_to_first_byte_ms": 1000 * (first_byte - start) if first_byte is not None else None,
+        "time_to_ready_ms": 1000 * (ready - start) if ready is not None else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default="app.core.config,app.api.routes,app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--serve", action="store_true", help="also measure time to first byte under uvicorn")
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--ready-timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "benchmark": "startup",
+        "imports": {
+            module: measure_import(module, args.repeat)
+            for module in args.modules.split(",") if module
+        }
+    }
+    if args.serve:
+        results["serve"] = measure_serve(args.app, args.ready_timeout)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
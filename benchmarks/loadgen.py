@@ -0,0 +1,142 @@
+"""
+Async load generator reporting req/s and latency percentiles per endpoint
+
+Runs against the in-process ASGI app (used by ``benchmarks.suite``) or a
+live server:
+
+    python -m benchmarks.loadgen --url http://localhost:8000 [--requests 500] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import httpx
+
+API = "/api/v1"
+
+# A scenario sends request number i and returns the response
+Scenario = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def latency_summary(samples: Sequence[float]) -> Dict[str, float]:
+    """
+    p50/p95/p99/max in milliseconds of latencies given in seconds
+    """
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+
+    def percentile(q: float) -> float:
+        return 1000 * ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": 1000 * ordered[-1]
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await scenario(client, i)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "concurrency": concurrency,
+        "requests_per_second": requests / elapsed if elapsed else 0.0,
+        **latency_summary(latencies)
+    }
+
+
+def default_scenarios(run_id: str, batch_size: int = 16) -> Tuple[List[Tuple[str, Scenario]], List[str]]:
+    """
+    Scenarios for the main endpoints; /status polls ids created by the /verify scenario
+    """
+    created: List[str] = []
+
+    def text(i: Any) -> str:
+        # Distinct texts so the result cache does not short-circuit the analysis
+        return f"Carga {run_id} item {i}: o governo anunciou hoje uma nova medida para a economia."
+
+    async def verify(client, i):
+        response = await client.post(f"{API}/verify", json={"content": text(i), "content_type": "text"})
+        if response.status_code == 200:
+            created.append(response.json()["verification_id"])
+        return response
+
+    async def verify_batch(client, i):
+        return await client.post(f"{API}/verify/batch", json={"items": [
+            {"content": text(f"{i}-{j}"), "content_type": "text"} for j in range(batch_size)
+        ]})
+
+    async def status(client, i):
+        return await client.get(f"{API}/status/{created[i % len(created)]}")
+
+    async def listing(client, i):
+        return await client.get(f"{API}/verifications", params={"limit": 50})
+
+    return [
+        ("POST /verify", verify),
+        ("POST /verify/batch", verify_batch),
+        ("GET /status/{id}", status),
+        ("GET /verifications", listing)
+    ], created
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    requests: int = 500,
+    concurrency: int = 16,
+    scenarios: Optional[List[Tuple[str, Scenario]]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run every scenario in turn and report it under its endpoint name
+    """
+    if scenarios is None:
+        scenarios, _ = default_scenarios(str(time.time_ns()))
+    return {
+        name: await run_scenario(client, scenario, requests, concurrency)
+        for name, scenario in scenarios
+    }
+
+
+async def run(url: str, requests: int, concurrency: int):
+    async with httpx.AsyncClient(base_url=url.rstrip("/"), timeout=300) as client:
+        return await run_load(client, requests, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.url, args.requests, args.concurrency)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
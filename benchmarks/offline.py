@@ -0,0 +1,157 @@
+"""
+Offline stand-ins for the benchmark suite: tiny local models and an in-process MongoDB
+
+The stub pipelines keep the Hugging Face call conventions (label/score lists,
+batched calls) and do a small amount of real numpy work per input, so their
+cost scales with input size without downloading any checkpoint. The
+database is mongomock-motor, installed in place of the Motor connection.
+"""
+import hashlib
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+import numpy as np
+from PIL import Image
+from app.core.database import use_database
+from app.services.analyzer import IMAGE_MODEL, TEXT_MODEL
+from app.services.model_registry import ModelRegistry, model_registry
+
+TEXT_LABELS = ["LABEL_0", "LABEL_1"]
+IMAGE_LABELS = [f"imagenet class {i}" for i in range(1000)]
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class TinyTextClassifier:
+    """
+    Hashed bag-of-words into a random linear layer, called like a text-classification pipeline
+    """
+
+    def __init__(self, features: int = 4096, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.features = features
+        self.weights = rng.normal(size=(features, len(TEXT_LABELS))).astype(np.float32)
+
+    def _features(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.features, dtype=np.float32)
+        for token in text.lower().split():
+            vector[int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "little") % self.features] += 1
+        return vector
+
+    def __call__(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        batch = np.stack([self._features(text) for text in ([texts] if single else texts)])
+        probabilities = _softmax(batch @ self.weights)
+        results = [
+            [{"label": label, "score": float(score)} for label, score in zip(TEXT_LABELS, row)]
+            for row in probabilities
+        ]
+        return results[0] if single else results
+
+
+class TinyImageClassifier:
+    """
+    Random linear layer over a 32x32 thumbnail, called like an image-classification pipeline (top 5)
+    """
+
+    def __init__(self, size: int = 32, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.size = size
+        self.weights = rng.normal(scale=0.01, size=(size * size * 3, len(IMAGE_LABELS))).astype(np.float32)
+
+    def __call__(self, images, **kwargs):
+        single = isinstance(images, Image.Image)
+        batch = np.stack([
+            np.asarray(image.convert("RGB").resize((self.size, self.size)), dtype=np.float32).ravel() / 255
+            for image in ([images] if single else images)
+        ])
+        probabilities = _softmax(batch @ self.weights)
+        results = []
+        for row in probabilities:
+            top = np.argsort(row)[::-1][:5]
+            results.append([{"label": IMAGE_LABELS[i], "score": float(row[i])} for i in top])
+        return results[0] if single else results
+
+
+def install_models(registry: ModelRegistry = model_registry) -> None:
+    """
+    Replace the text and image pipelines with the tiny local models
+    """
+    text_model = TinyTextClassifier()
+    image_model = TinyImageClassifier()
+    registry.register(TEXT_MODEL, modality="text", loader=lambda: text_model)
+    registry.register(IMAGE_MODEL, modality="image", loader=lambda: image_model)
+    for name in (TEXT_MODEL, IMAGE_MODEL):
+        registry.unload(name)
+
+
+def install_database(name: str = "fact_checker_bench"):
+    """
+    Serve the repositories from an in-process mongomock-motor database
+    """
+    from mongomock_motor import AsyncMongoMockClient
+
+    client = AsyncMongoMockClient()
+    database = client[name]
+    use_database(database, client)
+    return database
+
+
+def sample_text(i: int, words: int = 60) -> str:
+    return f"Texto {i}: " + " ".join(f"palavra{(i * 7 + j) % 997}" for j in range(words))
+
+
+def sample_image(seed: int = 0, size: int = 256) -> bytes:
+    import io
+
+    rng = np.random.default_rng(seed)
+    image = Image.fromarray(rng.integers(0, 255, size=(size, size, 3), dtype=np.uint8))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def sample_video(directory: Optional[str] = None, frames: int = 120, size: int = 160) -> str:
+    """
+    Write a short synthetic video with a scene change every 30 frames; returns its path
+    """
+    import cv2
+
+    path = os.path.join(directory or tempfile.mkdtemp(prefix="bench-video-"), "sample.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (size, size))
+    rng = np.random.default_rng(0)
+    colors: List[Any] = []
+    for i in range(frames):
+        if i % 30 == 0:
+            colors = rng.integers(0, 255, size=3).tolist()
+        frame = np.full((size, size, 3), colors, dtype=np.uint8)
+        frame[(i * 3) % size:, :, 0] = 255 - colors[0]
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def stored_document(i: int, status: str = "completed") -> Dict[str, Any]:
+    """
+    A verification document as the repository stores it, for pre-filling the database
+    """
+    from datetime import datetime, timedelta
+    from bson import ObjectId
+
+    created_at = datetime(2024, 1, 1) + timedelta(seconds=i)
+    return {
+        "_id": ObjectId(),
+        "content": sample_text(i),
+        "content_type": "text",
+        "content_hash": f"sha256:{hashlib.sha256(sample_text(i).encode()).hexdigest()}",
+        "model_version": "1",
+        "status": status,
+        "analysis_result": None,
+        "classification_result": {"label": "Suspeito", "confidence": 0.6, "explanation": "", "sources": []},
+        "created_at": created_at,
+        "updated_at": created_at
+    }
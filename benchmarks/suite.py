@@ -0,0 +1,226 @@
+"""
+Offline performance suite: micro-benchmarks and an in-process load test
+
+Models are replaced by tiny local stand-ins and MongoDB by mongomock-motor
+(see ``benchmarks.offline``), so the suite needs no server and no downloads.
+Absolute numbers are not comparable with production; compare runs of the
+same machine against a saved baseline instead:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json [--tolerance 0.2]
+
+With ``--baseline`` the process exits with status 1 when a metric regressed
+by more than the tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import httpx
+from fastapi import FastAPI
+from benchmarks import offline
+from benchmarks.loadgen import latency_summary, run_load
+
+# Suffixes of the metrics compared against the baseline; other numbers are informative only
+HIGHER_IS_BETTER = ("_per_second",)
+LOWER_IS_BETTER = ("_ms",)
+
+
+async def measure(fn: Callable[[int], Awaitable[Any]], iterations: int, warmup: int = 5) -> Dict[str, float]:
+    """
+    Call ``fn(i)`` sequentially and report operations per second and latency percentiles
+    """
+    for i in range(warmup):
+        await fn(-1 - i)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        call_start = time.perf_counter()
+        await fn(i)
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    return {"iterations": iterations, "ops_per_second": iterations / elapsed, **latency_summary(latencies)}
+
+
+async def analyzer_benchmarks(iterations: int) -> Dict[str, Any]:
+    from app.services.analyzer import ContentAnalyzer
+
+    analyzer = ContentAnalyzer()
+    image = offline.sample_image()
+    video = offline.sample_video()
+    try:
+        return {
+            "analyze_text": await measure(lambda i: analyzer._analyze_text(offline.sample_text(i), "bench"), iterations),
+            "analyze_image": await measure(lambda i: analyzer._analyze_image(image, "bench"), iterations),
+            "analyze_video": await measure(lambda i: analyzer._analyze_video(video, "bench"), max(1, iterations // 10), 1)
+        }
+    finally:
+        await analyzer.close()
+
+
+async def classifier_benchmarks(iterations: int) -> Dict[str, Any]:
+    from app.services.classifier import ContentClassifier
+
+    classifier = ContentClassifier()
+    results = {
+        "text": {"type": "text", "sentiment": [], "claim_matches": [], "entities": [], "topics": []},
+        "image": {"type": "image", "classification": []},
+        "video": {"type": "video", "analysis": {}}
+    }
+    benchmarks = {
+        f"classify_{content_type}": await measure(lambda i, result=result: classifier.classify(result), iterations)
+        for content_type, result in results.items()
+    }
+
+    # One vectorized scoring pass over a mixed batch
+    batch = [results[content_type] for content_type in ("text", "image", "video")] * 334
+
+    async def classify_batch(i):
+        classifier.classify_many(batch)
+
+    batched = await measure(classify_batch, max(1, iterations // 100))
+    batched["items_per_second"] = batched["ops_per_second"] * len(batch)
+    batched["us_per_item"] = 1e6 / batched["items_per_second"]
+    benchmarks[f"classify_many_{len(batch)}"] = batched
+    return benchmarks
+
+
+async def repository_benchmarks(iterations: int, documents: int) -> Dict[str, Any]:
+    from app.models.database import VerificationCreate, VerificationUpdate
+    from app.repositories.verification import VerificationRepository
+
+    repository = VerificationRepository()
+    await repository.collection.insert_many([offline.stored_document(i) for i in range(documents)])
+    ids = [str(document["_id"]) async for document in repository.collection.find({}, {"_id": 1})]
+    hashes = [document["content_hash"] async for document in repository.collection.find({}, {"content_hash": 1})]
+    result = VerificationUpdate(
+        status="completed",
+        analysis_result={"type": "text", "sentiment": [{"label": "LABEL_0", "score": 0.7}]},
+        classification_result={"label": "Suspeito", "confidence": 0.6, "explanation": "", "sources": []}
+    )
+
+    async def create(i):
+        await repository.create(
+            VerificationCreate(content=offline.sample_text(i), content_type="text", model_version="1"),
+            result
+        )
+
+    return {
+        "documents": documents,
+        "create": await measure(create, iterations),
+        "get_status": await measure(lambda i: repository.get_status(ids[i % len(ids)]), iterations),
+        "find_by_content_hash": await measure(
+            lambda i: repository.find_by_content_hash(hashes[i % len(hashes)], "1"), iterations
+        ),
+        "list_page": await measure(lambda i: repository.list_page(50), iterations),
+        "update": await measure(lambda i: repository.update(ids[i % len(ids)], result), iterations)
+    }
+
+
+def build_app() -> FastAPI:
+    """
+    The API routes without the startup hooks, which would load the real models
+    """
+    from app.api.middleware import MetricsMiddleware
+    from app.api.routes import router
+    from app.core.config import settings
+
+    app = FastAPI()
+    app.include_router(router, prefix=settings.API_V1_STR)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware, server_timing=settings.METRICS_SERVER_TIMING)
+    return app
+
+
+async def load_benchmarks(requests: int, concurrency: int) -> Dict[str, Any]:
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        return await run_load(client, requests, concurrency)
+
+
+async def run_suite(iterations: int, documents: int, requests: int, concurrency: int) -> Dict[str, Any]:
+    offline.install_models()
+    offline.install_database()
+    return {
+        "suite": "offline",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count()
+        },
+        "analyzer": await analyzer_benchmarks(iterations),
+        "classifier": await classifier_benchmarks(iterations * 10),
+        "repository": await repository_benchmarks(iterations, documents),
+        "load": await load_benchmarks(requests, concurrency)
+    }
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    metrics = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Metrics that got worse than the baseline by more than ``tolerance`` (a fraction)
+    """
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for name, value in current.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        if name.endswith(HIGHER_IS_BETTER):
+            change = (before - value) / before
+        elif name.endswith(LOWER_IS_BETTER):
+            change = (value - before) / before
+        else:
+            continue
+        if change > tolerance:
+            regressions.append({"metric": name, "baseline": before, "current": value, "regression": change})
+    return sorted(regressions, key=lambda regression: regression["regression"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a results file saved earlier")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run_suite(args.iterations, args.documents, args.requests, args.concurrency))
+    regressions: Optional[List[Dict[str, Any]]] = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -44,6 +44,31 @@ def test_video():
     os.remove('temp.mp4')
     return video_data
 
+
+class FakeTextModel:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        return [[{"label": "LABEL_0", "score": 0.6}, {"label": "LABEL_1", "score": 0.4}] for _ in texts]
+
+
+@pytest.fixture
+def fake_text_model():
+    return FakeTextModel()
+
+
+@pytest.fixture
+def batch_analyzer(fake_text_model):
+    from app.services.model_registry import ModelRegistry
+    from app.services.analyzer import TEXT_MODEL
+
+    registry = ModelRegistry()
+    registry.register(TEXT_MODEL, modality="text", loader=lambda: fake_text_model)
+    return ContentAnalyzer(registry=registry)
+
+
 @pytest.mark.asyncio
 async def test_text_analysis(analyzer):
     # Test text analysis
@@ -87,4 +112,18 @@ async def test_video_analysis(analyzer, test_video):
 async def test_invalid_content_type(analyzer):
     # Test invalid content type
     with pytest.raises(ValueError):
-        await analyzer.analyze("test content", "invalid_type") 
\ No newline at end of file
+        await analyzer.analyze("test content", "invalid_type")
+
+
+@pytest.mark.asyncio
+async def test_analyze_many_batches_texts(batch_analyzer, fake_text_model, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "TEXT_BATCH_MAX_SIZE", 2)
+
+    items = [("Texto um", "text"), ("Texto dois", "text"), ("Texto três", "text"), ("x", "invalid_type")]
+    results = await batch_analyzer.analyze_many(items)
+
+    assert fake_text_model.batches == [["Texto um", "Texto dois"], ["Texto três"]]
+    assert [result["content"] for result in results[:3]] == ["Texto um", "Texto dois", "Texto três"]
+    assert all(result["type"] == "text" for result in results[:3])
+    assert isinstance(results[3], ValueError)
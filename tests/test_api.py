@@ -97,4 +97,26 @@ def test_missing_required_fields():
     }
     
     response = client.post("/api/v1/verify", json=payload)
-    assert response.status_code == 422  # Validation error 
\ No newline at end of file
+    assert response.status_code == 422  # Validation error
+
+
+def test_list_verifications_endpoint():
+    payload = {"content": "Texto para listagem.", "content_type": "text"}
+    client.post("/api/v1/verify", json=payload)
+    client.post("/api/v1/verify", json={"content": "Outro texto para listagem.", "content_type": "text"})
+    
+    response = client.get("/api/v1/verifications", params={"limit": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["items"]) == 1
+    assert "content" not in data["items"][0]
+    assert data["next_cursor"]
+    
+    # The next page starts after the last item of the previous one
+    next_page = client.get("/api/v1/verifications", params={"limit": 1, "cursor": data["next_cursor"]}).json()
+    assert next_page["items"][0]["verification_id"] != data["items"][0]["verification_id"]
+
+
+def test_list_verifications_invalid_cursor():
+    response = client.get("/api/v1/verifications", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,34 @@
+import os
+import pytest
+from app.services.backends import check_parity, export_dir, validate_backend
+
+def scores(**values):
+    return [{"label": label, "score": score} for label, score in values.items()]
+
+def test_export_dir_per_backend(tmp_path):
+    torch_dir = export_dir("microsoft/resnet-50", "torch", str(tmp_path))
+    assert torch_dir == os.path.join(str(tmp_path), "torch", "microsoft--resnet-50")
+    # int8 quantizes the torch export at load time
+    assert export_dir("microsoft/resnet-50", "torch-int8-dynamic", str(tmp_path)) == torch_dir
+    assert export_dir("microsoft/resnet-50", "onnxruntime", str(tmp_path)).startswith(
+        os.path.join(str(tmp_path), "onnx")
+    )
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        validate_backend("tensorrt")
+
+def test_parity_within_tolerance():
+    reference = [[scores(POS=0.7, NEG=0.3)], [scores(POS=0.2, NEG=0.8)]]
+    candidate = [[scores(POS=0.69, NEG=0.31)], [scores(POS=0.21, NEG=0.79)]]
+    report = check_parity(reference, candidate, tolerance=0.02)
+    assert report["passed"]
+    assert report["top_label_agreement"] == 1.0
+    assert report["max_score_difference"] == pytest.approx(0.01)
+
+def test_parity_fails_on_top_label_change():
+    reference = [scores(cat=0.51, dog=0.49)]
+    candidate = [scores(cat=0.495, dog=0.505)]
+    report = check_parity(reference, candidate, tolerance=0.02)
+    assert not report["passed"]
+    assert report["top_label_agreement"] == 0.0
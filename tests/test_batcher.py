@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from app.services.batcher import MicroBatcher
+
+@pytest.mark.asyncio
+async def test_concurrent_items_are_batched():
+    batches = []
+
+    def batch_fn(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert results == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+    await batcher.close()
+
+@pytest.mark.asyncio
+async def test_max_batch_size_is_respected():
+    batches = []
+
+    async def batch_fn(items):
+        batches.append(len(items))
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=50)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    assert results == list(range(10))
+    assert max(batches) <= 4
+    assert sum(batches) == 10
+
+    stats = batcher.stats()
+    assert stats["items"] == 10
+    assert stats["batch_size_histogram"]["le_4"] >= 2
+    await batcher.close()
+
+@pytest.mark.asyncio
+async def test_errors_are_routed_to_every_caller():
+    def batch_fn(items):
+        raise ValueError("model failure")
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=5)
+    results = await asyncio.gather(
+        batcher.submit("a"),
+        batcher.submit("b"),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    await batcher.close()
+
+@pytest.mark.asyncio
+async def test_result_count_mismatch():
+    batcher = MicroBatcher(lambda items: [], max_batch_size=4, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError):
+        await batcher.submit("a")
+    await batcher.close()
@@ -0,0 +1,101 @@
+import io
+import os
+import pytest
+from fastapi import UploadFile
+from app.services.blob_store import BlobStore, UploadTooLargeError
+
+def make_upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="video.mp4")
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / "blobs"))
+
+@pytest.mark.asyncio
+async def test_ingest_streams_and_hashes(store):
+    data = os.urandom(10_000)
+    blob = await store.ingest(make_upload(data), max_bytes=0, chunk_size=1024)
+
+    assert blob.size == len(data)
+    assert blob.reference == f"blob:{blob.content_hash}"
+    with open(blob.path, "rb") as stored:
+        assert stored.read() == data
+    assert store.resolve(blob.reference) == blob.path
+
+@pytest.mark.asyncio
+async def test_identical_uploads_share_one_file(store):
+    first = await store.ingest(make_upload(b"same"), max_bytes=0, chunk_size=2)
+    second = await store.ingest(make_upload(b"same"), max_bytes=0, chunk_size=2)
+
+    assert first.path == second.path
+    leftovers = [name for name in os.listdir(store.root) if name.startswith(".upload-")]
+    assert leftovers == []
+
+@pytest.mark.asyncio
+async def test_oversized_upload_is_rejected(store):
+    with pytest.raises(UploadTooLargeError):
+        await store.ingest(make_upload(b"x" * 100), max_bytes=50, chunk_size=10)
+
+    leftovers = [name for name in os.listdir(store.root) if name.startswith(".upload-")]
+    assert leftovers == []
+
+def test_resolve_unknown_reference(store):
+    assert store.resolve("blob:sha256:" + "0" * 64) is None
+    assert store.resolve("texto qualquer") is None
+
+def test_malformed_references_never_reach_the_filesystem(store):
+    assert store.resolve("blob:sha256:../../../etc/passwd") is None
+    assert store.resolve("blob:abc") is None
+    assert store.resolve("blob:sha256:" + "0" * 64 + "\n") is None
+    with pytest.raises(ValueError):
+        store.path_for("sha256:../../../etc/passwd")
+
+@pytest.mark.asyncio
+async def test_batch_with_a_malformed_reference_is_rejected():
+    import httpx
+    from fastapi import FastAPI
+    from app.api import routes
+
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api/v1")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        for reference in ("blob:sha256:../../../etc/passwd", "blob:abc"):
+            response = await client.post(
+                "/api/v1/verify/batch",
+                json={"items": [{"content": reference, "content_type": "image"}]}
+            )
+            assert response.status_code == 400
+            assert "Item 0" in response.json()["detail"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/verify/file", "/uploads"])
+async def test_chunked_upload_over_the_limit_is_cut_off(path):
+    import httpx
+    from fastapi import FastAPI, File
+    from app.api.middleware import UploadSizeLimitMiddleware
+
+    app = FastAPI()
+    sent = []
+
+    @app.post(path)
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    async def chunks():
+        yield b'--boundary\r\nContent-Disposition: form-data; name="file"; filename="video.mp4"\r\n\r\n'
+        for _ in range(10):
+            sent.append(1)
+            yield os.urandom(1024)
+        yield b"\r\n--boundary--\r\n"
+
+    limited = UploadSizeLimitMiddleware(app, max_bytes=4096)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=limited), base_url="http://test") as client:
+        response = await client.post(
+            path,
+            content=chunks(),
+            headers={"Content-Type": "multipart/form-data; boundary=boundary"}
+        )
+
+    assert response.status_code == 413
+    assert "4096" in response.json()["detail"]
+    assert len(sent) < 10
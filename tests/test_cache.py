@@ -0,0 +1,71 @@
+import time
+from app.services.cache import ResultCache, compute_content_hash, normalize_text
+
+def test_text_hash_ignores_case_and_whitespace():
+    first = compute_content_hash("A vacina  é segura.\n", "text")
+    second = compute_content_hash("a VACINA é segura.", "text")
+
+    assert first == second
+    assert first.startswith("sha256:")
+
+def test_file_hash_uses_raw_bytes():
+    assert compute_content_hash(b"\x00\x01", "image") != compute_content_hash(b"\x00\x02", "image")
+
+def test_normalize_text_unicode():
+    assert normalize_text("ＣＯＶＩＤ") == "covid"
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", {"value": 1})
+    cache.set("b", {"value": 2})
+    cache.get("a")
+    cache.set("c", {"value": 3})
+
+    assert cache.get("a") == {"value": 1}
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiry():
+    cache = ResultCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("a", {"value": 1})
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+
+def test_model_version_change_invalidates():
+    cache = ResultCache(max_entries=10, ttl_seconds=60, model_version="1")
+    cache.set("a", {"value": 1})
+
+    cache.set_model_version("1")
+    assert cache.get("a") is not None
+
+    cache.set_model_version("2")
+    assert cache.get("a") is None
+
+def test_hit_rate():
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    cache.set("a", {"value": 1})
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_cached_results_are_copies():
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    result = {"classification_result": {"label": "Falso", "explanation": []}}
+    cache.set("a", result)
+    result["classification_result"]["label"] = "Verdadeiro"
+
+    hit = cache.get("a")
+    hit["classification_result"]["explanation"].append("editado")
+
+    assert cache.get("a") == {"classification_result": {"label": "Falso", "explanation": []}}
+
+def test_scoring_model_version_is_part_of_the_cache_version():
+    from app.api import routes
+    from app.core.config import settings
+
+    assert routes.result_cache.model_version == f"{settings.MODEL_VERSION}+{routes.classifier.model.version}"
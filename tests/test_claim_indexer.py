@@ -0,0 +1,147 @@
+import asyncio
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from bson import ObjectId
+from app.core.config import settings
+from app.services.claim_indexer import ClaimIndexer
+from app.services.claims import CLAIM_ENCODER, ClaimMatcher
+from app.services.executor import InferenceExecutor
+from app.services.model_registry import ModelRegistry
+
+def embed(texts):
+    # Deterministic vector per text
+    return np.stack([
+        np.random.default_rng(abs(hash(text)) % (2 ** 32)).normal(size=16).astype(np.float32)
+        for text in texts
+    ])
+
+class FakeRepository:
+    def __init__(self, documents):
+        self.documents = sorted(documents, key=lambda d: (d["updated_at"], d["_id"]))
+
+    async def iter_completed_since(self, content_type, updated_at=None, exclude_ids=None, limit=100):
+        count = 0
+        self.documents.sort(key=lambda d: (d["updated_at"], d["_id"]))
+        for document in self.documents:
+            if updated_at is not None and document["updated_at"] < updated_at:
+                continue
+            if str(document["_id"]) in (exclude_ids or []):
+                continue
+            if count == limit:
+                return
+            count += 1
+            yield document
+
+def verification(text, seconds, confidence=0.9, label="Falso"):
+    return {
+        "_id": ObjectId(),
+        "content": text,
+        "classification_result": {"label": label, "confidence": confidence},
+        "updated_at": datetime(2024, 1, 1) + timedelta(seconds=seconds)
+    }
+
+@pytest.fixture
+def matcher(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CLAIM_MATCHING_ENABLED", True)
+    monkeypatch.setattr(settings, "CLAIM_INDEXER_ENABLED", True)
+    registry = ModelRegistry()
+    registry.register(CLAIM_ENCODER, modality="claims", loader=lambda: embed)
+    matcher = ClaimMatcher(registry, index_path=str(tmp_path / "claims"), top_k=3)
+    matcher.load()
+    assert matcher.available
+    return matcher
+
+@pytest.mark.asyncio
+async def test_poll_ingests_confident_verifications_incrementally(matcher):
+    documents = [
+        verification("vacina causa autismo", 1),
+        verification("texto incerto", 2, confidence=0.5),
+        verification("eleição fraudada", 3, label="Suspeito"),
+        verification("vacina causa autismo", 4)
+    ]
+    repository = FakeRepository(documents)
+    executor = InferenceExecutor(thread_workers=2)
+    indexer = ClaimIndexer(repository, matcher, executor, batch_size=2, min_confidence=0.85)
+
+    assert await indexer.poll_once() == 2
+    assert await indexer.poll_once() == 2
+    assert await indexer.poll_once() == 0
+
+    stats = indexer.stats()
+    assert stats["ingested"] == 2
+    assert stats["skipped"] == 1
+    assert stats["duplicates"] == 1
+    assert matcher.index.checkpoint["updated_at"] == documents[3]["updated_at"].isoformat()
+
+    matches = matcher.match_many(["eleição fraudada"])[0]
+    assert matches[0]["claim"] == "eleição fraudada"
+    assert matches[0]["label"] == settings.CLASSIFICATION_LABELS["SUSPICIOUS"]
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_restart_resumes_from_snapshot(matcher):
+    documents = [verification(f"alegação {i}", i) for i in range(5)]
+    executor = InferenceExecutor(thread_workers=2)
+    indexer = ClaimIndexer(FakeRepository(documents), matcher, executor, batch_size=3)
+    await indexer.poll_once()
+    await indexer.snapshot()
+
+    restarted = ClaimMatcher(matcher.registry, index_path=matcher.index_path, top_k=3)
+    assert restarted.load()
+    assert len(restarted.index) == 3
+    indexer = ClaimIndexer(FakeRepository(documents), restarted, executor, batch_size=3)
+    assert await indexer.poll_once() == 2
+    assert len(restarted.index) == 5
+
+    restarted.compact()
+    assert restarted.index.main_count == 5
+    assert restarted.index.delta_count == 0
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_poll_finds_verifications_committed_late(matcher):
+    documents = [verification("vacina causa autismo", 10), verification("eleição fraudada", 20)]
+    repository = FakeRepository(documents)
+    executor = InferenceExecutor(thread_workers=2)
+    indexer = ClaimIndexer(repository, matcher, executor, lookback_seconds=30)
+    assert await indexer.poll_once() == 2
+
+    # Stamped before the checkpoint, but only visible now
+    repository.documents.append(verification("cloroquina cura covid", 15))
+    assert await indexer.poll_once() == 1
+    assert await indexer.poll_once() == 0
+    assert len(matcher.index) == 3
+
+    # Ids that fell out of the window are dropped from the checkpoint
+    latest = verification("urna adulterada", 60)
+    repository.documents.append(latest)
+    assert await indexer.poll_once() == 1
+    assert list(matcher.index.checkpoint["recent"]) == [str(latest["_id"])]
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_read_only_indexer_reloads_the_writers_snapshots(matcher):
+    executor = InferenceExecutor(thread_workers=2)
+    writer = ClaimIndexer(FakeRepository([verification("vacina causa autismo", 1)]), matcher, executor)
+    reader_matcher = ClaimMatcher(matcher.registry, index_path=matcher.index_path, top_k=3)
+    reader_matcher.load()
+
+    class NoRepository:
+        def iter_completed_since(self, *args, **kwargs):
+            pytest.fail("read-only indexers do not read verifications")
+
+    reader = ClaimIndexer(NoRepository(), reader_matcher, executor, poll_seconds=0.01, read_only=True)
+    await reader.start()
+    await writer.poll_once()
+    await asyncio.sleep(0.05)
+    assert len(reader_matcher.index) == 0
+
+    await writer.snapshot()
+    await asyncio.sleep(0.05)
+    await reader.stop()
+
+    assert len(reader_matcher.index) == 1
+    assert reader.stats()["reloads"] == 1
+    assert reader.stats()["snapshots"] == 0
+    executor.shutdown()
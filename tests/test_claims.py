@@ -0,0 +1,133 @@
+import json
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.claims import (
+    CLAIM_ENCODER,
+    ClaimIndex,
+    ClaimMatcher,
+    build_index,
+    verdict_label,
+    write_index
+)
+from app.services.model_registry import ModelRegistry
+
+DIM = 32
+
+def random_vectors(count, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+
+def write_random_index(path, vectors, dtype, ivf_lists):
+    claims = [{"claim": f"alegação {i}", "verdict": "falso", "url": f"https://checagem.example/{i}"}
+              for i in range(len(vectors))]
+    batches = (vectors[i:i + 100] for i in range(0, len(vectors), 100))
+    write_index(str(path), len(vectors), DIM, batches, claims, dtype, ivf_lists)
+    return ClaimIndex(str(path))
+
+@pytest.mark.parametrize("dtype,ivf_lists", [("float16", 0), ("int8", 0), ("float16", 16), ("int8", 16)])
+def test_search_finds_exact_claim(tmp_path, dtype, ivf_lists):
+    vectors = random_vectors(2000)
+    index = write_random_index(tmp_path / "claims", vectors, dtype, ivf_lists)
+    try:
+        for i in (0, 777, 1999):
+            position, similarity = index.search(vectors[i], k=3, nprobe=4)[0]
+            assert index.claim(position)["claim"] == f"alegação {i}"
+            assert similarity == pytest.approx(1.0, abs=0.02)
+    finally:
+        index.close()
+
+def test_search_is_ordered_by_similarity(tmp_path):
+    vectors = random_vectors(500)
+    index = write_random_index(tmp_path / "claims", vectors, "float16", 0)
+    try:
+        results = index.search(random_vectors(1, seed=1)[0], k=10)
+        similarities = [similarity for _, similarity in results]
+        assert len(results) == 10
+        assert similarities == sorted(similarities, reverse=True)
+    finally:
+        index.close()
+
+def test_build_index_from_jsonl_and_match(tmp_path, monkeypatch):
+    corpus = tmp_path / "corpus.jsonl"
+    texts = ["vacina causa autismo", "eleição foi fraudada", "água com limão cura câncer"]
+    with open(corpus, "w", encoding="utf-8") as f:
+        for i, text in enumerate(texts):
+            f.write(json.dumps({"claim": text, "verdict": "Falso", "url": f"https://checagem.example/{i}"}) + "\n")
+
+    vocabulary = {text: random_vectors(1, seed=i)[0] for i, text in enumerate(texts)}
+
+    def embed(batch):
+        return np.stack([vocabulary.get(text, random_vectors(1, seed=99)[0]) for text in batch])
+
+    build_index(str(corpus), str(tmp_path / "index"), embed, dtype="int8")
+
+    registry = ModelRegistry()
+    registry.register(CLAIM_ENCODER, modality="claims", loader=lambda: embed)
+    matcher = ClaimMatcher(registry, index_path=str(tmp_path / "index"), top_k=2)
+    monkeypatch.setattr(settings, "CLAIM_MATCHING_ENABLED", True)
+    assert matcher.load()
+
+    matches = matcher.match_many(["eleição foi fraudada"])[0]
+    assert matches[0]["claim"] == "eleição foi fraudada"
+    assert matches[0]["label"] == settings.CLASSIFICATION_LABELS["FAKE"]
+    assert matches[0]["url"] == "https://checagem.example/1"
+    assert matcher.stats()["queries"] == 1
+    matcher.index.close()
+
+def test_matcher_without_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CLAIM_INDEXER_ENABLED", False)
+    matcher = ClaimMatcher(ModelRegistry(), index_path=str(tmp_path / "missing"))
+    assert not matcher.load()
+    assert matcher.match_many(["texto"]) == [[]]
+
+def test_matcher_starts_empty_for_the_indexer(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CLAIM_INDEXER_ENABLED", True)
+    # The encoder is not needed while the index is empty
+    matcher = ClaimMatcher(ModelRegistry(), index_path=str(tmp_path / "missing"))
+    assert not matcher.load()
+    assert matcher.available
+    assert matcher.match_many(["texto"]) == [[]]
+
+def delta_claims(start, count):
+    return [{"claim": f"nova {i}", "verdict": "Falso"} for i in range(start, start + count)]
+
+def test_append_is_searchable_and_compacts(tmp_path):
+    vectors = random_vectors(300)
+    index = write_random_index(tmp_path / "claims", vectors, "int8", 0)
+    added = random_vectors(50, seed=5)
+    index.append(added[:40], delta_claims(0, 40), {"updated_at": "t1"})
+
+    position, similarity = index.search(added[7], k=1)[0]
+    assert position == 300 + 7
+    assert index.claim(position)["claim"] == "nova 7"
+    assert len(index) == 340
+
+    compacted = index.compact()
+    # Rows appended while compacting are carried over to the new index
+    index.append(added[40:], delta_claims(40, 10), {"updated_at": "t2"})
+    index.carry_over(compacted)
+    assert compacted.main_count == 340
+    assert compacted.delta_count == 10
+    assert compacted.checkpoint == {"updated_at": "t2"}
+    for i in (0, 39, 45):
+        position, _ = compacted.search(added[i], k=1)[0]
+        assert compacted.claim(position)["claim"] == f"nova {i}"
+    assert ClaimIndex(str(tmp_path / "claims")).checkpoint == {"updated_at": "t1"}
+
+def test_delta_snapshot_restores_on_restart(tmp_path):
+    vectors = random_vectors(100)
+    index = write_random_index(tmp_path / "claims", vectors, "float16", 0)
+    added = random_vectors(5, seed=3)
+    index.append(added, delta_claims(0, 5), {"updated_at": "t1", "id": "abc"})
+    index.save_delta()
+
+    restored = ClaimIndex(str(tmp_path / "claims"))
+    assert restored.delta_count == 5
+    assert restored.checkpoint == {"updated_at": "t1", "id": "abc"}
+    position, _ = restored.search(added[2], k=1)[0]
+    assert restored.claim(position)["claim"] == "nova 2"
+
+def test_verdict_label():
+    assert verdict_label("Verdadeiro") == settings.CLASSIFICATION_LABELS["VERIFIED"]
+    assert verdict_label("FALSO") == settings.CLASSIFICATION_LABELS["FAKE"]
+    assert verdict_label("sem contexto") == settings.CLASSIFICATION_LABELS["SUSPICIOUS"]
@@ -82,4 +82,29 @@ async def test_invalid_content_type(classifier):
     }
     
     with pytest.raises(ValueError):
-        await classifier.classify(analysis) 
\ No newline at end of file
+        await classifier.classify(analysis)
+
+
+@pytest.mark.asyncio
+async def test_text_classification_from_claim_matches(classifier):
+    analysis = {
+        "type": "text",
+        "content": "Vacina causa autismo, dizem especialistas.",
+        "sentiment": [{"label": "positive", "score": 0.9}],
+        "claim_matches": [
+            {"claim": "Vacina causa autismo", "verdict": "Falso", "label": settings.CLASSIFICATION_LABELS["FAKE"],
+             "url": "https://checagem.example/1", "similarity": 0.95},
+            {"claim": "Vacinas são seguras", "verdict": "Verdadeiro", "label": settings.CLASSIFICATION_LABELS["VERIFIED"],
+             "url": "https://checagem.example/2", "similarity": 0.5}
+        ],
+        "entities": [],
+        "topics": [],
+        "metadata": {"length": 42, "language": "pt"}
+    }
+    
+    result = await classifier.classify(analysis)
+    
+    # Matches below the similarity threshold do not vote
+    assert result["label"] == settings.CLASSIFICATION_LABELS["FAKE"]
+    assert result["confidence"] == pytest.approx(0.95)
+    assert result["sources"] == ["https://checagem.example/1"]
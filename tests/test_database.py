@@ -0,0 +1,56 @@
+import pytest
+from pymongo.write_concern import WriteConcern
+from app.core import database
+from app.core.config import settings
+from app.core.database import (
+    DatabaseNotConnectedError,
+    PoolMonitor,
+    client_options,
+    parse_write_concern
+)
+from app.repositories.verification import VerificationRepository
+
+def test_parse_write_concern():
+    assert parse_write_concern("0") == WriteConcern(w=0)
+    assert parse_write_concern("1") == WriteConcern(w=1)
+    assert parse_write_concern("majority", 5000) == WriteConcern(w="majority", wtimeout=5000)
+    # Unacknowledged writes ignore the replication timeout
+    assert parse_write_concern("0", 5000) == WriteConcern(w=0)
+
+def test_client_options(monkeypatch):
+    monkeypatch.setattr(settings, "MONGODB_MAX_POOL_SIZE", 20)
+    monkeypatch.setattr(settings, "MONGODB_MAX_IDLE_TIME_MS", 0)
+    monkeypatch.setattr(settings, "MONGODB_COMPRESSORS", "zstd, snappy")
+    monkeypatch.setattr(settings, "MONGODB_READ_PREFERENCE", "secondaryPreferred")
+
+    options = client_options()
+    assert options["maxPoolSize"] == 20
+    assert options["compressors"] == ["zstd", "snappy"]
+    assert options["readPreference"] == "secondaryPreferred"
+    # Unset limits are left to the driver defaults
+    assert "maxIdleTimeMS" not in options
+    assert "zlibCompressionLevel" not in options
+
+def test_pool_monitor_counts_checkouts():
+    monitor = PoolMonitor(max_pool_size=4)
+    monitor.connection_created(None)
+    monitor.connection_created(None)
+    for _ in range(2):
+        monitor.connection_check_out_started(None)
+        monitor.connection_checked_out(None)
+    monitor.connection_checked_in(None)
+
+    stats = monitor.stats()
+    assert stats["open_connections"] == 2
+    assert stats["checkouts"] == 2
+    assert stats["in_use"] == 1
+    assert stats["peak_in_use"] == 2
+    assert stats["utilization"] == 0.25
+    assert stats["max_wait_ms"] >= 0
+
+def test_repository_resolves_database_lazily(monkeypatch):
+    monkeypatch.setattr(database.db, "db", None)
+    # Creating the repository at import time no longer needs a connection
+    repository = VerificationRepository()
+    with pytest.raises(DatabaseNotConnectedError):
+        repository.collection
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import threading
+import time
+import pytest
+from app.services.executor import ExecutorSaturatedError, InferenceExecutor
+
+@pytest.fixture
+def executor():
+    executor = InferenceExecutor(
+        thread_workers=4,
+        max_queue=2,
+        concurrency={"video": 1},
+        retry_after=7
+    )
+    yield executor
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_run_off_event_loop(executor):
+    loop_thread = threading.get_ident()
+    worker_thread = await executor.run("text", threading.get_ident)
+
+    assert worker_thread != loop_thread
+
+@pytest.mark.asyncio
+async def test_admission_control_rejects_when_full(executor):
+    with executor.admit("text"):
+        with executor.admit("image"):
+            with pytest.raises(ExecutorSaturatedError) as error:
+                with executor.admit("video"):
+                    pass
+
+    assert error.value.retry_after == 7
+    assert executor.pending == 0
+    assert executor.stats()["rejected"] == {"video": 1}
+
+@pytest.mark.asyncio
+async def test_per_modality_concurrency_limit(executor):
+    active = []
+    peak = []
+
+    def work():
+        active.append(1)
+        peak.append(len(active))
+        time.sleep(0.02)
+        active.pop()
+
+    await asyncio.gather(*(executor.run("video", work) for _ in range(3)))
+
+    assert max(peak) == 1
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive(executor):
+    task = asyncio.ensure_future(executor.run("video", time.sleep, 0.2))
+
+    start = time.perf_counter()
+    await asyncio.sleep(0.01)
+    assert time.perf_counter() - start < 0.1
+
+    await task
+
+@pytest.mark.asyncio
+async def test_pure_python_work_runs_in_the_process_pool():
+    executor = InferenceExecutor(thread_workers=1, process_workers=1)
+    try:
+        worker_pid = await executor.run("text", os.getpid, use_process=True)
+    finally:
+        executor.shutdown()
+
+    assert worker_pid != os.getpid()
+    assert executor.stats()["process_workers"] == 1
+
+@pytest.mark.asyncio
+async def test_process_work_falls_back_to_threads(executor):
+    worker_pid = await executor.run("text", os.getpid, use_process=True)
+
+    assert worker_pid == os.getpid()
@@ -0,0 +1,107 @@
+import asyncio
+import io
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from PIL import Image
+from PIL.JpegImagePlugin import JpegImageFile
+from app.services.analyzer import IMAGE_MODEL, ContentAnalyzer
+from app.services.image_preprocessing import ImagePreprocessor, ImageSpec, decode, read_metadata
+from app.services.model_registry import ModelRegistry
+
+# microsoft/resnet-50 (ConvNextImageProcessor)
+RESNET_PROCESSOR = SimpleNamespace(
+    size={"shortest_edge": 224},
+    crop_pct=0.875,
+    image_mean=[0.485, 0.456, 0.406],
+    image_std=[0.229, 0.224, 0.225],
+    rescale_factor=1 / 255,
+    resample=3
+)
+
+
+def jpeg(width, height, exif=None):
+    image = Image.fromarray(np.random.default_rng(0).integers(0, 255, size=(height, width, 3), dtype=np.uint8))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", **({"exif": exif} if exif is not None else {}))
+    return buffer.getvalue()
+
+
+def test_spec_from_convnext_processor():
+    spec = ImageSpec.from_processor(RESNET_PROCESSOR)
+    assert spec.crop == (224, 224)
+    assert spec.resized_size((4000, 3000)) == (341, 256)
+    assert ImageSpec.from_processor(SimpleNamespace(size=None)) is None
+
+
+def test_metadata_is_read_without_decoding():
+    exif = Image.Exif()
+    exif[0x010F] = "Camera"
+    exif[0x0112] = 6
+    data = jpeg(640, 480, exif.tobytes())
+
+    assert read_metadata(data) == {
+        "format": "JPEG",
+        "size": (640, 480),
+        "mode": "RGB",
+        "exif": {"make": "Camera", "orientation": 6, "has_gps": False}
+    }
+
+
+def test_jpeg_is_decoded_at_the_model_resolution(monkeypatch):
+    spec = ImageSpec.from_processor(RESNET_PROCESSOR)
+    drafts = []
+    original_draft = JpegImageFile.draft
+
+    def draft(self, mode, size):
+        result = original_draft(self, mode, size)
+        drafts.append((size, self.size))
+        return result
+
+    monkeypatch.setattr(JpegImageFile, "draft", draft)
+    image, metadata = decode(jpeg(2048, 1536), spec)
+
+    # libjpeg decodes at 1/4 scale: 512x384 instead of 2048x1536
+    assert drafts == [((341, 256), (512, 384))]
+    assert image.size == (224, 224)
+    assert metadata["size"] == (2048, 1536)
+
+
+def test_batch_is_normalized_into_a_reused_buffer():
+    spec = ImageSpec((2, 2), resize_to=(2, 2), mean=(0.5, 0.5, 0.5), std=(0.5, 0.5, 0.5))
+    preprocessor = ImagePreprocessor()
+    images = [Image.new("RGB", (2, 2), (255, 0, 255)), Image.new("RGB", (2, 2), (0, 255, 0))]
+
+    batch = preprocessor.to_batch(images, spec)
+    assert batch.shape == (2, 3, 2, 2)
+    np.testing.assert_allclose(batch[0, :, 0, 0], [1, -1, 1])
+    np.testing.assert_allclose(batch[1, :, 0, 0], [-1, 1, -1])
+
+    # A smaller batch reuses the same memory
+    assert np.shares_memory(preprocessor.to_batch(images[:1], spec), batch)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_images_share_one_model_call():
+    calls = []
+
+    def classify(images, **kwargs):
+        calls.append(len(images))
+        return [[{"label": "gato", "score": 0.9}] for _ in images]
+
+    registry = ModelRegistry()
+    registry.register(IMAGE_MODEL, modality="image", loader=lambda: classify)
+    analyzer = ContentAnalyzer(registry=registry)
+    try:
+        results = await asyncio.gather(
+            *[analyzer.analyze(jpeg(64, 48), "image") for _ in range(4)],
+            analyzer.analyze(b"not an image", "image"),
+            return_exceptions=True
+        )
+    finally:
+        await analyzer.close()
+
+    assert calls == [4]
+    assert all(result["classification"] == [{"label": "gato", "score": 0.9}] for result in results[:4])
+    assert results[0]["metadata"]["size"] == (64, 48)
+    assert isinstance(results[4], Exception)
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from app.services.jobs import JobQueueFullError, VerificationJobQueue
+
+class FakeRepository:
+    def __init__(self):
+        self.statuses = {}
+
+    async def update(self, verification_id, verification):
+        self.statuses.setdefault(verification_id, []).append(verification.status)
+
+class FakeService:
+    def __init__(self, fail=False):
+        self.repository = FakeRepository()
+        self.fail = fail
+
+    async def process(self, verification_id, content, content_type, *cache_keys):
+        if self.fail:
+            raise ValueError("analysis failed")
+        await self.repository.update(verification_id, type("Update", (), {"status": "completed"}))
+        return {"label": "Suspeito"}
+
+    async def record_failure(self, verification_id, error):
+        await self.repository.update(verification_id, type("Update", (), {"status": "failed"}))
+
+@pytest.mark.asyncio
+async def test_job_completes_in_background():
+    service = FakeService()
+    queue = VerificationJobQueue(service, workers=2)
+    await queue.start()
+
+    await queue.enqueue("job-1", "Texto", "text")
+    await queue.wait("job-1", timeout=1)
+
+    assert service.repository.statuses["job-1"] == ["processing", "completed"]
+    assert queue.stats()["processed"] == 1
+    await queue.stop()
+
+@pytest.mark.asyncio
+async def test_failed_job_is_marked_failed():
+    service = FakeService(fail=True)
+    queue = VerificationJobQueue(service, workers=1)
+    await queue.start()
+
+    await queue.enqueue("job-1", "Texto", "text")
+    await queue.wait("job-1", timeout=1)
+
+    assert service.repository.statuses["job-1"] == ["processing", "failed"]
+    assert queue.stats()["failed"] == 1
+    await queue.stop()
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected():
+    queue = VerificationJobQueue(FakeService(), workers=1, max_size=1, retry_after=3)
+    queue._queue = asyncio.Queue(maxsize=1)
+
+    await queue.enqueue("job-1", "Texto", "text")
+    with pytest.raises(JobQueueFullError) as error:
+        await queue.enqueue("job-2", "Texto", "text")
+
+    assert error.value.retry_after == 3
+
+@pytest.mark.asyncio
+async def test_rejected_job_removes_its_pending_record(monkeypatch):
+    from types import SimpleNamespace
+    from app.api import routes
+
+    deleted = []
+
+    class FullQueue:
+        async def enqueue(self, *args):
+            raise JobQueueFullError(3)
+
+    class Repository:
+        async def delete(self, verification_id):
+            deleted.append(verification_id)
+            return True
+
+    monkeypatch.setattr(routes, "job_queue", FullQueue())
+    monkeypatch.setattr(routes, "verification_repository", Repository())
+    pending = SimpleNamespace(id="job-1", content_hash=None, perceptual_hash=None)
+
+    with pytest.raises(JobQueueFullError):
+        await routes._accept_job(pending, "Texto", "text")
+    assert deleted == ["job-1"]
@@ -0,0 +1,123 @@
+import asyncio
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from app.api.middleware import MetricsMiddleware
+from app.core.config import settings
+from app.core.metrics import (
+    Histogram,
+    MetricsRegistry,
+    record_stage,
+    request_seconds,
+    stage_seconds,
+    start_request,
+    timed,
+    timed_stage
+)
+from app.services.batcher import MicroBatcher
+from app.services.executor import InferenceExecutor
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency", ("stage",), buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 5):
+        histogram.observe(value, "analyze")
+
+    lines = list(histogram.render())
+    assert 'latency_seconds_bucket{stage="analyze",le="0.01"} 1' in lines
+    assert 'latency_seconds_bucket{stage="analyze",le="0.1"} 3' in lines
+    assert 'latency_seconds_bucket{stage="analyze",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{stage="analyze"} 4' in lines
+    assert histogram.snapshot("analyze")["sum"] == pytest.approx(5.105)
+
+def test_registry_renders_collected_gauges():
+    registry = MetricsRegistry(prefix="test_")
+    registry.register_collector(lambda: [
+        ("queue_depth", "Queued items", "gauge", [({"modality": 'te"xt'}, 3)])
+    ])
+
+    text = registry.render()
+    assert "# TYPE test_queue_depth gauge" in text
+    assert 'test_queue_depth{modality="te\\"xt"} 3' in text
+    assert "test_http_requests_in_flight 0" in text
+
+def test_stages_are_recorded_per_content_type_and_request():
+    before = stage_seconds.snapshot("classify", "video")["count"]
+    timings = start_request()
+
+    with timed_stage("classify", "video"):
+        pass
+    record_stage("classify", 0.002, "video")
+
+    assert stage_seconds.snapshot("classify", "video")["count"] == before + 2
+    assert timings.stages["classify"][1] == 2
+    assert timings.header(0.01).endswith("total;dur=10.00")
+    assert 'classify;dur=' in timings.header()
+
+@pytest.mark.asyncio
+async def test_stages_in_executor_threads_count_towards_the_request():
+    executor = InferenceExecutor(thread_workers=1)
+
+    @timed("inference", "image")
+    def infer():
+        return 1
+
+    timings = start_request()
+    await executor.run("image", infer)
+    executor.shutdown()
+    assert "inference" in timings.stages
+
+@pytest.mark.asyncio
+async def test_middleware_adds_server_timing_header():
+    async def endpoint(request):
+        with timed_stage("analyze", "text"):
+            await asyncio.sleep(0)
+        return PlainTextResponse("ok")
+
+    app = MetricsMiddleware(Starlette(routes=[Route("/verify", endpoint)]), server_timing=True)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/verify")
+
+    header = response.headers["server-timing"]
+    assert header.startswith("analyze;dur=")
+    assert "total;dur=" in header
+
+def test_unknown_content_types_share_one_series():
+    before = stage_seconds.snapshot("classify", "other")["count"]
+    record_stage("classify", 0.001, "<script>")
+    record_stage("classify", 0.001, "x" * 100)
+
+    assert stage_seconds.snapshot("classify", "other")["count"] == before + 2
+    assert stage_seconds.snapshot("classify", "<script>")["count"] == 0
+
+@pytest.mark.asyncio
+async def test_batched_stages_count_towards_every_request():
+    def batch_fn(items):
+        record_stage("inference", 0.004, "text")
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=20)
+
+    async def request(item):
+        timings = start_request()
+        await batcher.submit(item)
+        return timings
+
+    requests = await asyncio.gather(request(1), request(2))
+    await batcher.close()
+    assert [timings.stages["inference"] for timings in requests] == [[0.004, 1], [0.004, 1]]
+
+@pytest.mark.asyncio
+async def test_disabled_metrics_skip_the_request_histogram(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+
+    async def unmeasured(request):
+        return PlainTextResponse("ok")
+
+    app = MetricsMiddleware(Starlette(routes=[Route("/unmeasured", unmeasured)]), server_timing=True)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/unmeasured")
+
+    assert "server-timing" not in response.headers
+    assert request_seconds.snapshot("GET", "unmeasured", "200")["count"] == 0
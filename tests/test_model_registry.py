@@ -0,0 +1,71 @@
+import pytest
+from app.services.model_registry import ModelRegistry
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, inputs):
+        self.calls.append(inputs)
+        return [{"label": "LABEL_0", "score": 1.0}]
+
+@pytest.fixture
+def registry():
+    return ModelRegistry()
+
+def test_model_loaded_once(registry):
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return FakeModel()
+
+    registry.register("text", modality="text", loader=loader)
+
+    first = registry.get("text")
+    second = registry.get("text")
+
+    assert first is second
+    assert len(loads) == 1
+
+def test_lazy_loading(registry):
+    registry.register("text", modality="text", loader=FakeModel)
+    registry.register("image", modality="image", loader=FakeModel)
+
+    registry.load_all(modalities=["text"])
+
+    assert registry.is_loaded("text")
+    assert not registry.is_loaded("image")
+
+    registry.get("image")
+    assert registry.is_loaded("image")
+
+def test_warmup_runs_dummy_input(registry):
+    registry.register(
+        "text",
+        modality="text",
+        loader=FakeModel,
+        warmup_input=lambda: "aquecimento"
+    )
+    registry.load_all()
+    registry.warmup()
+
+    assert registry.get("text").calls == ["aquecimento"]
+    assert registry.stats()["text"]["warmup_time_seconds"] is not None
+
+def test_stats(registry):
+    registry.register("text", modality="text", loader=FakeModel)
+    registry.register("image", modality="image", loader=FakeModel)
+    registry.load("text")
+
+    stats = registry.stats()
+
+    assert stats["text"]["loaded"]
+    assert stats["text"]["load_time_seconds"] >= 0
+    assert stats["text"]["rss_delta_bytes"] >= 0
+    assert not stats["image"]["loaded"]
+    assert stats["image"]["load_time_seconds"] is None
+
+def test_unknown_model(registry):
+    with pytest.raises(KeyError):
+        registry.get("missing")
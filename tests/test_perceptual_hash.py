@@ -0,0 +1,68 @@
+import io
+import random
+import numpy as np
+import pytest
+from PIL import Image
+from app.services.perceptual_hash import (
+    MultiIndexHashIndex,
+    dhash,
+    hamming_distance,
+    image_phash,
+    phash
+)
+
+@pytest.fixture
+def test_image():
+    # Smooth synthetic picture: a few blobs over a gradient
+    y, x = np.mgrid[0:256, 0:256] / 256.0
+    luminance = 0.4 * x + 0.6 * np.exp(-((x - 0.3) ** 2 + (y - 0.6) ** 2) * 20)
+    luminance += 0.5 * np.exp(-((x - 0.7) ** 2 + (y - 0.2) ** 2) * 30)
+    channel = (255 * luminance / luminance.max()).astype(np.uint8)
+    return Image.fromarray(np.stack([channel, channel[::-1], channel.T], axis=-1), "RGB")
+
+def test_resized_copy_is_near_duplicate(test_image):
+    resized = test_image.resize((128, 128))
+
+    assert hamming_distance(phash(test_image), phash(resized)) <= 6
+    assert hamming_distance(dhash(test_image), dhash(resized)) <= 6
+
+def test_reencoded_jpeg_is_near_duplicate(test_image):
+    original = io.BytesIO()
+    test_image.save(original, format="PNG")
+    reencoded = io.BytesIO()
+    test_image.save(reencoded, format="JPEG", quality=40)
+
+    distance = hamming_distance(image_phash(original.getvalue()), image_phash(reencoded.getvalue()))
+    assert distance <= 6
+
+def test_different_images_are_far_apart(test_image):
+    other = Image.fromarray(np.rot90(np.asarray(test_image)).copy(), "RGB")
+
+    assert hamming_distance(phash(test_image), phash(other)) > 6
+
+def test_index_matches_brute_force():
+    rng = random.Random(42)
+    index = MultiIndexHashIndex(max_distance=6, chunks=4)
+    hashes = [rng.getrandbits(64) for _ in range(2000)]
+    for position, value in enumerate(hashes):
+        index.add(value, position)
+
+    for _ in range(50):
+        query = hashes[rng.randrange(len(hashes))]
+        for _ in range(rng.randrange(7)):
+            query ^= 1 << rng.randrange(64)
+
+        expected = sorted(
+            (position, hamming_distance(value, query))
+            for position, value in enumerate(hashes)
+            if hamming_distance(value, query) <= 6
+        )
+        assert sorted(index.search(query)) == expected
+
+def test_nearest_returns_closest_key():
+    index = MultiIndexHashIndex(max_distance=4, chunks=4)
+    index.add(0b1111, "far")
+    index.add(0b0001, "near")
+
+    assert index.nearest(0) == ("near", 1)
+    assert index.nearest(1 << 63 | 0b11110000) is None
@@ -0,0 +1,116 @@
+import json
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.analyzer import TEXT_MODEL, ContentAnalyzer
+from app.services.model_registry import ModelRegistry
+from app.services.prefilter import (
+    NGRAM_FEATURES,
+    NgramModel,
+    PhraseLexicon,
+    TextCascade,
+    ngram_features,
+    normalize_text,
+    train
+)
+
+HOAXES = [
+    {"claim": "Vacina causa autismo", "verdict": "Falso", "url": "https://checagem.example/1"},
+    {"claim": "Urnas eletrônicas são auditáveis", "verdict": "Verdadeiro", "url": "https://checagem.example/2"}
+]
+
+
+class FakeClaims:
+    def match_many(self, texts):
+        return [[] for _ in texts]
+
+
+def keyword_model(word, labels=("negative", "positive")):
+    """
+    An n-gram model that is confidently positive when ``word`` appears, unsure otherwise
+    """
+    weights = np.zeros((NGRAM_FEATURES, len(labels)), dtype=np.float32)
+    indexes, _ = ngram_features(word)
+    weights[indexes[0], 1] = 20.0
+    return NgramModel(weights, np.zeros(len(labels)), labels)
+
+
+def test_normalized_phrases_match_whole_words():
+    lexicon = PhraseLexicon(HOAXES)
+    assert normalize_text("  URNAS   Eletrônicas ") == "urnas eletronicas"
+
+    found = lexicon.find(normalize_text("Dizem que a VACINA causa autismo!"))
+    assert [entry["label"] for entry in found] == [settings.CLASSIFICATION_LABELS["FAKE"]]
+    assert lexicon.find(normalize_text("vacina causa autismos")) == []
+
+
+@pytest.mark.parametrize("text, reason", [
+    ("", "empty"),
+    ("   ", "empty"),
+    ("https://exemplo.com/noticia?id=1", "url_only"),
+    ("Boato", "too_short"),
+    ("Compartilhe: vacina causa autismo", "lexicon")
+])
+def test_rules_stage_answers_trivial_and_known_texts(text, reason):
+    cascade = TextCascade(PhraseLexicon(HOAXES))
+    screened = cascade.screen(text)
+    assert screened.stage == "rules"
+    assert screened.reason == reason
+    assert cascade.screen("Um texto comum sobre o clima de hoje") is None
+
+
+def test_ngram_stage_only_answers_confident_texts():
+    cascade = TextCascade(model=keyword_model("chuva"), ngram_confidence=0.9)
+    sentiments = cascade.predict_many(["vai ter chuva amanha", "o jogo de ontem"])
+
+    assert sentiments[0][1]["label"] == "positive"
+    assert sentiments[0][1]["score"] > 0.9
+    assert sentiments[1] is None
+    assert cascade.stats()["exits"] == {"rules": 0, "ngram": 1, "model": 1}
+
+
+@pytest.mark.asyncio
+async def test_analyzer_skips_the_text_model_for_early_exits():
+    calls = []
+
+    def classify(texts, **kwargs):
+        calls.append(list(texts))
+        return [[{"label": "negative", "score": 0.6}, {"label": "positive", "score": 0.4}] for _ in texts]
+
+    registry = ModelRegistry()
+    registry.register(TEXT_MODEL, modality="text", loader=lambda: classify)
+    cascade = TextCascade(PhraseLexicon(HOAXES), keyword_model("chuva"), ngram_confidence=0.9)
+    analyzer = ContentAnalyzer(registry=registry, claims=FakeClaims(), prefilter=cascade)
+    try:
+        known = await analyzer.analyze("Atenção: vacina causa autismo", "text")
+        batch = await analyzer.analyze_many([
+            ("https://exemplo.com", "text"),
+            ("previsão de chuva forte", "text"),
+            ("o jogo de ontem foi bom", "text")
+        ])
+    finally:
+        await analyzer.close()
+
+    assert calls == [["o jogo de ontem foi bom"]]
+    assert known["claim_matches"][0]["similarity"] == 1.0
+    assert known["metadata"]["prefilter_reason"] == "lexicon"
+    assert [result["metadata"]["prefilter_stage"] for result in batch] == ["rules", "ngram", "model"]
+    assert cascade.stats()["exit_rates"]["model"] == pytest.approx(0.25)
+
+
+def test_train_distills_the_text_model(tmp_path):
+    pytest.importorskip("sklearn")
+    data = tmp_path / "texts.jsonl"
+    with open(data, "w") as f:
+        for i in range(60):
+            positive = i % 2 == 0
+            text = f"{'ótimo excelente' if positive else 'péssimo horrível'} dia número {i}"
+            f.write(json.dumps({"text": text, "label": "positive" if positive else "negative"}) + "\n")
+    output = str(tmp_path / "prefilter.npz")
+
+    report = train(str(data), output)
+
+    assert report["holdout_agreement"] == 1.0
+    model = NgramModel.load(output)
+    probabilities = model.probabilities([normalize_text("um dia ótimo")])
+    assert model.labels[int(probabilities.argmax())] == "positive"
@@ -0,0 +1,13 @@
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from app.repositories.verification import decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 12, 30, 1, 250000)
+    verification_id = ObjectId()
+    assert decode_cursor(encode_cursor(created_at, verification_id)) == (created_at, verification_id)
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from app.repositories.result_codec import (
+    CompactResult,
+    LabelVocabulary,
+    encode_result,
+    plain_result,
+    result_codes
+)
+
+def text_result():
+    return {
+        "id": "a1",
+        "type": "text",
+        "content": "Texto longo " * 100,
+        "sentiment": [[{"label": f"LABEL_{i}", "score": score} for i, score in enumerate([0.1, 0.7, 0.2])]],
+        "claim_matches": [],
+        "entities": [],
+        "metadata": {"length": 1200, "language": "pt"}
+    }
+
+def encode(result, vocabulary, **kwargs):
+    return asyncio.run(encode_result(result, vocabulary, **kwargs))
+
+def test_text_result_round_trip():
+    vocabulary = LabelVocabulary()
+    stored = encode(text_result(), vocabulary, top_k=2)
+
+    assert "content" not in stored
+    assert "entities" not in stored
+    assert isinstance(stored["sentiment"]["scores"], bytes)
+
+    result = CompactResult(stored, vocabulary)
+    assert [p["label"] for p in result["sentiment"]] == ["LABEL_1", "LABEL_2"]
+    assert result["sentiment"][0]["score"] == pytest.approx(0.7)
+    assert result["metadata"]["length"] == 1200
+    assert "format" not in result
+
+def test_fields_are_decoded_on_access():
+    vocabulary = LabelVocabulary()
+    result = CompactResult(encode(text_result(), vocabulary), vocabulary)
+
+    result["type"]
+    assert "sentiment" not in result._decoded
+    assert plain_result(result)["sentiment"][0]["label"] == "LABEL_1"
+    assert "sentiment" in result._decoded
+
+def test_video_key_frames_are_packed():
+    vocabulary = LabelVocabulary()
+    video = {
+        "id": "v1",
+        "type": "video",
+        "metadata": {"fps": 25.0},
+        "analysis": {
+            "key_frames": [{"frame_index": 0, "classification": [{"label": "cat", "score": 0.9}]}],
+            "objects": [{"label": "cat", "score": 0.9, "frames": 1}],
+            "scenes": []
+        }
+    }
+    stored = encode(video, vocabulary)
+
+    assert result_codes(stored) == {0}
+    key_frame = CompactResult(stored, vocabulary)["analysis"]["key_frames"][0]
+    assert key_frame["classification"][0]["label"] == "cat"
+
+def test_compact_results_are_not_encoded_twice():
+    vocabulary = LabelVocabulary()
+    stored = encode(text_result(), vocabulary)
+    assert encode(CompactResult(stored, vocabulary), vocabulary) is stored
+    assert encode(stored, vocabulary) is stored
+
+def test_vocabulary_is_shared_between_results():
+    vocabulary = LabelVocabulary()
+    encode(text_result(), vocabulary)
+    image = {"id": "i1", "type": "image", "classification": [{"label": "LABEL_1", "score": 0.5}]}
+    stored = encode(image, vocabulary)
+
+    assert len(vocabulary) == 3
+    assert result_codes(stored) == set(asyncio.run(vocabulary.codes(["LABEL_1"])))
+
+def test_debug_blob():
+    pytest.importorskip("zstandard")
+    vocabulary = LabelVocabulary()
+    result = CompactResult(encode(text_result(), vocabulary, top_k=1, debug=True), vocabulary)
+
+    assert len(result["sentiment"]) == 1
+    assert len(result.debug()["sentiment"][0]) == 3
+    assert "content" not in result.debug()
@@ -0,0 +1,125 @@
+import json
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.classifier import ContentClassifier
+from app.services.scoring import (
+    ABSTAIN_CLASS,
+    CLASSES,
+    CONTENT_TYPES,
+    FEATURE_NAMES,
+    ScoringModel,
+    calibrate_thresholds,
+    feature_matrix,
+    features,
+    train
+)
+
+TEXT = {
+    "type": "text",
+    "sentiment": [{"label": "positive", "score": 0.9}],
+    "claim_matches": [],
+    "entities": [{"word": "OMS"}],
+    "topics": ["saúde"],
+    "metadata": {"length": 40}
+}
+IMAGE = {"type": "image", "classification": [{"label": "a", "score": 0.6}, {"label": "b", "score": 0.3}], "metadata": {"size": (800, 600)}}
+VIDEO = {"type": "video", "metadata": {"fps": 30, "frame_count": 300}, "analysis": {"key_frames": [], "objects": [], "scenes": []}}
+
+
+def weak_claim(label, similarity=0.6):
+    return {"claim": "alegação", "label": settings.CLASSIFICATION_LABELS[label], "similarity": similarity}
+
+
+def test_features_have_a_fixed_length():
+    matrix, content_types = feature_matrix([TEXT, IMAGE, VIDEO, {"type": "video"}])
+    assert matrix.shape == (4, len(FEATURE_NAMES))
+    assert content_types.tolist() == [0, 1, 2, 2]
+    assert matrix[1, FEATURE_NAMES.index("score_margin")] == pytest.approx(0.3)
+
+    with pytest.raises(ValueError):
+        features({"type": "audio"})
+
+
+def test_predictions_below_threshold_are_suspicious():
+    weights = np.zeros((len(FEATURE_NAMES), len(CLASSES)))
+    weights[FEATURE_NAMES.index("top_score"), CLASSES.index("VERIFIED")] = 10.0
+    thresholds = np.zeros((len(CONTENT_TYPES), len(CLASSES)))
+    thresholds[CONTENT_TYPES.index("image"), CLASSES.index("VERIFIED")] = 1.1
+    model = ScoringModel(weights, np.zeros(len(CLASSES)), thresholds)
+
+    matrix, content_types = feature_matrix([TEXT, IMAGE])
+    labels, confidences = model.predict(matrix, content_types)
+
+    assert [CLASSES[label] for label in labels] == ["VERIFIED", "SUSPICIOUS"]
+    assert confidences[0] > 0.99
+    assert 0 < confidences[1] < 0.5
+
+
+def test_prior_follows_weak_claim_verdicts():
+    classifier = ContentClassifier(ScoringModel.prior(threshold=0.5))
+    results = classifier.classify_many([
+        {**TEXT, "claim_matches": [weak_claim("FAKE")]},
+        TEXT,
+        {"type": "audio"}
+    ])
+    assert results[0]["label"] == settings.CLASSIFICATION_LABELS["FAKE"]
+    assert results[1]["label"] == settings.CLASSIFICATION_LABELS["SUSPICIOUS"]
+    assert isinstance(results[2], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_classify_many_matches_classify():
+    classifier = ContentClassifier(ScoringModel.prior())
+    items = [TEXT, IMAGE, VIDEO, {**TEXT, "claim_matches": [weak_claim("VERIFIED", 0.95)]}]
+    assert classifier.classify_many(items) == [await classifier.classify(item) for item in items]
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    model = ScoringModel.prior()
+    model.weights[0, 0] = 0.5
+    path = str(tmp_path / "scoring.npz")
+    model.save(path)
+
+    loaded = ScoringModel.load(path)
+    np.testing.assert_array_equal(loaded.weights, model.weights)
+    np.testing.assert_array_equal(loaded.thresholds, model.thresholds)
+    assert loaded.fingerprint() == model.fingerprint()
+
+
+def test_fingerprint_changes_with_the_parameters():
+    model = ScoringModel.prior()
+    before = model.fingerprint()
+    model.weights[0, 0] += 0.1
+    assert model.fingerprint() != before
+
+
+def test_calibrated_thresholds_reach_target_precision():
+    probabilities = np.array([[0.9, 0.05, 0.05], [0.8, 0.1, 0.1], [0.7, 0.2, 0.1], [0.6, 0.2, 0.2]])
+    labels = np.array([0, 0, 2, 0])
+    thresholds = calibrate_thresholds(probabilities, labels, np.zeros(4, dtype=int), 0.9, default=0.85)
+
+    assert thresholds[0, CLASSES.index("VERIFIED")] == pytest.approx(0.8)
+    assert thresholds[0, ABSTAIN_CLASS] == 0.0
+    # No held-out predictions for images
+    assert thresholds[1, CLASSES.index("FAKE")] == pytest.approx(0.85)
+
+
+def test_train_learns_claim_verdicts(tmp_path):
+    pytest.importorskip("sklearn")
+    data = tmp_path / "labeled.jsonl"
+    with open(data, "w") as f:
+        for i in range(90):
+            label = CLASSES[i % 3]
+            analysis = {**TEXT, "claim_matches": [weak_claim(label, 0.5 + (i % 7) / 20)]}
+            f.write(json.dumps({"analysis_result": analysis, "label": label}) + "\n")
+    output = str(tmp_path / "scoring.npz")
+
+    report = train(str(data), output, target_precision=0.9)
+
+    assert report["holdout_accuracy"] == 1.0
+    model = ScoringModel.load(output)
+    assert model.version == f"scoring.npz@{model.fingerprint()}"
+    classifier = ContentClassifier(model)
+    result = classifier.classify_many([{**TEXT, "claim_matches": [weak_claim("FAKE")]}])[0]
+    assert result["label"] == settings.CLASSIFICATION_LABELS["FAKE"]
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import textwrap
+import pytest
+from app.core.config import settings
+from app.server import memory_report, threads_per_worker
+from app.services.model_registry import memory_usage
+
+def test_threads_are_split_between_workers(monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_TORCH_THREADS", 0)
+    assert threads_per_worker(4, cpus=16) == 4
+    assert threads_per_worker(32, cpus=16) == 1
+    monkeypatch.setattr(settings, "INFERENCE_TORCH_THREADS", 3)
+    assert threads_per_worker(4, cpus=16) == 3
+
+@pytest.mark.skipif(memory_usage() is None, reason="needs /proc/<pid>/smaps_rollup")
+def test_memory_report_splits_shared_and_private_memory():
+    usage = memory_usage()
+    assert usage["rss_bytes"] == pytest.approx(usage["shared_bytes"] + usage["private_bytes"], rel=0.05)
+
+    report = memory_report({os.getpid(): 0})
+    assert report["workers"][0]["worker"] == 0
+    assert report["total_pss_bytes"] >= usage["pss_bytes"]
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_prefork_restarts_workers_and_stops_on_signal(tmp_path):
+    script = textwrap.dedent(f"""
+        import os, signal, time
+        from app.server import Prefork
+
+        def target(index):
+            with open(os.path.join({str(tmp_path)!r}, f"{{index}}-{{os.getpid()}}"), "w"):
+                pass
+            # Worker 1 exits at once and must be restarted
+            time.sleep(0.05 if index == 1 else 30)
+
+        prefork = Prefork(target, workers=2, memory_report_seconds=0)
+        signal.signal(signal.SIGALRM, prefork.stop)
+        signal.alarm(2)
+        prefork.run()
+    """)
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=30)
+
+    started = [name.split("-")[0] for name in os.listdir(tmp_path)]
+    assert started.count("0") == 1
+    assert started.count("1") >= 2
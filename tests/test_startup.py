@@ -0,0 +1,125 @@
+import json
+import subprocess
+import sys
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.api import health
+from app.core.database import DatabaseNotConnectedError
+from app.services.model_registry import ModelRegistry
+from app.services.warmup import ModelWarmup
+
+class FakeExecutor:
+    async def run(self, modality, fn, *args):
+        return fn(*args)
+
+class FakeClaims:
+    def __init__(self, available=False):
+        self.available = available
+
+    def load(self):
+        return self.available
+
+class FakeDatabase:
+    async def command(self, name):
+        return {"ok": 1.0}
+
+def registry_with(loader):
+    registry = ModelRegistry()
+    registry.register("text", modality="text", loader=loader, warmup_input=lambda: "texto")
+    return registry
+
+def test_api_import_does_not_load_heavy_libraries():
+    probe = "import json, sys, app.api.routes; print(json.dumps([m for m in ('torch', 'transformers', 'cv2', 'PIL') if m in sys.modules]))"
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    assert json.loads(output.stdout) == []
+
+@pytest.mark.asyncio
+async def test_warmup_loads_models_in_the_background():
+    calls = []
+    registry = registry_with(lambda: calls.append)
+    warmup = ModelWarmup(registry, FakeExecutor(), FakeClaims())
+
+    assert not warmup.ready
+    warmup.start(["text", "claims"])
+    await warmup.wait()
+
+    assert warmup.ready
+    assert registry.is_loaded("text")
+    assert calls == ["texto"]
+    assert warmup.stats()["finished"]
+
+@pytest.mark.asyncio
+async def test_lazy_loading_only_waits_for_the_claim_index():
+    registry = registry_with(lambda: pytest.fail("loaded eagerly"))
+    warmup = ModelWarmup(registry, FakeExecutor(), FakeClaims())
+    warmup.start(None)
+    await warmup.wait()
+    assert warmup.ready
+    assert not registry.is_loaded("text")
+
+@pytest.mark.asyncio
+async def test_failed_warmup_is_not_ready():
+    def broken():
+        raise RuntimeError("no weights")
+
+    warmup = ModelWarmup(registry_with(broken), FakeExecutor(), FakeClaims())
+    warmup.start(["text"])
+    # Without retries (blocking startup) the error is raised to the caller
+    with pytest.raises(RuntimeError):
+        await warmup.wait()
+    assert not warmup.ready
+    assert warmup.stats()["error"] == "no weights"
+
+@pytest.mark.asyncio
+async def test_failed_warmup_is_retried_and_then_runs_the_ready_callbacks():
+    attempts = []
+    started = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("no weights")
+        return lambda text: None
+
+    async def start_indexer():
+        started.append(True)
+
+    warmup = ModelWarmup(registry_with(flaky), FakeExecutor(), FakeClaims())
+    await warmup.on_ready(start_indexer)
+    warmup.start(["text"], retry_seconds=0.01)
+    await warmup.wait()
+
+    assert warmup.ready
+    assert warmup.stats()["attempts"] == 2
+    assert warmup.stats()["error"] is None
+    assert started == [True]
+
+    # Registered after the warm-up: runs right away
+    await warmup.on_ready(start_indexer)
+    assert started == [True, True]
+
+@pytest.mark.asyncio
+async def test_readiness_waits_for_models_and_database(monkeypatch):
+    app = FastAPI()
+    app.include_router(health.router)
+    warmup = ModelWarmup(registry_with(lambda: lambda text: None), FakeExecutor(), FakeClaims())
+    monkeypatch.setattr(health, "model_warmup", warmup)
+
+    def not_connected():
+        raise DatabaseNotConnectedError("not connected")
+
+    monkeypatch.setattr(health, "get_database", not_connected)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/healthz")).status_code == 200
+
+        response = await client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["checks"] == {"models": False, "database": False}
+
+        warmup.start(["text"])
+        await warmup.wait()
+        monkeypatch.setattr(health, "get_database", lambda: FakeDatabase())
+        response = await client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
@@ -0,0 +1,71 @@
+import pytest
+from app.services.text_preprocessing import (
+    TextPreprocessor,
+    aggregate_window_scores,
+    plan_batches,
+    split_windows
+)
+
+CLS, SEP = 101, 102
+
+class FakeTokenizer:
+    """
+    Whitespace tokenizer with BERT-style special tokens
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts, add_special_tokens=True):
+        self.calls += 1
+        return {"input_ids": [[1000 + len(word) for word in text.split()] for text in texts]}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def build_inputs_with_special_tokens(self, token_ids):
+        return [CLS] + token_ids + [SEP]
+
+def test_split_windows_overlap():
+    windows = split_windows(list(range(10)), window_size=4, overlap=1)
+    assert windows == [[0, 1, 2, 3], [3, 4, 5, 6], [6, 7, 8, 9]]
+    assert split_windows([1, 2], window_size=4, overlap=1) == [[1, 2]]
+
+def test_plan_batches_groups_similar_lengths():
+    lengths = [50, 3, 48, 5, 4, 51]
+    batches = plan_batches(lengths, batch_size=3)
+    assert [sorted(lengths[i] for i in batch) for batch in batches] == [[3, 4, 5], [48, 50, 51]]
+
+def test_aggregate_window_scores():
+    windows = [{"POS": 0.9, "NEG": 0.1}, {"POS": 0.3, "NEG": 0.7}]
+    mean = aggregate_window_scores(windows, [3, 1])
+    assert mean[0] == {"label": "POS", "score": pytest.approx(0.75)}
+    maximum = aggregate_window_scores(windows, [3, 1], "max")
+    assert [entry["score"] for entry in maximum] == [0.9, 0.7]
+
+def test_tokenize_many_windows_and_cache():
+    tokenizer = FakeTokenizer()
+    preprocessor = TextPreprocessor(max_length=6, overlap=1)
+    long_text = " ".join(["palavra"] * 9)
+
+    first = preprocessor.tokenize_many(tokenizer, ["curto", long_text, "curto"])
+    assert first[0] is first[2]
+    assert first[0].windows == [[CLS, 1005, SEP]]
+    assert first[1].token_count == 9
+    # 4 tokens per window plus special tokens, sharing 1 token
+    assert [len(window) for window in first[1].windows] == [6, 6, 5]
+    assert all(window[0] == CLS and window[-1] == SEP for window in first[1].windows)
+
+    second = preprocessor.tokenize_many(tokenizer, [long_text])
+    assert second[0] is first[1]
+    assert tokenizer.calls == 1
+    assert preprocessor.get("curto") is first[0]
+    stats = preprocessor.stats()
+    assert stats["cache_hits"] == 1
+    assert stats["tokens"] == 10
+
+def test_padding_waste_ratio():
+    preprocessor = TextPreprocessor()
+    preprocessor.record_batch([4, 4, 2], seconds=0.1)
+    assert preprocessor.stats()["padding_waste_ratio"] == pytest.approx(2 / 12)
+    assert preprocessor.stats()["inference_tokens_per_second"] == pytest.approx(100)
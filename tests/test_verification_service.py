@@ -0,0 +1,135 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.core.config import settings
+from app.models.database import VerificationCreate
+from app.repositories.result_codec import LabelVocabulary
+from app.repositories import verification as verification_module
+from app.repositories.verification import VerificationRepository
+from app.services.cache import ResultCache
+from app.services.verification import VerificationService
+from app.services.write_behind import WriteBehindBuffer
+
+class FakeRepository:
+    def __init__(self, stored=None):
+        self.stored = stored or {}
+        self.inserted = []
+
+    async def find_many_by_content_hash(self, content_hashes, model_version):
+        return {h: self.stored[h] for h in content_hashes if h in self.stored}
+
+    async def create_many(self, verifications, known_results=None):
+        self.inserted.append((verifications, known_results))
+        return known_results
+
+class FakeAnalyzer:
+    def __init__(self):
+        self.calls = []
+
+    async def analyze_many(self, items):
+        self.calls.append(items)
+        return [
+            ValueError("bad item") if content == "falha" else {"type": content_type, "content": content}
+            for content, content_type in items
+        ]
+
+class FakeClassifier:
+    async def classify(self, analysis):
+        return {"label": "Suspeito", "confidence": 0.6, "explanation": "", "sources": []}
+
+    def classify_many(self, analyses):
+        return [{"label": "Suspeito", "confidence": 0.6, "explanation": "", "sources": []} for _ in analyses]
+
+def make_verification(text):
+    return VerificationCreate(content=text, content_type="text", content_hash=f"hash:{text}")
+
+@pytest.mark.asyncio
+async def test_process_many_single_insert_and_cache():
+    cache = ResultCache(max_entries=100, ttl_seconds=60)
+    cache.set("hash:repetido", {
+        "analysis_result": {"type": "text"},
+        "classification_result": {"label": "Falso"}
+    })
+    repository = FakeRepository()
+    analyzer = FakeAnalyzer()
+    service = VerificationService(repository, analyzer, FakeClassifier(), cache=cache)
+
+    verifications = [make_verification(text) for text in ["novo", "repetido", "falha"]]
+    results = await service.process_many(verifications, [v.content for v in verifications])
+
+    assert len(repository.inserted) == 1
+    assert analyzer.calls == [[("novo", "text"), ("falha", "text")]]
+    assert [result.status for result in results] == ["completed", "completed", "failed"]
+    assert results[1].classification_result == {"label": "Falso"}
+    assert results[2].error == "bad item"
+    assert cache.get("hash:novo") is not None
+
+class SingleWriteRepository:
+    def __init__(self):
+        self.created = []
+
+    async def create(self, verification, known_result=None):
+        self.created.append(known_result)
+        return type("Created", (), {"id": "abc123"})
+
+class FailingAnalyzer:
+    async def analyze(self, content, content_type):
+        raise ValueError("bad content")
+
+class TextAnalyzer:
+    async def analyze(self, content, content_type):
+        return {"type": content_type}
+
+@pytest.mark.asyncio
+async def test_verify_writes_once_with_the_result():
+    repository = SingleWriteRepository()
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    service = VerificationService(repository, TextAnalyzer(), FakeClassifier(), cache=cache)
+
+    verification_id, classification = await service.verify(make_verification("novo"), "novo")
+
+    assert verification_id == "abc123"
+    assert classification["label"] == "Suspeito"
+    assert [result.status for result in repository.created] == ["completed"]
+    assert cache.get("hash:novo") is not None
+
+@pytest.mark.asyncio
+async def test_verify_stores_failures():
+    repository = SingleWriteRepository()
+    service = VerificationService(repository, FailingAnalyzer(), FakeClassifier())
+
+    with pytest.raises(ValueError):
+        await service.verify(make_verification("falha"), "falha")
+    assert [(result.status, result.error) for result in repository.created] == [("failed", "bad content")]
+
+@pytest.mark.asyncio
+async def test_buffered_result_is_read_decoded(monkeypatch):
+    class SentimentAnalyzer:
+        async def analyze(self, content, content_type):
+            return {"type": "text", "sentiment": [{"label": "LABEL_0", "score": 0.2}, {"label": "LABEL_1", "score": 0.8}]}
+
+    database = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(verification_module, "get_collection", lambda name, *args: database[name])
+    monkeypatch.setattr(settings, "RESULT_COMPACT", True)
+    repository = VerificationRepository(LabelVocabulary())
+    buffer = WriteBehindBuffer(repository, flush_ms=10000)
+    service = VerificationService(
+        repository,
+        SentimentAnalyzer(),
+        FakeClassifier(),
+        cache=ResultCache(max_entries=10, ttl_seconds=60),
+        write_behind=buffer
+    )
+
+    verification_id, _ = await service.verify(make_verification("Texto"), "Texto")
+    status = await service.get_status(verification_id)
+
+    assert status["status"] == "completed"
+    assert "content" not in status
+    assert [p["label"] for p in status["analysis_result"]["sentiment"]] == ["LABEL_1", "LABEL_0"]
+    assert status["classification_result"]["label"] == "Suspeito"
+
+    # Read back the same way once written
+    await buffer.stop()
+    assert buffer.get(verification_id) is None
+    stored = await service.get_status(verification_id)
+    assert stored["analysis_result"]["sentiment"] == status["analysis_result"]["sentiment"]
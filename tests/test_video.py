@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+import pytest
+from app.services.video import analyze_video_file, iter_sampled_frames
+
+@pytest.fixture
+def two_scene_video(tmp_path):
+    # 1 second of red followed by 1 second of blue, at 30 fps
+    path = str(tmp_path / "scenes.mp4")
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(path, fourcc, 30.0, (320, 240))
+    for color in [(0, 0, 255), (255, 0, 0)]:
+        for _ in range(30):
+            frame = np.zeros((240, 320, 3), np.uint8)
+            frame[:] = color
+            out.write(frame)
+    out.release()
+    return path
+
+def fake_classifier(calls):
+    def classify_batch(images):
+        calls.append(len(images))
+        return [[{"label": "screen", "score": 0.5}] for _ in images]
+    return classify_batch
+
+def test_stride_sampling(two_scene_video):
+    cap = cv2.VideoCapture(two_scene_video)
+    indices = [index for index, _ in iter_sampled_frames(cap, stride=10)]
+    cap.release()
+
+    assert indices == [0, 10, 20, 30, 40, 50]
+
+def test_scene_changes_select_key_frames(two_scene_video):
+    calls = []
+    result = analyze_video_file(two_scene_video, fake_classifier(calls), stride=5, batch_size=8)
+
+    assert [key_frame["frame_index"] for key_frame in result["key_frames"]] == [0, 30]
+    assert [scene["start_frame"] for scene in result["scenes"]] == [0, 30]
+    assert result["scenes"][0]["end_frame"] == 29
+    assert calls == [2]
+    assert result["objects"] == [{"label": "screen", "score": 0.5, "frames": 2}]
+
+def test_key_frames_are_classified_in_batches(two_scene_video):
+    calls = []
+    result = analyze_video_file(two_scene_video, fake_classifier(calls), stride=5, batch_size=1)
+
+    assert calls == [1, 1]
+    assert all("classification" in key_frame for key_frame in result["key_frames"])
+
+def test_decode_throughput_is_reported(two_scene_video):
+    result = analyze_video_file(two_scene_video, fake_classifier([]), stride=5)
+
+    metadata = result["metadata"]
+    assert metadata["fps"] == 30.0
+    assert metadata["frames_sampled"] == 12
+    assert metadata["decode_fps"] > 0
+
+def test_invalid_video(tmp_path):
+    path = tmp_path / "broken.mp4"
+    path.write_bytes(b"not a video")
+
+    with pytest.raises(ValueError):
+        analyze_video_file(str(path), fake_classifier([]))
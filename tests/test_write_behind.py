@@ -0,0 +1,132 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from app.services.write_behind import WriteBehindBuffer
+
+class FakeRepository:
+    def __init__(self, fail=False, failures=0):
+        self.batches = []
+        self.fail = fail
+        self.failures = failures
+
+    async def bulk_write(self, operations):
+        if self.fail or self.failures:
+            self.failures = max(0, self.failures - 1)
+            raise RuntimeError("write failed")
+        self.batches.append(operations)
+
+def document(status="completed"):
+    return {"_id": ObjectId(), "content": "Texto", "status": status}
+
+@pytest.mark.asyncio
+async def test_results_are_grouped_into_bulk_writes():
+    repository = FakeRepository()
+    buffer = WriteBehindBuffer(repository, batch_size=10, flush_ms=20)
+    await buffer.start()
+
+    documents = [document() for _ in range(25)]
+    for d in documents:
+        await buffer.insert(d)
+    # Unwritten results are readable from the buffer
+    assert buffer.get(str(documents[0]["_id"]))["status"] == "completed"
+    await asyncio.sleep(0.1)
+
+    assert [len(batch) for batch in repository.batches] == [10, 10, 5]
+    assert all(isinstance(operation, InsertOne) for batch in repository.batches for operation in batch)
+    assert buffer.get(str(documents[0]["_id"])) is None
+    stats = buffer.stats()
+    assert stats["written"] == 25
+    assert stats["flushes"] == 3
+    assert stats["max_batch_size"] == 10
+    await buffer.stop()
+
+@pytest.mark.asyncio
+async def test_stop_flushes_buffered_operations():
+    repository = FakeRepository()
+    buffer = WriteBehindBuffer(repository, batch_size=100, flush_ms=10000)
+    await buffer.start()
+
+    await buffer.insert(document())
+    verification_id = str(ObjectId())
+    await buffer.update(verification_id, {"status": "failed", "error": "bad"})
+    assert buffer.get(verification_id)["status"] == "failed"
+    await buffer.stop()
+
+    operations = [operation for batch in repository.batches for operation in batch]
+    assert [type(operation) for operation in operations] == [InsertOne, UpdateOne]
+    assert buffer.stats()["buffered"] == 0
+
+@pytest.mark.asyncio
+async def test_full_buffer_waits_for_a_flush():
+    repository = FakeRepository()
+    buffer = WriteBehindBuffer(repository, max_size=2, batch_size=2, flush_ms=10000)
+    await buffer.start()
+
+    await asyncio.wait_for(
+        asyncio.gather(*(buffer.insert(document()) for _ in range(5))),
+        timeout=1
+    )
+    await buffer.stop()
+    assert sum(len(batch) for batch in repository.batches) == 5
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_counted():
+    buffer = WriteBehindBuffer(FakeRepository(fail=True), batch_size=1, flush_ms=0)
+    await buffer.start()
+    await buffer.insert(document())
+    await buffer.stop()
+
+    assert buffer.stats()["failed"] == 1
+    assert buffer.stats()["written"] == 0
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried_before_newer_operations():
+    repository = FakeRepository(failures=1)
+    buffer = WriteBehindBuffer(repository, batch_size=10, flush_ms=0, retry_ms=20)
+    await buffer.start()
+
+    first = document()
+    await buffer.insert(first)
+    await asyncio.sleep(0.01)
+    # Still buffered, and readable, while the write is retried
+    assert buffer.get(str(first["_id"]))["status"] == "completed"
+    second = document()
+    await buffer.insert(second)
+    await asyncio.sleep(0.1)
+
+    assert repository.batches == [[InsertOne(first)], [InsertOne(second)]]
+    assert buffer.get(str(first["_id"])) is None
+    stats = buffer.stats()
+    assert stats["retried"] == 1
+    assert stats["written"] == 2
+    assert stats["failed"] == 0
+    await buffer.stop()
+
+@pytest.mark.asyncio
+async def test_partially_written_batch_retries_only_the_failures():
+    from pymongo.errors import BulkWriteError
+
+    documents = [document() for _ in range(3)]
+
+    class PartialRepository(FakeRepository):
+        async def bulk_write(self, operations):
+            if not self.batches:
+                self.batches.append([])
+                raise BulkWriteError({"writeErrors": [
+                    {"index": 0, "code": 11000},
+                    {"index": 2, "code": 91}
+                ]})
+            self.batches.append(operations)
+
+    repository = PartialRepository()
+    buffer = WriteBehindBuffer(repository, batch_size=3, flush_ms=50, retry_ms=10)
+    await buffer.start()
+    for d in documents:
+        await buffer.insert(d)
+    await asyncio.sleep(0.15)
+
+    # The duplicate key means the insert was written by an earlier attempt
+    assert repository.batches[1] == [InsertOne(documents[2])]
+    assert buffer.stats()["written"] == 3
+    await buffer.stop()